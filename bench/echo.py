@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Echo suppression benchmark: self-barge-in with open speakers.
+
+Simulates the local voice loop with the agent talking through speakers:
+TTS audio (24 kHz) is written to the player's reference buffer block by
+block, leaks back into the 16 kHz microphone through a room impulse
+response (device latency + acoustic delay + reverb tail), and the user
+sometimes talks over it (barge-in) or speaks in the gaps. Every mic frame
+goes through ``EchoCanceller.process`` with the reference mark it would
+have been captured with, then through the VAD, exactly as
+``LocalAudioTransport`` and ``VoiceLoop`` chain them.
+
+``VoiceLoop`` stops playback on any speech frame while the agent talks,
+so the metrics are per frame of VAD activity. Reported per configuration:
+  self-int  answers the agent would cut off itself (VAD active while only
+            the agent talks), out of all answers
+  active    share of agent-only frames the VAD marks as speech
+  missed    barge-ins (user talking over an answer) the VAD never flags
+  erle      echo attenuation over agent-only stretches, after 2 s
+  us/frame  echo canceller cost per 30 ms frame (one core)
+
+    python -m bench.echo
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from bench.vad import SAMPLE_RATE, _db, _noise, _utterance, make_vad
+from src.audio.echo import EchoCanceller
+from src.audio.resample import resample_pcm16
+
+FRAME_MS = 30
+PLAYBACK_RATE = 24000
+PLAYER_BLOCK = 512
+OUTPUT_LATENCY_S = 0.02
+INPUT_LATENCY_S = 0.01
+
+
+def _room(rng: np.random.Generator, delay_s: float, gain_db: float) -> np.ndarray:
+    """Impulse response: bulk delay, direct path and an exponential tail."""
+    rt = rng.uniform(0.01, 0.03)
+    start = int(delay_s * SAMPLE_RATE)
+    tail = rng.normal(0, 1, int(0.1 * SAMPLE_RATE)) * np.exp(-np.arange(int(0.1 * SAMPLE_RATE)) / (rt * SAMPLE_RATE))
+    tail[0] = 3.0
+    rir = np.zeros(start + len(tail))
+    rir[start:] = tail / np.sqrt(np.sum(tail ** 2)) * _db(gain_db)
+    return rir
+
+
+def generate_scene(seed: int, seconds: float = 40.0, echo_db: float = -8.0) -> dict:
+    """Agent answers with gaps; the user barges in on some and replies in others."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    far = np.zeros(n)
+    near = np.zeros(n)
+    far_spans, near_spans = [], []
+    pos = int(0.5 * SAMPLE_RATE)
+    while pos < n - 6 * SAMPLE_RATE:
+        answer = np.concatenate([_utterance(rng, 210) for _ in range(rng.integers(2, 5))]) * _db(-6)
+        end = min(pos + len(answer), n)
+        barge = rng.random() < 0.4 and end - pos > 3 * SAMPLE_RATE
+        if barge:
+            # User talks over the answer; playback would stop, keep it simple
+            # and let the answer run so double talk lasts a while
+            start = pos + int(rng.uniform(1.5, (end - pos) / SAMPLE_RATE - 1.0) * SAMPLE_RATE)
+        far[pos:end] = answer[: end - pos]
+        far_spans.append((pos, end))
+        if not barge:
+            start = end + int(rng.uniform(0.6, 1.2) * SAMPLE_RATE)
+        reply = _utterance(rng, 120) * _db(-14)
+        if start + len(reply) > n:
+            break
+        stop = start + len(reply)
+        near[start:stop] = reply
+        near_spans.append((start / SAMPLE_RATE, stop / SAMPLE_RATE))
+        pos = max(stop, end) + int(rng.uniform(0.8, 1.5) * SAMPLE_RATE)
+
+    # Speaker -> room -> mic, delayed by the output and input device latency
+    latency = OUTPUT_LATENCY_S + INPUT_LATENCY_S + rng.uniform(0.002, 0.02)
+    echo = np.convolve(far, _room(rng, latency, echo_db))[:n]
+    # A little loudspeaker saturation the linear filter cannot model
+    echo = np.tanh(3 * echo) / 3
+    mic = echo + near + _noise(rng, n, "pink") * _db(-55)
+    pcm = (np.clip(far, -1, 1) * 32767).astype("<i2").tobytes()
+    reference = np.frombuffer(resample_pcm16(pcm, SAMPLE_RATE, PLAYBACK_RATE), dtype="<i2") / 32768.0
+    return {
+        "mic": np.clip(mic, -1, 1),
+        "echo": echo,
+        "reference": reference.astype(np.float32),
+        "far_spans": [(a / SAMPLE_RATE, b / SAMPLE_RATE) for a, b in far_spans],
+        "near_spans": near_spans,
+    }
+
+
+def run(scene: dict, canceller: EchoCanceller | None, vad_backend: str) -> dict:
+    vad = make_vad(vad_backend, None)
+    frame = SAMPLE_RATE * FRAME_MS // 1000
+    mic = (scene["mic"] * 32767).astype("<i2")
+    out = np.zeros(len(mic), dtype=np.float32)
+    reference = scene["reference"]
+    written = 0
+    active = np.zeros(len(mic) // frame, dtype=bool)
+    for k in range(len(mic) // frame):
+        t = (k + 1) * FRAME_MS / 1000
+        # The output callback runs ahead of what is audible by its latency
+        target = int(np.ceil((t + OUTPUT_LATENCY_S) * PLAYBACK_RATE / PLAYER_BLOCK)) * PLAYER_BLOCK
+        if canceller is not None and target > written:
+            block = reference[written:target]
+            canceller.reference.write(np.pad(block, (0, target - written - len(block))))
+            written = target
+        data = mic[k * frame:(k + 1) * frame].tobytes()
+        if canceller is not None:
+            data = canceller.process(data, canceller.reference.written)
+        out[k * frame:(k + 1) * frame] = np.frombuffer(data, dtype="<i2") / 32768.0
+        event = vad.process_frame(data)
+        active[k] = event in ("speech_start", "speech")
+        if event == "speech_end":
+            vad.reset()
+
+    near = scene["near_spans"]
+    frame_s = FRAME_MS / 1000
+    # Agent-only frames: not within a user utterance or its silence tail
+    agent_only = np.zeros(len(active), dtype=bool)
+    for a, b in scene["far_spans"]:
+        agent_only[int(a / frame_s):int(b / frame_s)] = True
+    for a, b in near:
+        agent_only[int(a / frame_s):int((b + 1.0) / frame_s)] = False
+    self_interrupts = sum(
+        bool(np.any(active[int(a / frame_s):int(b / frame_s)] & agent_only[int(a / frame_s):int(b / frame_s)]))
+        for a, b in scene["far_spans"]
+    )
+    barge_ins = [(a, b) for a, b in near if any(fa < a < fb for fa, fb in scene["far_spans"])]
+    missed = sum(not np.any(active[int(a / frame_s):int(b / frame_s)]) for a, b in barge_ins)
+
+    # ERLE where only the agent talks, ignoring the first 2 s of adaptation
+    mask = np.zeros(len(mic), dtype=bool)
+    for a, b in scene["far_spans"]:
+        mask[int(max(a, 2.0) * SAMPLE_RATE):int(b * SAMPLE_RATE)] = True
+    for a, b in near:
+        mask[int(a * SAMPLE_RATE):int((b + 0.3) * SAMPLE_RATE)] = False
+    mic_power = np.mean(scene["mic"][mask] ** 2)
+    out_power = np.mean(out[mask] ** 2)
+    return {
+        "self_interrupts": self_interrupts,
+        "answers": len(scene["far_spans"]),
+        "active_share": float(np.mean(active[agent_only])),
+        "missed_barge_ins": missed,
+        "barge_ins": len(barge_ins),
+        "erle_db": 10 * np.log10(mic_power / max(out_power, 1e-12)),
+        "cost_us": canceller.stats()["mean_cost_us"] if canceller is not None else 0.0,
+    }
+
+
+CONFIGS = {
+    "no AEC": None,
+    "NLMS": {"suppress": False},
+    "NLMS+postfilter": {"suppress": True},
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=4)
+    parser.add_argument("--echo-db", type=float, default=-8.0, help="Echo path gain")
+    parser.add_argument("--vad", default="webrtc")
+    parser.add_argument("--filter-ms", type=int, default=200)
+    parser.add_argument("--json", type=Path, help="Write the full report here")
+    args = parser.parse_args()
+
+    scenes = [generate_scene(seed, echo_db=args.echo_db) for seed in range(args.scenes)]
+    report = {}
+    print(f"{'config':>16} {'self-int':>9} {'active':>7} {'missed':>7} {'erle dB':>8} {'us/frame':>9} {'core %':>7}")
+    for name, kwargs in CONFIGS.items():
+        results = []
+        for scene in scenes:
+            canceller = None
+            if kwargs is not None:
+                canceller = EchoCanceller(
+                    sample_rate=SAMPLE_RATE,
+                    frame_duration_ms=FRAME_MS,
+                    reference_rate=PLAYBACK_RATE,
+                    filter_ms=args.filter_ms,
+                    **kwargs,
+                )
+            results.append(run(scene, canceller, args.vad))
+        total = {key: sum(r[key] for r in results) for key in ("self_interrupts", "answers", "missed_barge_ins", "barge_ins")}
+        mean_cost = float(np.mean([r["cost_us"] for r in results]))
+        report[name] = {
+            **total,
+            "active_share": float(np.mean([r["active_share"] for r in results])),
+            "erle_db": float(np.mean([r["erle_db"] for r in results])),
+            "cost_us_per_frame": mean_cost,
+            "core_share": mean_cost / (FRAME_MS * 1000),
+        }
+        r = report[name]
+        print(
+            f"{name:>16} {total['self_interrupts']:>4}/{total['answers']:<4} {100 * r['active_share']:>6.0f}% "
+            f"{total['missed_barge_ins']:>3}/{total['barge_ins']:<3} {r['erle_db']:>8.1f} "
+            f"{mean_cost:>9.0f} {100 * r['core_share']:>6.1f}%"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
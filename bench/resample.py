@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Resampler throughput benchmark.
+
+Feeds ``--seconds`` of noise through ``Resampler`` in ``--chunk-ms`` chunks
+(the way transports and the player call it) for the rate pairs the app
+uses, and reports input samples per second on one core. BLAS threading
+is pinned to one thread before NumPy is imported, so the numbers are per
+core. A full-buffer ``np.interp`` (linear, no anti-aliasing) is shown as
+a cheap reference point.
+
+    python -m bench.resample
+"""
+from __future__ import annotations
+
+import os
+
+for _var in ("OPENBLAS_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from src.audio.resample import Resampler  # noqa: E402
+
+RATE_PAIRS = [
+    (16000, 48000),  # capture -> call transport
+    (48000, 16000),  # call transport -> VAD/STT
+    (24000, 48000),  # TTS -> call transport
+    (24000, 16000),  # TTS -> 16 kHz output
+    (44100, 48000),  # mp3 TTS -> call transport
+]
+
+
+def bench_streaming(from_rate: int, to_rate: int, seconds: float, chunk_ms: int) -> float:
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, int(from_rate * seconds))
+    samples = samples.astype(np.float32)
+    chunk = from_rate * chunk_ms // 1000
+    resampler = Resampler(from_rate, to_rate)
+    t0 = time.perf_counter()
+    for i in range(0, len(samples), chunk):
+        resampler.process(samples[i:i + chunk])
+    return len(samples) / (time.perf_counter() - t0)
+
+
+def bench_interp(from_rate: int, to_rate: int, seconds: float) -> float:
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, int(from_rate * seconds))
+    t_in = np.arange(len(samples)) / from_rate
+    t_out = np.arange(int(len(samples) * to_rate / from_rate)) / to_rate
+    t0 = time.perf_counter()
+    np.interp(t_out, t_in, samples)
+    return len(samples) / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--chunk-ms", type=int, default=20)
+    parser.add_argument("--json", type=Path, help="Write the full report here")
+    args = parser.parse_args()
+
+    rows = []
+    print(f"{'rate pair':>16} {'taps':>5} {'polyphase MS/s':>15} {'x realtime':>11} {'interp MS/s':>12}")
+    for from_rate, to_rate in RATE_PAIRS:
+        rate = bench_streaming(from_rate, to_rate, args.seconds, args.chunk_ms)
+        interp = bench_interp(from_rate, to_rate, args.seconds)
+        taps = Resampler(from_rate, to_rate).taps
+        rows.append({
+            "from_rate": from_rate,
+            "to_rate": to_rate,
+            "taps_per_phase": taps,
+            "samples_per_sec": rate,
+            "realtime_factor": rate / from_rate,
+            "interp_samples_per_sec": interp,
+        })
+        print(
+            f"{from_rate:>7}->{to_rate:<7} {taps:>5} {rate / 1e6:>15.1f} "
+            f"{rate / from_rate:>10.0f}x {interp / 1e6:>12.1f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps({"chunk_ms": args.chunk_ms, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
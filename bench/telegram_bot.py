@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Telegram bot delivery benchmark: long polling vs webhook.
+
+Runs the real bot (``run_bot``) in a separate process against a local
+stand-in of the Bot API (``FakeBotAPI``, served here), with a fake LLM
+that streams a short fixed answer after ``--ttft-ms``. ``--chats``
+private chats each send one message; updates are injected at
+``--rate`` per second (0 = all at once), and every Bot API call and
+webhook delivery takes ``--rtt-ms`` of simulated network round trip.
+Reported per mode:
+
+  p50/p95 ms   update injected -> first sendMessage for that chat
+  updates/s    updates answered per second of the run
+  api calls    Bot API requests the bot made (getUpdates included)
+
+    python -m bench.telegram_bot --chats 400 --rate 200 --rtt-ms 60
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+from src.llm.base import LLMClient
+
+TOKEN = "123456:BENCH-token"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+# -- Bot API stand-in -----------------------------------------------------------
+
+class FakeBotAPI:
+    """Just enough of the Bot API for the bot: getMe, getUpdates (long
+    poll), set/deleteWebhook (pushing updates to the webhook with up to
+    ``max_connections`` requests in flight, like Telegram),
+    sendMessage/editMessageText (recorded). Anything else returns True.
+    """
+
+    def __init__(self, max_connections: int = 40, rtt_ms: float = 0.0) -> None:
+        self.max_connections = max_connections
+        self.one_way_s = rtt_ms / 2000
+        self.updates: list[dict] = []
+        self.injected: dict[int, float] = {}  # chat id -> time its message was injected
+        self.first_reply: dict[int, float] = {}
+        self.calls: Counter[str] = Counter()
+        self.webhook_url = ""
+        self.webhook_secret = ""
+        self.ready = asyncio.Event()
+        self._new_update = asyncio.Event()
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._webhook_queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._pushers: list[asyncio.Task] = []
+
+    def app(self):
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+
+        async def endpoint(request):
+            method = request.path_params["method"]
+            self.calls[method] += 1
+            params = dict(parse_qsl((await request.body()).decode()))
+            await asyncio.sleep(self.one_way_s)  # request in transit
+            result = await getattr(self, f"_{method}", self._default)(params)
+            await asyncio.sleep(self.one_way_s)  # response in transit
+            return JSONResponse({"ok": True, "result": result})
+
+        return Starlette(routes=[Route("/bot{token}/{method}", endpoint, methods=["POST"])])
+
+    def inject(self, chat_id: int, text: str) -> None:
+        update = {
+            "update_id": self._next_update_id,
+            "message": {
+                "message_id": self._next_update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": f"Candidate {chat_id}"},
+                "text": text,
+            },
+        }
+        self._next_update_id += 1
+        self.injected[chat_id] = time.perf_counter()
+        if self.webhook_url:
+            self._webhook_queue.put_nowait(update)
+        else:
+            self.updates.append(update)
+            self._new_update.set()
+
+    async def _default(self, params: dict) -> bool:
+        return True
+
+    async def _getMe(self, params: dict) -> dict:
+        return BOT_USER
+
+    async def _getUpdates(self, params: dict) -> list[dict]:
+        self.ready.set()
+        offset = int(params.get("offset", 0))
+        self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout=float(params.get("timeout", 0)))
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[: int(params.get("limit", 100))]
+
+    async def _setWebhook(self, params: dict) -> bool:
+        self.webhook_url = params["url"]
+        self.webhook_secret = params.get("secret_token", "")
+        self._pushers = [asyncio.create_task(self._push()) for _ in range(self.max_connections)]
+        self.ready.set()
+        return True
+
+    async def _deleteWebhook(self, params: dict) -> bool:
+        self.webhook_url = ""
+        return True
+
+    async def _sendMessage(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        self.first_reply.setdefault(chat_id, time.perf_counter())
+        return self._message(chat_id, params["text"])
+
+    async def _editMessageText(self, params: dict) -> dict:
+        return self._message(int(params["chat_id"]), params["text"], int(params["message_id"]))
+
+    def _message(self, chat_id: int, text: str, message_id: int | None = None) -> dict:
+        if message_id is None:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": text,
+        }
+
+    async def _push(self) -> None:
+        import aiohttp
+
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret}
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=1)) as client:
+            while True:
+                update = await self._webhook_queue.get()
+                await asyncio.sleep(self.one_way_s)
+                async with client.post(self.webhook_url, json=update, headers=headers) as response:
+                    await response.read()
+                await asyncio.sleep(self.one_way_s)
+
+
+# -- Bot (subprocess) -------------------------------------------------------------
+
+class FakeLLM(LLMClient):
+    """Streams a fixed short answer after ``ttft_ms``."""
+
+    def __init__(self, ttft_ms: float) -> None:
+        self.ttft_s = ttft_ms / 1000
+
+    async def stream_completion(self, messages):
+        await asyncio.sleep(self.ttft_s)
+        for word in "Thanks, tell me more about your last project.".split():
+            yield word + " "
+
+
+def serve_bot(mode: str, api_url: str, webhook_port: int, ttft_ms: float) -> None:
+    import logging
+
+    from src.config import get_settings
+    from src.knowledge.loader import load_knowledge
+    from src.knowledge.retriever import KnowledgeRetriever
+    from src.telegram_bot import run_bot
+
+    logging.basicConfig(level=logging.WARNING)
+    # "Received SIGTERM signal" is the driver stopping the bot, not a problem
+    logging.getLogger("aiogram.dispatcher").setLevel(logging.ERROR)
+    settings = get_settings()
+    retriever = KnowledgeRetriever(load_knowledge(settings.knowledge_dir, settings.chunk_max_tokens))
+    asyncio.run(
+        run_bot(
+            token=TOKEN,
+            retriever=retriever,
+            llm=FakeLLM(ttft_ms),
+            db_path=None,
+            max_sessions=100000,
+            max_concurrency=64,
+            coalesce_ms=0,
+            webhook_url=f"http://127.0.0.1:{webhook_port}/telegram/webhook" if mode == "webhook" else None,
+            webhook_host="127.0.0.1",
+            webhook_port=webhook_port,
+            api_url=api_url,
+        )
+    )
+
+
+# -- Driver ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_mode(
+    mode: str, chats: int, rate: float, ttft_ms: float, rtt_ms: float, timeout_s: float = 60.0
+) -> dict:
+    import uvicorn
+
+    api = FakeBotAPI(rtt_ms=rtt_ms)
+    api_port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app(), host="127.0.0.1", port=api_port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    bot = subprocess.Popen(
+        [sys.executable, "-m", "bench.telegram_bot", "--serve-bot", mode,
+         "--api", f"http://127.0.0.1:{api_port}", "--webhook-port", str(_free_port()),
+         "--ttft-ms", str(ttft_ms)],
+    )
+    try:
+        await asyncio.wait_for(api.ready.wait(), timeout=30)
+        await asyncio.sleep(0.5)  # polling: let the first getUpdates settle
+        calls_before = sum(api.calls.values())
+        t0 = time.perf_counter()
+        for chat_id in range(1, chats + 1):
+            api.inject(chat_id, f"Hi, I'm candidate {chat_id}")
+            if rate > 0:
+                await asyncio.sleep(max(0.0, t0 + chat_id / rate - time.perf_counter()))
+        deadline = time.monotonic() + timeout_s
+        while len(api.first_reply) < chats and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        wall = max(api.first_reply.values(), default=t0) - t0
+        calls = sum(api.calls.values()) - calls_before
+    finally:
+        # The bot finishes the answers in progress (its chat queues drain)
+        # before exiting; keep serving its last edits meanwhile
+        bot.terminate()
+        await asyncio.to_thread(bot.wait)
+        server.should_exit = True
+        await serving
+        for task in api._pushers:
+            task.cancel()
+
+    latencies = sorted((api.first_reply[c] - api.injected[c]) * 1000 for c in api.first_reply)
+    return {
+        "answered": len(latencies),
+        "p50_ms": statistics.median(latencies) if latencies else float("nan"),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else float("nan"),
+        "updates_per_s": len(latencies) / wall if wall > 0 else float("nan"),
+        "api_calls": calls,
+        "get_updates": api.calls["getUpdates"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=200.0, help="Updates injected per second, 0 = at once")
+    parser.add_argument("--ttft-ms", type=float, default=50.0, help="Fake LLM time to first token")
+    parser.add_argument("--rtt-ms", type=float, default=60.0, help="Simulated round trip to the Bot API")
+    parser.add_argument("--json", type=Path, help="Write the full report here")
+    parser.add_argument("--serve-bot", choices=["polling", "webhook"], help=argparse.SUPPRESS)
+    parser.add_argument("--api", help=argparse.SUPPRESS)
+    parser.add_argument("--webhook-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_bot:
+        serve_bot(args.serve_bot, args.api, args.webhook_port, args.ttft_ms)
+        return
+
+    report = {}
+    print(f"{'mode':>8} {'answered':>9} {'p50 ms':>8} {'p95 ms':>8} {'updates/s':>10} {'api calls':>10}")
+    for mode in ("polling", "webhook"):
+        r = asyncio.run(run_mode(mode, args.chats, args.rate, args.ttft_ms, args.rtt_ms))
+        report[mode] = r
+        print(
+            f"{mode:>8} {r['answered']:>9} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} "
+            f"{r['updates_per_s']:>10.0f} {r['api_calls']:>10}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
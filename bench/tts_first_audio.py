@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Time-to-first-audio benchmark for TTS segmentation.
+
+Replays LLM token streams (``bench/fixtures/token_streams.jsonl``: one JSON
+object per line with ``[ms_since_request, token]`` pairs) on a simulated
+clock and reports when the first TTS segment would be sent, for the legacy
+sentence-only rule and for ``AdaptiveSegmenter``. Time to first audio is
+that moment plus a fixed TTS round trip (``--tts-latency-ms``).
+
+The bundled streams are sample answers in the interview's style with
+typical gpt-4o-mini timing. Record real ones with the configured LLM:
+
+    python -m bench.tts_first_audio --record "Tell me about the AI Principal role"
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from src.tts.segmenter import AdaptiveSegmenter
+
+FIXTURES = Path(__file__).parent / "fixtures" / "token_streams.jsonl"
+
+
+def load_streams(path: Path = FIXTURES) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def legacy_first_segment(tokens: list[list]) -> tuple[float, str]:
+    """The pre-segmenter rule: flush on . ! ? or newline once > 10 chars."""
+    parts: list[str] = []
+    for t_ms, token in tokens:
+        parts.append(token)
+        text = "".join(parts).strip()
+        if any(d in token for d in ".!?\n") and len(text) > 10:
+            return t_ms, text
+    return tokens[-1][0], "".join(parts).strip()
+
+
+def adaptive_first_segment(tokens: list[list], **kwargs) -> tuple[float, str]:
+    """Replay through AdaptiveSegmenter, including its stall timer."""
+    now = 0.0
+    segmenter = AdaptiveSegmenter(clock=lambda: now / 1000, **kwargs)
+    for t_ms, token in tokens:
+        due = segmenter.time_until_due()
+        if due is not None and now + due * 1000 <= t_ms:
+            now += due * 1000
+            segment = segmenter.cut_on_timeout()
+            if segment:
+                return now, segment
+        now = t_ms
+        segments = segmenter.push(token)
+        if segments:
+            return now, segments[0]
+    return now, segmenter.flush() or ""
+
+
+def run(streams: list[dict], tts_latency_ms: float) -> dict:
+    rows = []
+    for stream in streams:
+        tokens = stream["tokens"]
+        legacy_ms, legacy_seg = legacy_first_segment(tokens)
+        adaptive_ms, adaptive_seg = adaptive_first_segment(tokens)
+        rows.append({
+            "name": stream["name"],
+            "llm_ttft_ms": tokens[0][0],
+            "legacy_first_audio_ms": legacy_ms + tts_latency_ms,
+            "adaptive_first_audio_ms": adaptive_ms + tts_latency_ms,
+            "legacy_first_segment": legacy_seg,
+            "adaptive_first_segment": adaptive_seg,
+        })
+
+    def summary(key: str) -> dict:
+        values = [r[key] for r in rows]
+        return {
+            "mean": statistics.mean(values),
+            "p50": statistics.median(values),
+            "max": max(values),
+        }
+
+    return {
+        "tts_latency_ms": tts_latency_ms,
+        "streams": rows,
+        "legacy": summary("legacy_first_audio_ms"),
+        "adaptive": summary("adaptive_first_audio_ms"),
+    }
+
+
+async def record(question: str, path: Path) -> None:
+    """Record a real token stream from the configured LLM."""
+    from src.config import get_settings
+    from src.llm.openai_client import OpenAILLMClient
+
+    settings = get_settings()
+    llm = OpenAILLMClient(
+        api_key=settings.llm_api_key,
+        model=settings.llm_model,
+        base_url=settings.llm_base_url,
+    )
+    messages = [{"role": "user", "content": question}]
+    tokens: list[list] = []
+    t_start = time.monotonic()
+    async for token in llm.stream_completion(messages):
+        tokens.append([round((time.monotonic() - t_start) * 1000, 1), token])
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"name": question[:40], "model": settings.llm_model, "tokens": tokens}, ensure_ascii=False) + "\n")
+    print(f"Recorded {len(tokens)} tokens to {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    parser.add_argument("--tts-latency-ms", type=float, default=250.0)
+    parser.add_argument("--json", type=Path, help="Write the full report here")
+    parser.add_argument("--record", metavar="QUESTION", help="Record a real LLM stream into --fixtures")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.record, args.fixtures))
+        return
+
+    report = run(load_streams(args.fixtures), args.tts_latency_ms)
+    print(f"\n{'stream':<24} {'TTFT':>6} {'legacy':>8} {'adaptive':>9}  first segment")
+    for r in report["streams"]:
+        print(
+            f"{r['name']:<24} {r['llm_ttft_ms']:>6.0f} {r['legacy_first_audio_ms']:>8.0f} "
+            f"{r['adaptive_first_audio_ms']:>9.0f}  {r['adaptive_first_segment'][:40]!r}"
+        )
+    legacy, adaptive = report["legacy"], report["adaptive"]
+    print(
+        f"\nTime to first audio (ms): legacy mean {legacy['mean']:.0f} / p50 {legacy['p50']:.0f}, "
+        f"adaptive mean {adaptive['mean']:.0f} / p50 {adaptive['p50']:.0f}\n"
+    )
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Offline VAD benchmark: end-of-speech delay, false triggers, per-frame cost.
+
+Runs every VAD backend over labelled 16 kHz mono WAV files, the way
+``VoiceLoop`` drives it (30 ms frames, ``reset()`` after each
+``speech_end``). A fixture is ``<name>.wav`` plus ``<name>.json`` with
+``{"speech": [[start_s, end_s], ...]}`` for the near-end talker only.
+
+Metrics per backend and fixture:
+  eos_delay_ms   time from the labelled end of an utterance to speech_end
+  missed         utterances with no speech_start inside them
+  false_triggers speech_start outside any labelled utterance (echo, noise)
+  cost_us        mean scoring time per frame
+
+Drop recordings into the fixture directory to benchmark on them. Without
+recordings, ``--generate`` writes deterministic synthetic scenes (voiced
+syllables with formants over quiet, office and fan noise, keyboard
+clicks, and a speaker-echo scene where the far-end voice leaks into the
+mic and must not trigger):
+
+    python -m bench.vad --generate
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from src.audio.vad import VAD_BACKENDS, EnergyVAD, SpectralVAD, WebRtcVAD
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FIXTURES = Path(".cache/bench/vad")
+
+
+def make_vad(backend: str, silence_ms: int | None):
+    kwargs = {"sample_rate": SAMPLE_RATE, "frame_duration_ms": FRAME_MS}
+    if silence_ms is not None:
+        kwargs["silence_duration_ms"] = silence_ms
+    if backend == "webrtc":
+        return WebRtcVAD(**kwargs)
+    if backend == "spectral":
+        return SpectralVAD(**kwargs)
+    return EnergyVAD(**kwargs)
+
+
+# -- Synthetic fixtures -------------------------------------------------------
+
+def _syllable(rng: np.random.Generator, f0: float, duration: float) -> np.ndarray:
+    """A voiced syllable: formant-weighted harmonics with pitch movement."""
+    n = int(duration * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    pitch = f0 * (1 + 0.06 * np.sin(2 * np.pi * rng.uniform(3, 6) * t) + rng.uniform(-0.05, 0.05))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    f1, f2 = rng.uniform(400, 850), rng.uniform(1000, 2300)
+    out = np.zeros(n)
+    for k in range(1, int(3800 / f0)):
+        freq = k * f0
+        gain = np.exp(-((freq - f1) / 180) ** 2) + 0.6 * np.exp(-((freq - f2) / 250) ** 2) + 0.05
+        out += gain / k ** 0.5 * np.sin(k * phase)
+    if rng.random() < 0.3:
+        # Fricative onset ("s", "sh"): high-passed noise burst
+        burst = int(0.06 * SAMPLE_RATE)
+        noise = np.diff(rng.normal(0, 1, burst + 1)) * 0.3
+        out[:burst] = out[:burst] * np.linspace(0, 1, burst) + noise
+    envelope = np.sin(np.pi * np.arange(n) / n) ** 0.6
+    return out * envelope
+
+
+def _utterance(rng: np.random.Generator, f0: float) -> np.ndarray:
+    parts = []
+    for _ in range(rng.integers(5, 14)):
+        parts.append(_syllable(rng, f0, rng.uniform(0.12, 0.26)))
+        if rng.random() < 0.3:
+            parts.append(np.zeros(int(rng.uniform(0.05, 0.2) * SAMPLE_RATE)))
+    audio = np.concatenate(parts)
+    return audio / np.max(np.abs(audio))
+
+
+def _noise(rng: np.random.Generator, n: int, color: str) -> np.ndarray:
+    white = rng.normal(0, 1, n)
+    if color == "white":
+        return white
+    spectrum = np.fft.rfft(white)
+    freqs = np.fft.rfftfreq(n, 1 / SAMPLE_RATE)
+    freqs[0] = freqs[1]
+    spectrum /= freqs ** (0.5 if color == "pink" else 1.0)
+    colored = np.fft.irfft(spectrum, n)
+    return colored / np.std(colored)
+
+
+def _db(level_db: float) -> float:
+    return 10 ** (level_db / 20)
+
+
+def generate_scene(name: str, seed: int, duration: float = 24.0) -> tuple[np.ndarray, list]:
+    rng = np.random.default_rng(seed)
+    n = int(duration * SAMPLE_RATE)
+    audio = np.zeros(n)
+    speech: list[list[float]] = []
+    echo_spans: list[tuple[int, int]] = []
+    f0 = rng.uniform(100, 210)
+    pos = int(1.5 * SAMPLE_RATE)  # room for EnergyVAD calibration
+    while True:
+        utt = _utterance(rng, f0) * _db(-12)
+        if pos + len(utt) + SAMPLE_RATE > n:
+            break
+        audio[pos:pos + len(utt)] += utt
+        speech.append([round(pos / SAMPLE_RATE, 3), round((pos + len(utt)) / SAMPLE_RATE, 3)])
+        gap = int(rng.uniform(1.8, 3.2) * SAMPLE_RATE)
+        echo_spans.append((pos + len(utt) + int(0.3 * SAMPLE_RATE), pos + len(utt) + gap - int(0.3 * SAMPLE_RATE)))
+        pos += len(utt) + gap
+
+    if name == "quiet":
+        audio += _noise(rng, n, "white") * _db(-60)
+    elif name == "office":
+        t = np.arange(n) / SAMPLE_RATE
+        hum = sum(np.sin(2 * np.pi * 50 * k * t) / k for k in range(1, 6))
+        audio += _noise(rng, n, "pink") * _db(-42) + hum * _db(-48)
+    elif name == "fan":
+        audio += _noise(rng, n, "brown") * _db(-28) + _noise(rng, n, "white") * _db(-45)
+    elif name == "keyboard":
+        audio += _noise(rng, n, "white") * _db(-58)
+        for start, end in echo_spans:
+            for click in rng.integers(start, end, size=6):
+                length = int(0.004 * SAMPLE_RATE)
+                audio[click:click + length] += rng.normal(0, 1, len(audio[click:click + length])) * _db(-20)
+    elif name == "echo":
+        # Far-end (TTS) voice leaking from the speakers between the user's turns
+        audio += _noise(rng, n, "pink") * _db(-55)
+        far_f0 = 240 - f0 / 2
+        for start, end in echo_spans:
+            leak = _utterance(rng, far_f0)[: end - start]
+            # Speaker + room: lowpass-ish smoothing and -30 dB
+            leak = np.convolve(leak, np.ones(4) / 4, mode="same") * _db(-32)
+            audio[start:start + len(leak)] += leak
+    return np.clip(audio, -1, 1), speech
+
+
+SCENES = ("quiet", "office", "fan", "keyboard", "echo")
+
+
+def write_fixtures(directory: Path) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for seed, name in enumerate(SCENES):
+        audio, speech = generate_scene(name, seed)
+        with wave.open(str(directory / f"{name}.wav"), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes((audio * 32767).astype("<i2").tobytes())
+        (directory / f"{name}.json").write_text(json.dumps({"speech": speech}))
+    print(f"Wrote {len(SCENES)} synthetic fixtures to {directory}")
+
+
+# -- Evaluation ---------------------------------------------------------------
+
+def load_fixture(path: Path) -> tuple[bytes, list[list[float]]]:
+    with wave.open(str(path), "rb") as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit WAV")
+        pcm = wf.readframes(wf.getnframes())
+    labels = json.loads(path.with_suffix(".json").read_text())
+    return pcm, labels["speech"]
+
+
+def run_fixture(vad, pcm: bytes, speech: list[list[float]]) -> dict:
+    frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * 2
+    starts: list[float] = []
+    ends: list[float] = []
+    for i in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        event = vad.process_frame(pcm[i:i + frame_bytes])
+        t = (i + frame_bytes) / 2 / SAMPLE_RATE  # end of the frame
+        if event == "speech_start":
+            starts.append(t)
+        elif event == "speech_end":
+            ends.append(t)
+            vad.reset()
+
+    delays, missed = [], 0
+    for k, (start, end) in enumerate(speech):
+        if not any(start <= s <= end for s in starts):
+            missed += 1
+            continue
+        next_start = speech[k + 1][0] if k + 1 < len(speech) else float("inf")
+        after = [e for e in ends if end <= e < next_start]
+        if after:
+            delays.append((after[0] - end) * 1000)
+    tolerance = 0.2
+    false_triggers = sum(
+        not any(start - tolerance <= s <= end + tolerance for start, end in speech)
+        for s in starts
+    )
+    return {
+        "eos_delay_ms": delays,
+        "missed": missed,
+        "utterances": len(speech),
+        "false_triggers": false_triggers,
+        "cost_us": vad.stats()["mean_cost_us"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    parser.add_argument("--generate", action="store_true", help="Write synthetic fixtures first")
+    parser.add_argument("--backends", default=",".join(VAD_BACKENDS))
+    parser.add_argument("--silence-ms", type=int, help="Override every backend's silence tail")
+    parser.add_argument("--json", type=Path, help="Write the full report here")
+    args = parser.parse_args()
+
+    if args.generate or not any(args.fixtures.glob("*.wav")):
+        write_fixtures(args.fixtures)
+    fixtures = sorted(args.fixtures.glob("*.wav"))
+
+    report: dict[str, dict] = {}
+    print(f"{'backend':>9} {'fixture':>10} {'eos p50':>8} {'eos p95':>8} {'missed':>7} {'false':>6} {'us/frame':>9}")
+    for backend in args.backends.split(","):
+        report[backend] = {}
+        for path in fixtures:
+            pcm, speech = load_fixture(path)
+            result = run_fixture(make_vad(backend, args.silence_ms), pcm, speech)
+            report[backend][path.stem] = result
+            delays = sorted(result["eos_delay_ms"]) or [float("nan")]
+            p95 = delays[min(len(delays) - 1, int(len(delays) * 0.95))]
+            print(
+                f"{backend:>9} {path.stem:>10} {statistics.median(delays):>8.0f} {p95:>8.0f} "
+                f"{result['missed']:>3}/{result['utterances']:<3} {result['false_triggers']:>6} "
+                f"{result['cost_us']:>9.1f}"
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
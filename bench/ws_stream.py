@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""WebSocket token streaming benchmark: frames/s and server CPU per session.
+
+Starts the ``/ws`` text endpoint in a separate server process (FastAPI +
+uvicorn, like ``run_web``) with a fake agent that replays the recorded
+LLM token streams from ``bench/fixtures/token_streams.jsonl`` at their
+original timing (``--speedup`` compresses it to emulate faster models or
+bursty networks). ``--sessions`` clients connect at once, each asks one
+question per stream and waits for ``done``. Reported per mode:
+
+  frames/s     WebSocket frames the server sent per second (all sessions)
+  tok/frame    tokens per frame
+  cpu ms/sess  server process CPU time (user + system) per session
+  ttft ms      client-side time to the first token frame (p50)
+
+Modes: ``send_json`` is the old handler (``send_json`` per token),
+``per-token`` the app's ``/ws`` with coalescing off (pre-encoded frames,
+one per token), ``coalesced-N`` batches over N ms with ``TokenCoalescer``.
+
+    python -m bench.ws_stream --sessions 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures" / "token_streams.jsonl"
+
+
+# -- Server (subprocess) ------------------------------------------------------
+
+def _load_streams() -> list[list]:
+    return [json.loads(line)["tokens"] for line in FIXTURES.read_text(encoding="utf-8").splitlines() if line]
+
+
+class ReplayAgent:
+    """Stands in for InterviewAgent: the question is a fixture index."""
+
+    def __init__(self, streams: list[list], speedup: float) -> None:
+        self.streams = streams
+        self.speedup = speedup
+
+    async def respond_stream(self, user_message: str):
+        previous = 0.0
+        for t_ms, token in self.streams[int(user_message) % len(self.streams)]:
+            await asyncio.sleep((t_ms - previous) / 1000 / self.speedup)
+            previous = t_ms
+            yield token
+
+
+def _legacy_app(agent: ReplayAgent):
+    """The handler before coalescing: one ``send_json`` per token."""
+    from starlette.applications import Starlette
+    from starlette.routing import WebSocketRoute
+    from starlette.websockets import WebSocketDisconnect
+
+    async def websocket_endpoint(ws):
+        await ws.accept()
+        try:
+            while True:
+                data = await ws.receive_text()
+                parts: list[str] = []
+                async for token in agent.respond_stream(data):
+                    parts.append(token)
+                    await ws.send_json({"type": "token", "text": token})
+                await ws.send_json({"type": "done", "text": "".join(parts)})
+        except WebSocketDisconnect:
+            pass
+
+    return Starlette(routes=[WebSocketRoute("/ws", websocket_endpoint)])
+
+
+def serve(port: int, window_ms: float, speedup: float) -> None:
+    import uvicorn
+
+    from src.config import Settings
+    from src.web_app import create_app
+
+    agent = ReplayAgent(_load_streams(), speedup)
+    if window_ms < 0:
+        app = _legacy_app(agent)
+    else:
+        settings = Settings(ws_coalesce_ms=window_ms, session_max=100000)
+        app = create_app(settings, agent_factory=lambda: agent)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+# -- Clients ------------------------------------------------------------------
+
+def _cpu_seconds(pid: int) -> float:
+    """User + system CPU of a process (Linux /proc)."""
+    fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _session(port: int, index: int, questions: int) -> tuple[int, int, list[float]]:
+    import websockets
+
+    frames = tokens = 0
+    ttfts: list[float] = []
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws", max_queue=None) as ws:
+        for q in range(questions):
+            t0 = time.perf_counter()
+            await ws.send(str(index + q))
+            first = True
+            while True:
+                message = json.loads(await ws.recv())
+                if message["type"] == "session":
+                    continue
+                frames += 1
+                if message["type"] == "done":
+                    break
+                if first:
+                    ttfts.append((time.perf_counter() - t0) * 1000)
+                    first = False
+                tokens += 1
+    return frames, tokens, ttfts
+
+
+async def _wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def run_mode(window_ms: float, sessions: int, questions: int, speedup: float) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "bench.ws_stream", "--serve", str(port),
+         "--window-ms", str(window_ms), "--speedup", str(speedup)],
+    )
+    try:
+        await _wait_for_port(port)
+        cpu0, t0 = _cpu_seconds(server.pid), time.perf_counter()
+        results = await asyncio.gather(*(_session(port, i, questions) for i in range(sessions)))
+        cpu, wall = _cpu_seconds(server.pid) - cpu0, time.perf_counter() - t0
+    finally:
+        server.terminate()
+        server.wait()
+    frames = sum(r[0] for r in results)
+    tokens = sum(r[1] for r in results)  # token frames as seen by the client
+    ttfts = [t for r in results for t in r[2]]
+    streams = _load_streams()
+    llm_tokens = sum(len(streams[(i + q) % len(streams)]) + 1 for i in range(sessions) for q in range(questions))
+    return {
+        "frames": frames,
+        "frames_per_s": frames / wall,
+        "tokens_per_frame": llm_tokens / max(tokens, 1),
+        "cpu_ms_per_session": cpu * 1000 / sessions,
+        "server_core_share": cpu / wall,
+        "ttft_p50_ms": statistics.median(ttfts),
+        "wall_s": wall,
+    }
+
+
+MODES = {"send_json": -1.0, "per-token": 0.0, "coalesced-20": 20.0, "coalesced-50": 50.0, "coalesced-80": 80.0, "coalesced-120": 120.0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=2, help="Answers streamed per session")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Replay token timing this much faster")
+    parser.add_argument("--json", type=Path, help="Write the full report here")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--window-ms", type=float, default=80.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.window_ms, args.speedup)
+        return
+
+    report = {}
+    print(f"{'mode':>14} {'frames/s':>9} {'tok/frame':>10} {'cpu ms/sess':>12} {'server core':>12} {'ttft ms':>8}")
+    for name, window_ms in MODES.items():
+        r = asyncio.run(run_mode(window_ms, args.sessions, args.questions, args.speedup))
+        report[name] = r
+        print(
+            f"{name:>14} {r['frames_per_s']:>9.0f} {r['tokens_per_frame']:>10.2f} "
+            f"{r['cpu_ms_per_session']:>12.2f} {100 * r['server_core_share']:>11.1f}% {r['ttft_p50_ms']:>8.0f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
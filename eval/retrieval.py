@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Retrieval-only evaluation: no LLM, no API key.
+
+Scores ``KnowledgeRetriever`` against the judgments in
+``eval/questions.json`` at two levels:
+
+- chunk:  relevant = the question's ``expected_chunks`` ids
+- source: the ranking collapsed to files (first hit per file),
+          relevant = the question's ``expected_source``
+
+For each level it reports recall@k, nDCG@k (binary gains) and MRR,
+averaged over the questions that have judgments. Questions without any
+(off-topic ones) should retrieve nothing; the share that did is reported
+as ``negatives.retrieved_rate``. Each query is timed over ``--repeat``
+runs.
+
+    python -m eval.retrieval --json report.json
+    python -m eval.retrieval --chunk-max-tokens 200 --baseline report.json
+
+With ``--baseline`` the metrics are compared with an earlier report and
+the exit code is 1 if any of them dropped by more than ``--tolerance``.
+Chunk ids of markdown sections include their position, so re-check
+``expected_chunks`` when chunking changes; ids missing from the index
+are listed under ``unknown_chunks``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Protocol
+
+from src.knowledge.loader import Chunk
+
+
+class Retriever(Protocol):
+    def retrieve(self, query: str, top_k: int = 5) -> list[Chunk]: ...
+
+
+def recall_at_k(ranked: list[str], relevant: set[str], k: int) -> float:
+    """Share of the relevant items found in the top ``k``."""
+    if not relevant:
+        return 0.0
+    return len(relevant.intersection(ranked[:k])) / len(relevant)
+
+
+def reciprocal_rank(ranked: list[str], relevant: set[str]) -> float:
+    """1 / rank of the first relevant item, 0 if none was retrieved."""
+    for rank, item in enumerate(ranked, 1):
+        if item in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: list[str], relevant: set[str], k: int) -> float:
+    """Normalized discounted cumulative gain with binary relevance."""
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, item in enumerate(ranked[:k], 1) if item in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(k, len(relevant)) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def score_ranking(ranked: list[str], relevant: set[str], ks: Sequence[int]) -> dict[str, float]:
+    scores = {"mrr": reciprocal_rank(ranked, relevant)}
+    for k in ks:
+        scores[f"recall@{k}"] = recall_at_k(ranked, relevant, k)
+        scores[f"ndcg@{k}"] = ndcg_at_k(ranked, relevant, k)
+    return scores
+
+
+def _sources(chunks: list[Chunk]) -> list[str]:
+    return list(dict.fromkeys(c.source for c in chunks))
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def evaluate_retrieval(
+    retriever: Retriever,
+    questions: list[dict],
+    ks: Sequence[int] = (1, 3, 5),
+    repeat: int = 20,
+    known_chunks: set[str] | None = None,
+) -> dict:
+    """Score ``retriever`` on ``questions``; returns the report dict."""
+    depth = max(ks)
+    levels: dict[str, list[dict[str, float]]] = {"chunk": [], "source": []}
+    negatives: list[bool] = []
+    timings: list[float] = []
+    queries: list[dict] = []
+    unknown: set[str] = set()
+
+    for q in questions:
+        samples = []
+        for _ in range(max(1, repeat)):
+            t_start = time.perf_counter()
+            results = retriever.retrieve(q["question"], top_k=depth)
+            samples.append((time.perf_counter() - t_start) * 1000)
+        timings.extend(samples)
+
+        ranked = [c.chunk_id for c in results]
+        entry: dict = {
+            "question": q["question"],
+            "retrieved": ranked,
+            "latency_ms": statistics.median(samples),
+        }
+        expected_chunks = set(q.get("expected_chunks") or [])
+        expected_source = q.get("expected_source")
+        if known_chunks is not None:
+            unknown |= expected_chunks - known_chunks
+        if expected_chunks:
+            entry["chunk"] = score_ranking(ranked, expected_chunks, ks)
+            levels["chunk"].append(entry["chunk"])
+        if expected_source:
+            entry["source"] = score_ranking(_sources(results), {expected_source}, ks)
+            levels["source"].append(entry["source"])
+        if not expected_chunks and not expected_source:
+            negatives.append(bool(results))
+        queries.append(entry)
+
+    timings.sort()
+    return {
+        "metrics": {
+            level: {name: statistics.fmean(s[name] for s in scores) for name in scores[0]}
+            for level, scores in levels.items()
+            if scores
+        },
+        "judged": {level: len(scores) for level, scores in levels.items()},
+        "negatives": {
+            "count": len(negatives),
+            "retrieved_rate": statistics.fmean(negatives) if negatives else 0.0,
+        },
+        "latency_ms": {
+            "p50": _percentile(timings, 0.5),
+            "p95": _percentile(timings, 0.95),
+            "max": timings[-1] if timings else 0.0,
+            "mean": statistics.fmean(timings) if timings else 0.0,
+        },
+        "unknown_chunks": sorted(unknown),
+        "queries": queries,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Metrics that dropped by more than ``tolerance`` against ``baseline``."""
+    regressions = []
+    for level, metrics in baseline.get("metrics", {}).items():
+        for name, old in metrics.items():
+            new = report["metrics"].get(level, {}).get(name)
+            if new is not None and new < old - tolerance:
+                regressions.append(f"{level} {name}: {old:.3f} -> {new:.3f}")
+    return regressions
+
+
+def _print_report(report: dict, baseline: dict | None) -> None:
+    for level, metrics in report["metrics"].items():
+        print(f"\n{level} level ({report['judged'][level]} questions)")
+        for name, value in metrics.items():
+            line = f"  {name:<10} {value:.3f}"
+            old = (baseline or {}).get("metrics", {}).get(level, {}).get(name)
+            if old is not None:
+                line += f"  ({value - old:+.3f} vs baseline)"
+            print(line)
+    negatives = report["negatives"]
+    if negatives["count"]:
+        print(f"\noff-topic questions retrieving something: {negatives['retrieved_rate']:.0%} of {negatives['count']}")
+    latency = report["latency_ms"]
+    print(
+        f"\nlatency: p50 {latency['p50']:.3f} ms, p95 {latency['p95']:.3f} ms, max {latency['max']:.3f} ms"
+        f" (index built in {report['config']['index_ms']:.1f} ms)"
+    )
+    if report["unknown_chunks"]:
+        print(f"\nWARNING: expected chunk ids not in the index: {report['unknown_chunks']}")
+
+
+def main() -> None:
+    from src.config import get_settings, setup_logging
+    from src.knowledge.loader import load_knowledge
+    from src.knowledge.retriever import KnowledgeRetriever
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default="eval/questions.json")
+    parser.add_argument("--knowledge-dir", help="Default: KNOWLEDGE_DIR")
+    parser.add_argument("--chunk-max-tokens", type=int, help="Default: CHUNK_MAX_TOKENS")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--json", type=Path, help="Write the report here")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Allowed drop per metric")
+    args = parser.parse_args()
+
+    setup_logging("WARNING")
+    settings = get_settings()
+    knowledge_dir = args.knowledge_dir or settings.knowledge_dir
+    chunk_max_tokens = args.chunk_max_tokens or settings.chunk_max_tokens
+
+    chunks = load_knowledge(knowledge_dir, chunk_max_tokens)
+    t_start = time.perf_counter()
+    retriever = KnowledgeRetriever(chunks)
+    index_ms = (time.perf_counter() - t_start) * 1000
+
+    questions = json.loads(Path(args.questions).read_text(encoding="utf-8"))
+    report = evaluate_retrieval(
+        retriever, questions, ks=sorted(set(args.k)), repeat=args.repeat,
+        known_chunks={c.chunk_id for c in chunks},
+    )
+    report["config"] = {
+        "engine": type(retriever).__name__,
+        "knowledge_dir": knowledge_dir,
+        "chunk_max_tokens": chunk_max_tokens,
+        "chunks": len(chunks),
+        "index_ms": index_ms,
+        "k": sorted(set(args.k)),
+    }
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    print(f"Retrieval eval: {len(questions)} questions over {len(chunks)} chunks ({knowledge_dir})")
+    _print_report(report, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,22 @@ Runs test questions through the agent in text-only mode and verifies:
 1. Response contains "Sources:" section
 2. Response references at least one retrieved chunk
 3. Expected keywords appear in the response
+
+Questions run concurrently (``--concurrency``), each on its own agent.
+LLM completions are recorded under ``--recordings`` and replayed on later
+runs, so after a retrieval or prompt change only the prompts that changed
+reach the model. ``--replay`` runs offline from the recordings alone and
+fails on any prompt that was never recorded. Recordings are local (not
+committed), so a fresh checkout needs one live run before ``--replay``.
 """
 from __future__ import annotations
 
+import argparse
 import asyncio
 import json
 import sys
+import time
+from collections.abc import Callable
 from pathlib import Path
 
 
@@ -18,110 +28,181 @@ def load_questions(path: str = "eval/questions.json") -> list[dict]:
     return json.loads(Path(path).read_text(encoding="utf-8"))
 
 
-async def evaluate() -> None:
+def grade(q: dict, response: str) -> dict:
+    """Check one response against its question's expectations."""
+    must_contain = q.get("must_contain", [])
+    expected_source = q.get("expected_source")
+
+    # Check 1: Has sources section
+    has_sources = "Sources:" in response or "sources:" in response.lower()
+
+    # Check 2: Contains expected keywords (case-insensitive)
+    response_lower = response.lower()
+    keyword_hits = [
+        kw for kw in must_contain
+        if kw.lower() in response_lower
+    ]
+    keywords_ok = len(keyword_hits) >= max(1, len(must_contain) // 2)
+
+    # Check 3: References expected source file
+    source_ok = True
+    if expected_source:
+        source_ok = expected_source.lower() in response_lower
+
+    reasons = []
+    if not has_sources:
+        reasons.append("missing Sources section")
+    if not keywords_ok:
+        missing = [k for k in must_contain if k.lower() not in response_lower]
+        reasons.append(f"missing keywords: {missing}")
+
+    return {
+        "question": q["question"],
+        "response": response,
+        "passed": has_sources and keywords_ok,
+        "has_sources": has_sources,
+        "source_ok": source_ok,
+        "keyword_hits": keyword_hits,
+        "keywords_expected": must_contain,
+        "reasons": reasons,
+    }
+
+
+async def run_suite(
+    questions: list[dict],
+    make_agent: Callable[[], object],
+    concurrency: int = 8,
+    on_result: Callable[[int, dict], None] | None = None,
+) -> list[dict]:
+    """Answer and grade every question, at most ``concurrency`` at once.
+
+    Each question gets a fresh agent from ``make_agent()``. Results come
+    back in question order; ``on_result(index, result)`` is called as each
+    one finishes. A question whose agent raises fails with the error.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index: int, q: dict) -> dict:
+        async with slots:
+            t_start = time.monotonic()
+            try:
+                result = grade(q, await make_agent().respond(q["question"]))
+            except Exception as e:
+                result = grade(q, "")
+                result["passed"] = False
+                result["reasons"] = [f"{type(e).__name__}: {e}"]
+            result["seconds"] = time.monotonic() - t_start
+        if on_result is not None:
+            on_result(index, result)
+        return result
+
+    return list(await asyncio.gather(*(one(i, q) for i, q in enumerate(questions))))
+
+
+def _print_result(index: int, total: int, result: dict) -> None:
+    response = result["response"]
+    lines = [
+        f"\n[{index + 1}/{total}] Q: {result['question']}",
+        f"  A: {response[:200]}{'...' if len(response) > 200 else ''}",
+    ]
+    if result["passed"]:
+        lines.append(
+            f"  ✅ PASS (sources={result['has_sources']}, "
+            f"keywords={len(result['keyword_hits'])}/{len(result['keywords_expected'])})"
+        )
+    else:
+        lines.append(f"  ❌ FAIL: {', '.join(result['reasons'])}")
+    print("\n".join(lines))
+
+
+async def evaluate(args: argparse.Namespace) -> None:
     # Import here to allow running as module
     from src.config import get_settings, setup_logging
     from src.knowledge.loader import load_knowledge
     from src.knowledge.retriever import KnowledgeRetriever
+    from src.llm.cache import CompletionStore, RecordingLLMClient
     from src.llm.openai_client import OpenAILLMClient
     from src.agent.agent import InterviewAgent
 
     setup_logging("WARNING")
     settings = get_settings()
 
-    if not settings.llm_api_key:
-        print("ERROR: LLM_API_KEY not set. Cannot run evaluation.")
+    if not settings.llm_api_key and not args.replay:
+        print("ERROR: LLM_API_KEY not set. Cannot run evaluation (use --replay to run from recordings).")
         sys.exit(1)
 
-    # Build agent
+    # Build agents
     chunks = load_knowledge(settings.knowledge_dir, settings.chunk_max_tokens)
     retriever = KnowledgeRetriever(chunks)
     llm = OpenAILLMClient(
-        api_key=settings.llm_api_key,
+        # Replay never calls the model; the client only supplies its params
+        api_key=settings.llm_api_key or "replay-only",
         model=settings.llm_model,
         base_url=settings.llm_base_url,
     )
-    agent = InterviewAgent(
-        llm=llm,
-        retriever=retriever,
-        person_name=settings.person_name,
-        max_chunks=settings.max_chunks,
-    )
+    if args.recordings:
+        store = CompletionStore(args.recordings)
+        if args.replay and not len(store):
+            print(f"ERROR: no recordings in {args.recordings}. Run once without --replay (needs LLM_API_KEY).")
+            sys.exit(1)
+        llm = RecordingLLMClient(llm, store, replay_only=args.replay)
+
+    def make_agent() -> InterviewAgent:
+        return InterviewAgent(
+            llm=llm,
+            retriever=retriever,
+            person_name=settings.person_name,
+            max_chunks=settings.max_chunks,
+        )
 
     # Load test questions
-    questions = load_questions()
-    print(f"\n📋 Running evaluation: {len(questions)} questions\n")
+    questions = load_questions(args.questions)
+    print(f"\n📋 Running evaluation: {len(questions)} questions, {args.concurrency} at a time\n")
     print("=" * 60)
 
-    passed = 0
-    failed = 0
-    results: list[dict] = []
-
-    for i, q in enumerate(questions, 1):
-        question = q["question"]
-        expected_source = q.get("expected_source")
-        must_contain = q.get("must_contain", [])
-
-        print(f"\n[{i}/{len(questions)}] Q: {question}")
-
-        # Get response
-        agent.reset_history()
-        response = await agent.respond(question)
-        print(f"  A: {response[:200]}{'...' if len(response) > 200 else ''}")
-
-        # Check 1: Has sources section
-        has_sources = "Sources:" in response or "sources:" in response.lower()
-
-        # Check 2: Contains expected keywords (case-insensitive)
-        response_lower = response.lower()
-        keyword_hits = [
-            kw for kw in must_contain
-            if kw.lower() in response_lower
-        ]
-        keywords_ok = len(keyword_hits) >= max(1, len(must_contain) // 2)
-
-        # Check 3: References expected source file
-        source_ok = True
-        if expected_source:
-            source_ok = expected_source.lower() in response_lower
-
-        # Overall pass/fail
-        test_passed = has_sources and keywords_ok
-        if test_passed:
-            passed += 1
-            print(f"  ✅ PASS (sources={has_sources}, keywords={len(keyword_hits)}/{len(must_contain)})")
-        else:
-            failed += 1
-            reasons = []
-            if not has_sources:
-                reasons.append("missing Sources section")
-            if not keywords_ok:
-                missing = [k for k in must_contain if k.lower() not in response_lower]
-                reasons.append(f"missing keywords: {missing}")
-            print(f"  ❌ FAIL: {', '.join(reasons)}")
-
-        results.append({
-            "question": question,
-            "passed": test_passed,
-            "has_sources": has_sources,
-            "keyword_hits": keyword_hits,
-            "keywords_expected": must_contain,
-        })
+    t_start = time.monotonic()
+    results = await run_suite(
+        questions,
+        make_agent,
+        concurrency=args.concurrency,
+        on_result=lambda i, r: _print_result(i, len(questions), r),
+    )
+    elapsed = time.monotonic() - t_start
+    await llm.aclose()
 
     # Summary
+    passed = sum(r["passed"] for r in results)
+    failed = len(results) - passed
     print("\n" + "=" * 60)
     total = passed + failed
     pct = (passed / total * 100) if total > 0 else 0
-    print(f"\n📊 Results: {passed}/{total} passed ({pct:.0f}%)")
+    print(f"\n📊 Results: {passed}/{total} passed ({pct:.0f}%) in {elapsed:.1f}s")
     if failed > 0:
         print(f"   {failed} failed")
+    if isinstance(llm, RecordingLLMClient):
+        print(f"   LLM: {llm.hits} replayed, {llm.misses} {'missing' if args.replay else 'from the model'}")
     print()
 
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
     sys.exit(0 if failed == 0 else 1)
 
 
 def main() -> None:
-    asyncio.run(evaluate())
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default="eval/questions.json")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions answered at once")
+    parser.add_argument(
+        "--recordings", default="eval/recordings",
+        help="Directory of recorded LLM completions ('' = always call the model)",
+    )
+    parser.add_argument("--replay", action="store_true", help="Only replay recordings, never call the model")
+    parser.add_argument("--json", help="Write per-question results here")
+    args = parser.parse_args()
+    if args.replay and not args.recordings:
+        parser.error("--replay needs --recordings")
+    asyncio.run(evaluate(args))
 
 
 if __name__ == "__main__":
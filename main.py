@@ -5,23 +5,35 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
+import os
 import sys
+from pathlib import Path
 
 from src.config import get_settings, setup_logging
+from src.resources import ResourceRegistry
 
 
-def build_agent():
-    """Build the interview agent with all dependencies."""
-    settings = get_settings()
-
-    # Load knowledge base
+def build_retriever(settings):
+    """Load the knowledge base and build its search index."""
     from src.knowledge.loader import load_knowledge
     from src.knowledge.retriever import KnowledgeRetriever
 
     chunks = load_knowledge(settings.knowledge_dir, settings.chunk_max_tokens)
     if not chunks:
         logging.warning("No knowledge chunks loaded — agent will have no context")
-    retriever = KnowledgeRetriever(chunks)
+    return KnowledgeRetriever(chunks)
+
+
+def build_agent(resources: ResourceRegistry | None = None, retriever=None):
+    """Build the interview agent with all dependencies.
+
+    ``retriever`` reuses an index built earlier (the prefork parent's).
+    """
+    settings = get_settings()
+
+    # Load knowledge base
+    if retriever is None:
+        retriever = build_retriever(settings)
 
     # Initialize LLM
     from src.llm.openai_client import OpenAILLMClient
@@ -35,7 +47,10 @@ def build_agent():
         api_key=settings.llm_api_key,
         model=settings.llm_model,
         base_url=settings.llm_base_url,
+        http_client=resources.http_client("llm", timeout=60.0) if resources else None,
     )
+    if resources:
+        resources.register(llm)
 
     # Build agent
     from src.agent.agent import InterviewAgent
@@ -50,74 +65,154 @@ def build_agent():
     return agent, settings
 
 
-def build_tts(settings):
-    """Build TTS client based on configuration."""
-    if settings.elevenlabs_api_key:
+async def build_tts(settings, resources: ResourceRegistry | None = None):
+    """Build TTS client based on configuration.
+
+    With a resource registry, the client shares a pooled HTTP connection
+    and all registered providers (TTS + LLM) are warmed up before returning,
+    so the first sentence doesn't pay the TCP/TLS handshake.
+    """
+    if settings.elevenlabs_api_key and settings.tts_mode == "websocket":
+        from src.tts.elevenlabs_ws import ElevenLabsWebSocketTTS
+        tts = ElevenLabsWebSocketTTS(
+            api_key=settings.elevenlabs_api_key,
+            voice_id=settings.elevenlabs_voice_id,
+            model_id=settings.elevenlabs_model_id,
+            output_format=settings.elevenlabs_output_format,
+        )
+    elif settings.elevenlabs_api_key:
         from src.tts.elevenlabs_tts import ElevenLabsTTS
-        return ElevenLabsTTS(
+        tts = ElevenLabsTTS(
             api_key=settings.elevenlabs_api_key,
             voice_id=settings.elevenlabs_voice_id,
             model_id=settings.elevenlabs_model_id,
+            lookahead=settings.tts_lookahead,
+            output_format=settings.elevenlabs_output_format,
+            client=resources.http_client("elevenlabs") if resources else None,
         )
     else:
         logging.warning("ELEVENLABS_API_KEY not set, using DummyTTS")
         from src.tts.elevenlabs_tts import DummyTTS
-        return DummyTTS()
+        tts = DummyTTS()
+
+    # The cache works per segment, which would open one WebSocket per
+    # sentence and lose input streaming: HTTP mode only
+    if settings.elevenlabs_api_key and settings.tts_cache_dir and settings.tts_mode != "websocket":
+        from src.tts.cache import AudioCache, CachedTTS
+        tts = CachedTTS(
+            tts,
+            AudioCache(settings.tts_cache_dir, settings.tts_cache_max_mb * 1024 * 1024),
+            lookahead=settings.tts_lookahead,
+        )
+
+    if resources:
+        resources.register(tts)
+        await resources.warmup()
+    return tts
+
 
+def build_stt(settings, language: str | None = None):
+    """Build STT client based on configuration.
 
-def build_stt(settings):
-    """Build STT client based on configuration."""
+    ``language`` overrides ``stt_language``; an empty one means auto-detect.
+    """
+    language = (settings.stt_language if language is None else language) or None
     if settings.stt_provider == "deepgram" and settings.deepgram_api_key:
         from src.stt.deepgram_stt import DeepgramSTT
         return DeepgramSTT(
             api_key=settings.deepgram_api_key,
             sample_rate=settings.sample_rate,
+            language=language,
         )
     else:
         try:
             from src.stt.whisper_stt import WhisperSTT
-            return WhisperSTT(model_size=settings.whisper_model)
+            return WhisperSTT(model_size=settings.whisper_model, language=language)
         except Exception as e:
             logging.warning("Whisper not available: %s", e)
             from src.stt.whisper_stt import DummySTT
             return DummySTT()
 
 
-async def run_voice(args):
-    """Run in voice mode: mic -> STT -> agent -> TTS -> speakers."""
-    agent, settings = build_agent()
-    tts = build_tts(settings)
-    stt = build_stt(settings)
+def build_vad(settings):
+    """Build the voice activity detector selected by ``vad_backend``."""
+    from src.audio.vad import EnergyVAD, SpectralVAD, WebRtcVAD
+
+    common = {
+        "silence_duration_ms": settings.vad_silence_duration_ms,
+        "sample_rate": settings.sample_rate,
+        "frame_duration_ms": settings.frame_duration_ms,
+    }
+    if settings.vad_backend == "webrtc":
+        try:
+            return WebRtcVAD(aggressiveness=settings.vad_aggressiveness, **common)
+        except Exception as e:
+            logging.warning("webrtcvad not available (%s), using SpectralVAD", e)
+            return SpectralVAD(**common)
+    if settings.vad_backend == "spectral":
+        return SpectralVAD(**common)
+    return EnergyVAD(threshold=settings.vad_threshold, **common)
+
+
+def build_transport(args, settings, output_sample_rate: int):
+    """Mic + speakers for ``voice`` mode, audio files for ``replay``."""
+    if args.mode == "replay":
+        from src.transport.replay import FileReplayTransport
+
+        return FileReplayTransport(
+            inputs=args.input,
+            output_dir=args.output_dir,
+            sample_rate=settings.sample_rate,
+            frame_duration_ms=settings.frame_duration_ms,
+            speed=args.speed,
+        )
 
-    from src.audio.vad import EnergyVAD
-    from src.loop import VoiceLoop
     from src.transport.local import LocalAudioTransport
 
-    transport = LocalAudioTransport(
-        sample_rate=settings.sample_rate,
-        frame_duration_ms=settings.frame_duration_ms,
-    )
-    vad = EnergyVAD(
-        threshold=settings.vad_threshold,
-        silence_duration_ms=settings.vad_silence_duration_ms,
+    return LocalAudioTransport(
         sample_rate=settings.sample_rate,
         frame_duration_ms=settings.frame_duration_ms,
+        output_sample_rate=output_sample_rate,
+        jitter_ms=settings.playback_jitter_ms,
+        capture_sample_rate=settings.capture_sample_rate or None,
+        echo_cancel=settings.echo_cancel,
+        echo_filter_ms=settings.echo_filter_ms,
     )
 
+
+async def run_voice(args, resources: ResourceRegistry):
+    """Run in voice mode: mic (or replayed files) -> STT -> agent -> TTS -> speakers (or files)."""
+    agent, settings = build_agent(resources)
+    tts = await build_tts(settings, resources)
+    stt = build_stt(settings)
+
+    from src.loop import VoiceLoop
+
+    transport = build_transport(args, settings, tts.audio_format.sample_rate)
+    vad = build_vad(settings)
+
+    fillers = None
+    if settings.filler_enabled and settings.elevenlabs_api_key:
+        from src.tts.fillers import FillerLibrary
+        fillers = FillerLibrary(tts)
+        await fillers.prepare()
+
     loop = VoiceLoop(
         agent=agent,
         stt=stt,
         tts=tts,
         transport=transport,
         vad=vad,
+        fillers=fillers,
+        filler_threshold_ms=settings.filler_threshold_ms,
     )
     await loop.run()
 
 
-async def run_text(args):
+async def run_text(args, resources: ResourceRegistry):
     """Run in text mode: stdin -> agent -> stdout (+ optional TTS)."""
-    agent, settings = build_agent()
-    tts = build_tts(settings) if not args.no_tts else None
+    agent, settings = build_agent(resources)
+    tts = await build_tts(settings, resources) if not args.no_tts else None
 
     from src.loop import TextLoop
 
@@ -125,13 +220,15 @@ async def run_text(args):
     await loop.run()
 
 
-async def run_telegram(args):
+async def run_telegram(args, resources: ResourceRegistry):
     """Run as a Telegram bot."""
-    agent, settings = build_agent()
+    agent, settings = build_agent(resources)
 
     if not settings.telegram_bot_token:
         print("⚠️  TELEGRAM_BOT_TOKEN not set. Set it in .env.")
         sys.exit(1)
+    tts = await build_tts(settings, resources) if settings.telegram_voice else None
+    await resources.warmup()
 
     from src.telegram_bot import run_bot
 
@@ -142,42 +239,66 @@ async def run_telegram(args):
         llm=agent.llm,
         person_name=settings.person_name,
         max_chunks=settings.max_chunks,
+        max_history=settings.session_max_history,
+        max_sessions=settings.telegram_session_max,
+        idle_ttl_s=settings.telegram_session_idle_ttl_s,
+        db_path=settings.telegram_session_db or None,
+        flush_interval_s=settings.telegram_session_flush_s,
+        retention_days=settings.telegram_session_retention_days,
+        max_concurrency=settings.telegram_max_concurrency,
+        max_backlog=settings.telegram_chat_backlog,
+        coalesce_ms=settings.telegram_coalesce_ms,
+        stream_replies=settings.telegram_stream_replies,
+        edit_interval_s=settings.telegram_edit_interval_s,
+        stt_factory=(
+            (lambda: build_stt(settings, settings.telegram_stt_language)) if settings.telegram_voice else None
+        ),
+        tts=tts,
+        stt_workers=settings.telegram_stt_workers,
+        codec_workers=settings.telegram_codec_workers,
+        webhook_url=settings.telegram_webhook_url or None,
+        webhook_host=settings.telegram_webhook_host,
+        webhook_port=settings.telegram_webhook_port,
+        webhook_secret=settings.telegram_webhook_secret,
+        api_url=settings.telegram_api_url or None,
     )
 
 
-async def run_web(args):
-    """Run web server with WebSocket interface."""
-    agent, settings = build_agent()
-    tts = build_tts(settings)
+async def run_web(args, resources: ResourceRegistry, retriever=None, board=None, channel=None):
+    """Run web server with WebSocket interface.
+
+    As a prefork worker, ``channel`` delivers the connections, ``board``
+    shares stats with the other workers and ``retriever`` is the parent's.
+    """
+    agent, settings = build_agent(resources, retriever)
+    tts = await build_tts(settings, resources)
 
     import uvicorn
-    from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-    from fastapi.responses import FileResponse
-    from fastapi.staticfiles import StaticFiles
-    import os
 
-    app = FastAPI(title="Voice Interview Assistant")
+    from src.agent.agent import InterviewAgent
+    from src.web_app import create_app
+
+    # Per-session history; the retriever and LLM client are shared read-only
+    app = create_app(
+        settings,
+        agent_factory=lambda: InterviewAgent(
+            llm=agent.llm,
+            retriever=agent.retriever,
+            person_name=settings.person_name,
+            max_chunks=settings.max_chunks,
+            max_history=settings.session_max_history,
+        ),
+        tts=tts,
+        stt_factory=lambda: build_stt(settings),
+        vad_factory=lambda: build_vad(settings),
+        board=board,
+    )
 
-    web_dir = os.path.join(os.path.dirname(__file__), "web")
+    if channel is not None:
+        from src.server import serve_handed_off
 
-    @app.get("/")
-    async def index():
-        return FileResponse(os.path.join(web_dir, "index.html"))
-
-    @app.websocket("/ws")
-    async def websocket_endpoint(ws: WebSocket):
-        await ws.accept()
-        try:
-            while True:
-                data = await ws.receive_text()
-                # Text mode over WebSocket
-                response_parts: list[str] = []
-                async for token in agent.respond_stream(data):
-                    response_parts.append(token)
-                    await ws.send_json({"type": "token", "text": token})
-                await ws.send_json({"type": "done", "text": "".join(response_parts)})
-        except WebSocketDisconnect:
-            logging.info("WebSocket client disconnected")
+        await serve_handed_off(app, channel)
+        return
 
     print(f"\n🌐 Web interface: http://localhost:{settings.web_port}\n")
     config = uvicorn.Config(
@@ -190,6 +311,49 @@ async def run_web(args):
     await server.serve()
 
 
+def run_web_workers(args, workers: int) -> int:
+    """Run the web server as ``workers`` processes behind one port.
+
+    The knowledge index is built once here and inherited copy-on-write by
+    every worker; LLM/TTS clients and sessions are per worker.
+    """
+    import gc
+    import shutil
+    import tempfile
+    from functools import partial
+
+    from src.server import PreforkServer, StatsBoard
+
+    settings = get_settings()
+    if not settings.llm_api_key:
+        print("⚠️  LLM_API_KEY not set. Set it in .env or environment.")
+        sys.exit(1)
+    retriever = build_retriever(settings)
+    # Keep the cycle collector from touching (and so copying) inherited pages
+    gc.freeze()
+    stats_dir = tempfile.mkdtemp(prefix="interview-web-")
+
+    def worker_main(index: int, channel) -> None:
+        board = StatsBoard(stats_dir, worker=index, workers=workers)
+        run = partial(run_web, retriever=retriever, board=board, channel=channel)
+        asyncio.run(run_with_resources(run, args))
+
+    print(f"\n🌐 Web interface: http://localhost:{settings.web_port} ({workers} workers)\n")
+    try:
+        return PreforkServer(settings.web_host, settings.web_port, workers, worker_main).run()
+    finally:
+        shutil.rmtree(stats_dir, ignore_errors=True)
+
+
+async def run_with_resources(run_mode, args) -> None:
+    """Run a mode with an app-level resource registry, closing it on exit."""
+    resources = ResourceRegistry()
+    try:
+        await run_mode(args, resources)
+    finally:
+        await resources.aclose()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Voice Interview Assistant",
@@ -197,6 +361,7 @@ def main():
         epilog="""
 Modes:
   voice      Real-time voice mode (mic + speakers)
+  replay     Voice pipeline on audio files, replies saved to files
   text       Text-only mode (stdin/stdout)
   web        Web interface with WebSocket
   telegram   Telegram bot
@@ -204,13 +369,15 @@ Modes:
 Examples:
   python main.py --mode text
   python main.py --mode voice
+  python main.py --mode replay --input answer1.wav answer2.wav --speed 4
   python main.py --mode web --port 8080
+  python main.py --mode web --workers 4
   python main.py --mode telegram
         """,
     )
     parser.add_argument(
         "--mode",
-        choices=["voice", "text", "web", "telegram"],
+        choices=["voice", "replay", "text", "web", "telegram"],
         default="text",
         help="Interaction mode (default: text)",
     )
@@ -225,22 +392,51 @@ Examples:
         default=None,
         help="Web server port (overrides WEB_PORT env var)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Web server worker processes (overrides WEB_WORKERS env var)",
+    )
+
+    parser.add_argument(
+        "--input",
+        type=Path,
+        nargs="+",
+        help="Replay mode: candidate audio, WAV or raw 16-bit PCM at SAMPLE_RATE",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay mode: x real time, 0 = as fast as possible (default: 1)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("replay-out"),
+        help="Replay mode: where replies and replies.json go (default: replay-out)",
+    )
 
     args = parser.parse_args()
     setup_logging()
+    if args.mode == "replay" and not args.input:
+        parser.error("--mode replay needs --input")
 
     if args.port:
-        import os
         os.environ["WEB_PORT"] = str(args.port)
 
-    if args.mode == "voice":
-        asyncio.run(run_voice(args))
+    if args.mode in ("voice", "replay"):
+        asyncio.run(run_with_resources(run_voice, args))
     elif args.mode == "text":
-        asyncio.run(run_text(args))
+        asyncio.run(run_with_resources(run_text, args))
     elif args.mode == "web":
-        asyncio.run(run_web(args))
+        workers = args.workers or get_settings().web_workers
+        if workers > 1 and hasattr(os, "fork"):
+            sys.exit(run_web_workers(args, workers))
+        asyncio.run(run_with_resources(run_web, args))
     elif args.mode == "telegram":
-        asyncio.run(run_telegram(args))
+        asyncio.run(run_with_resources(run_telegram, args))
 
 
 if __name__ == "__main__":
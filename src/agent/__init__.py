@@ -1,4 +1,6 @@
 from src.agent.policy import build_system_prompt
 from src.agent.agent import InterviewAgent
+from src.agent.sessions import Session, SessionLimitError, SessionManager
+from src.agent.store import SQLiteSessionStore
 
-__all__ = ["build_system_prompt", "InterviewAgent"]
+__all__ = ["build_system_prompt", "InterviewAgent", "Session", "SessionLimitError", "SessionManager", "SQLiteSessionStore"]
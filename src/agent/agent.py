@@ -22,6 +22,8 @@ class InterviewAgent:
 
     Retrieves relevant context from the knowledge base, then uses
     an LLM to generate grounded responses with source citations.
+    ``max_history`` caps the stored history (messages); the interview
+    stage keeps counting exchanges beyond it.
     """
 
     def __init__(
@@ -30,17 +32,25 @@ class InterviewAgent:
         retriever: KnowledgeRetriever,
         person_name: str = "Daniel",
         max_chunks: int = 5,
+        max_history: int | None = None,
     ) -> None:
         self.llm = llm
         self.retriever = retriever
         self.person_name = person_name
         self.max_chunks = max_chunks
         self.system_prompt = build_system_prompt(person_name)
+        self.max_history = max_history
         self.conversation_history: list[dict[str, str]] = []
+        self._exchanges = 0
 
     def _count_exchanges(self) -> int:
-        """Count completed exchanges (user+assistant pairs) in history."""
-        return len(self.conversation_history) // 2
+        """Count completed exchanges (user+assistant pairs)."""
+        return self._exchanges
+
+    @property
+    def exchanges(self) -> int:
+        """Completed exchanges so far, including those trimmed from history."""
+        return self._exchanges
 
     async def respond(self, user_message: str) -> str:
         """Generate a complete (non-streaming) response."""
@@ -103,6 +113,9 @@ class InterviewAgent:
         response_text = "".join(full_response)
         self.conversation_history.append({"role": "user", "content": user_message})
         self.conversation_history.append({"role": "assistant", "content": response_text})
+        self._exchanges += 1
+        if self.max_history is not None and len(self.conversation_history) > self.max_history:
+            del self.conversation_history[: len(self.conversation_history) - self.max_history]
 
         t_end = time.monotonic()
         logger.info("Full response in %.0fms", (t_end - t_start) * 1000)
@@ -110,3 +123,15 @@ class InterviewAgent:
     def reset_history(self) -> None:
         """Clear conversation history."""
         self.conversation_history.clear()
+        self._exchanges = 0
+
+    def export_state(self) -> tuple[int, list[dict[str, str]]]:
+        """Interview progress and history, for persisting the session."""
+        return self._exchanges, list(self.conversation_history)
+
+    def restore_state(self, exchanges: int, history: list[dict[str, str]]) -> None:
+        """Continue a conversation saved with ``export_state``."""
+        self._exchanges = exchanges
+        self.conversation_history = list(history)
+        if self.max_history is not None:
+            del self.conversation_history[: max(0, len(self.conversation_history) - self.max_history)]
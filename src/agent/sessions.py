@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import logging
+import secrets
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from src.agent.agent import InterviewAgent
+from src.agent.store import SQLiteSessionStore
+
+logger = logging.getLogger(__name__)
+
+# Rough fixed cost of an empty session: agent, system prompt, bookkeeping
+_SESSION_OVERHEAD_BYTES = 4096
+
+
+class SessionLimitError(RuntimeError):
+    """Every session slot is held by a live connection."""
+
+
+@dataclass
+class Session:
+    """One candidate's conversation, possibly resumed over several connections."""
+
+    token: str
+    agent: InterviewAgent
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    connections: int = 0
+    dirty: bool = False  # changed since last written to the store
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by this session (history dominates)."""
+        size = _SESSION_OVERHEAD_BYTES + sys.getsizeof(self.agent.conversation_history)
+        for message in self.agent.conversation_history:
+            size += sys.getsizeof(message) + sum(sys.getsizeof(v) for v in message.values())
+        return size
+
+
+class SessionManager:
+    """Per-connection agents for the web server, bounded in number and age.
+
+    ``acquire(token)`` resumes the session for a token the client got
+    earlier, or starts a new one with a fresh ``InterviewAgent`` from
+    ``agent_factory`` (which should share the read-only retriever and LLM
+    client). Sessions live in LRU order; one that has had no connection
+    for ``idle_ttl_s`` is dropped, and when ``max_sessions`` is reached
+    the least recently used idle session makes room. If all of them have
+    a live connection, ``SessionLimitError`` is raised. Tokens start with
+    ``token_prefix`` (the worker index when several processes serve).
+
+    With a ``store`` this is the in-memory tier of a persistent store:
+    sessions missing from memory are reloaded from it, released sessions
+    are written back in batches by ``flush()`` (write-behind, call it
+    periodically) and evicted ones are written before they are dropped,
+    so memory stays bounded and conversations survive restarts.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], InterviewAgent],
+        max_sessions: int = 100,
+        idle_ttl_s: float = 1800.0,
+        token_prefix: str = "",
+        store: SQLiteSessionStore | None = None,
+    ) -> None:
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl_s = idle_ttl_s
+        self.token_prefix = token_prefix
+        self.store = store
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+        self.rejected = 0
+        self.resume_misses = 0
+        self.restored = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def acquire(self, token: str | None = None) -> Session:
+        """Attach a connection to its session, creating one if needed."""
+        return self._attach(token, create_as=None)
+
+    def open(self, key: str) -> Session:
+        """Attach to the session under a caller-chosen key (e.g. a Telegram
+        chat id), creating it under that key if needed."""
+        return self._attach(key, create_as=key)
+
+    def _attach(self, token: str | None, create_as: str | None) -> Session:
+        self.evict_idle()
+        session = self._sessions.get(token) if token else None
+        if session is None and token and self.store is not None:
+            session = self._restore(token)
+        if session is None:
+            if token and create_as is None:
+                # Evicted, or created by a process that has since restarted
+                self.resume_misses += 1
+            session = self._admit(create_as or self.token_prefix + secrets.token_urlsafe(16))
+            self.created += 1
+            logger.info("Session %s… created (%d open)", session.token[:6], len(self._sessions))
+        self._sessions.move_to_end(session.token)
+        session.connections += 1
+        session.last_used = time.monotonic()
+        return session
+
+    def _admit(self, token: str) -> Session:
+        if len(self._sessions) >= self.max_sessions and not self._evict_lru():
+            self.rejected += 1
+            raise SessionLimitError(f"{self.max_sessions} sessions are in use")
+        session = Session(token=token, agent=self.agent_factory())
+        self._sessions[token] = session
+        return session
+
+    def _restore(self, token: str) -> Session | None:
+        state = self.store.load(token)
+        if state is None:
+            return None
+        session = self._admit(token)
+        session.agent.restore_state(*state)
+        self.restored += 1
+        logger.info("Session %s… restored (%d exchanges)", token[:6], state[0])
+        return session
+
+    def release(self, session: Session) -> None:
+        """Detach a connection; the session stays resumable until it idles out.
+
+        Sessions that have idled out meanwhile are dropped here too, so
+        they do not wait for the next new connection to be reclaimed.
+        """
+        session.connections = max(0, session.connections - 1)
+        session.last_used = time.monotonic()
+        session.dirty = self.store is not None
+        if session.token in self._sessions:
+            self._sessions.move_to_end(session.token)
+        self.evict_idle()
+
+    def evict_idle(self) -> int:
+        """Drop sessions without connections idle for longer than the TTL."""
+        cutoff = time.monotonic() - self.idle_ttl_s
+        expired = [
+            token
+            for token, session in self._sessions.items()
+            if not session.connections and session.last_used < cutoff
+        ]
+        for token in expired:
+            self._drop(token, "idle")
+        return len(expired)
+
+    def flush(self) -> int:
+        """Write every changed session to the store in one batch."""
+        if self.store is None:
+            return 0
+        dirty = [session for session in self._sessions.values() if session.dirty]
+        written = self.store.save_many((s.token, *s.agent.export_state()) for s in dirty)
+        for session in dirty:
+            session.dirty = False
+        return written
+
+    def stats(self) -> dict[str, float]:
+        """Session counts and memory, for capacity planning."""
+        sizes = [session.memory_bytes() for session in self._sessions.values()]
+        return {
+            "sessions": len(sizes),
+            "connected": sum(1 for s in self._sessions.values() if s.connections),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "resume_misses": self.resume_misses,
+            "restored": self.restored,
+            "memory_bytes": sum(sizes),
+            "mean_session_bytes": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max_session_bytes": max(sizes, default=0),
+        }
+
+    def _evict_lru(self) -> bool:
+        for token, session in self._sessions.items():
+            if not session.connections:
+                self._drop(token, "LRU")
+                return True
+        return False
+
+    def _drop(self, token: str, reason: str) -> None:
+        session = self._sessions.pop(token)
+        self.evicted += 1
+        if session.dirty:
+            self.store.save_many([(token, *session.agent.export_state())])
+        logger.info(
+            "Session %s… evicted (%s, %d exchanges, ~%d KB)",
+            token[:6],
+            reason,
+            session.agent.exchanges,
+            session.memory_bytes() // 1024,
+        )
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+# Where the spoken part of an answer ends: the citation list the LLM writes
+# (see policy.py) and the stage label appended by InterviewAgent.
+TRAILER_MARKERS = (
+    "Sources:",
+    "**Sources",
+    "Источники:",
+    "**Источники",
+    "\n\nStage:",
+)
+
+
+def spoken_part(text: str, markers: tuple[str, ...] = TRAILER_MARKERS) -> str:
+    """The part of a complete response that should be read aloud."""
+    cut = min((i for m in markers if (i := text.find(m)) >= 0), default=len(text))
+    return text[:cut].strip()
+
+
+class SpokenFilter:
+    """Streaming counterpart of ``spoken_part``.
+
+    Forwards tokens until a trailer marker shows up, then forwards nothing.
+    Text that could be the start of a marker split across tokens (e.g.
+    "Sour" + "ces:"), and trailing whitespace, is held back until the next
+    token decides it.
+    """
+
+    def __init__(self, markers: tuple[str, ...] = TRAILER_MARKERS) -> None:
+        self.markers = markers
+        self.done = False
+        self._held = ""
+
+    def feed(self, token: str) -> str:
+        """Add a token, return the text that is safe to speak now."""
+        if self.done:
+            return ""
+        text = self._held + token
+        cut = min((i for m in self.markers if (i := text.find(m)) >= 0), default=-1)
+        if cut >= 0:
+            self.done = True
+            self._held = ""
+            return text[:cut].rstrip()
+
+        keep = self._partial_marker_len(text)
+        # Trailing whitespace waits too: it may be the gap before a marker
+        head = text[: len(text) - keep]
+        keep += len(head) - len(head.rstrip())
+        self._held = text[len(text) - keep:] if keep else ""
+        return text[: len(text) - keep]
+
+    def finish(self) -> str:
+        """End of response: release held text that never became a marker."""
+        held, self._held = self._held, ""
+        return "" if self.done else held
+
+    def _partial_marker_len(self, text: str) -> int:
+        """Length of the longest suffix of ``text`` that starts a marker."""
+        best = 0
+        for marker in self.markers:
+            for n in range(min(len(marker) - 1, len(text)), best, -1):
+                if text.endswith(marker[:n]):
+                    best = n
+                    break
+        return best
+
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Role names are stored as one letter; anything else is kept verbatim
+_ROLE_CODES = {"user": "u", "assistant": "a", "system": "s"}
+_ROLES = {code: role for role, code in _ROLE_CODES.items()}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key        TEXT PRIMARY KEY,
+    exchanges  INTEGER NOT NULL,
+    history    BLOB NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def encode_history(history: list[dict[str, str]]) -> bytes:
+    """``[{"role": "user", "content": ...}, ...]`` as zlib-compressed
+    ``[["u", ...], ...]`` JSON."""
+    pairs = [[_ROLE_CODES.get(m["role"], m["role"]), m["content"]] for m in history]
+    return zlib.compress(json.dumps(pairs, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_history(blob: bytes) -> list[dict[str, str]]:
+    pairs = json.loads(zlib.decompress(blob).decode("utf-8"))
+    return [{"role": _ROLES.get(role, role), "content": content} for role, content in pairs]
+
+
+class SQLiteSessionStore:
+    """Conversations on disk, keyed by session token or chat id.
+
+    One row per session: exchange count plus compressed history. Writes
+    come in batches (``save_many`` runs one transaction), which is what
+    ``SessionManager`` does for write-behind; the database is in WAL mode
+    so a batch costs one fsync at most.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self.loads = 0
+        self.writes = 0
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def load(self, key: str) -> tuple[int, list[dict[str, str]]] | None:
+        """Exchange count and history saved under ``key``, if any."""
+        row = self._db.execute("SELECT exchanges, history FROM sessions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.loads += 1
+        return row[0], decode_history(row[1])
+
+    def save_many(self, sessions: Iterable[tuple[str, int, list[dict[str, str]]]]) -> int:
+        """Upsert ``(key, exchanges, history)`` rows in one transaction."""
+        now = time.time()
+        rows = [(key, exchanges, encode_history(history), now) for key, exchanges, history in sessions]
+        if not rows:
+            return 0
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO sessions (key, exchanges, history, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET exchanges = excluded.exchanges, "
+                "history = excluded.history, updated_at = excluded.updated_at",
+                rows,
+            )
+        self.writes += len(rows)
+        return len(rows)
+
+    def prune(self, max_age_s: float) -> int:
+        """Forget sessions untouched for ``max_age_s``."""
+        with self._db:
+            cursor = self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - max_age_s,))
+        if cursor.rowcount:
+            logger.info("Pruned %d stored sessions older than %.0f days", cursor.rowcount, max_age_s / 86400)
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self._db.close()
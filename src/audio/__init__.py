@@ -1,5 +1,14 @@
-from src.audio.vad import EnergyVAD
+from src.audio.vad import EnergyVAD, SpectralVAD, VoiceActivityDetector, WebRtcVAD
+from src.audio.echo import EchoCanceller
 from src.audio.player import AudioPlayer
 from src.audio.recorder import AudioRecorder
 
-__all__ = ["EnergyVAD", "AudioPlayer", "AudioRecorder"]
+__all__ = [
+    "VoiceActivityDetector",
+    "EnergyVAD",
+    "WebRtcVAD",
+    "SpectralVAD",
+    "EchoCanceller",
+    "AudioPlayer",
+    "AudioRecorder",
+]
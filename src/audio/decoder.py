@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+
+import numpy as np
+
+from src.audio.format import AudioFormat
+
+logger = logging.getLogger(__name__)
+
+
+class Mp3StreamDecoder:
+    """Incremental MP3 -> PCM 16-bit mono decoder.
+
+    Keeps the parser and codec state across chunks, so a network stream
+    can be fed in arbitrary slices (frames split between chunks are fine)
+    without restarting a decoder per slice.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import av
+        except ImportError:
+            raise RuntimeError("PyAV not installed. Run: pip install av")
+        self._av = av
+        self._codec = av.CodecContext.create("mp3", "r")
+        self.sample_rate: int | None = None
+
+    def decode(self, data: bytes) -> bytes:
+        """Feed a chunk of MP3 bytes, return whatever PCM is now complete."""
+        out: list[bytes] = []
+        for packet in self._codec.parse(data):
+            out.extend(self._decode_packet(packet))
+        return b"".join(out)
+
+    def flush(self) -> bytes:
+        """Drain frames buffered in the parser/decoder at end of stream."""
+        out: list[bytes] = []
+        for packet in self._codec.parse(b""):
+            out.extend(self._decode_packet(packet))
+        out.extend(self._decode_packet(None))
+        return b"".join(out)
+
+    def _decode_packet(self, packet) -> list[bytes]:
+        try:
+            frames = self._codec.decode(packet)
+        except self._av.error.InvalidDataError:
+            # ID3 tags and stray bytes come through the parser as packets
+            logger.debug("Skipping undecodable MP3 packet")
+            return []
+        out: list[bytes] = []
+        for frame in frames:
+            self.sample_rate = frame.sample_rate
+            out.append(_frame_to_pcm16(frame))
+        return out
+
+
+def _frame_to_pcm16(frame) -> bytes:
+    """Convert a decoded audio frame to mono little-endian int16 bytes."""
+    samples = frame.to_ndarray()
+    channels = len(frame.layout.channels)
+    if frame.format.is_planar:
+        samples = samples.reshape(channels, -1)
+    else:
+        samples = samples.reshape(-1, channels).T
+    if samples.dtype.kind == "f":
+        mono = np.clip(samples.mean(axis=0), -1.0, 1.0) * 32767.0
+    else:
+        mono = samples.mean(axis=0) if channels > 1 else samples[0]
+    return mono.astype("<i2").tobytes()
+
+
+async def to_pcm(
+    audio_iter: AsyncIterator[bytes], audio_format: AudioFormat
+) -> AsyncIterator[bytes]:
+    """Normalize a TTS audio stream to whole-sample PCM 16-bit chunks.
+
+    PCM passes through untouched apart from re-aligning samples split
+    across network chunks; MP3 is decoded incrementally.
+    """
+    if audio_format.is_pcm:
+        frame_bytes = 2 * audio_format.channels
+        carry = b""
+        async for chunk in audio_iter:
+            if carry:
+                chunk = carry + chunk
+            usable = len(chunk) - len(chunk) % frame_bytes
+            carry = chunk[usable:]
+            if usable:
+                yield chunk[:usable]
+        return
+
+    decoder = Mp3StreamDecoder()
+    async for chunk in audio_iter:
+        pcm = decoder.decode(chunk)
+        if pcm:
+            yield pcm
+    tail = decoder.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import logging
+import time
+
+import numpy as np
+
+from src.audio.resample import Resampler
+
+logger = logging.getLogger(__name__)
+
+_SLACK = 8
+
+
+class ReferenceBuffer:
+    """History of what the speakers played, readable by absolute sample index.
+
+    Written from the audio output callback with every block it plays
+    (silence included), so sample ``i`` always means "the i-th sample sent
+    to the device". The writer never waits: old samples are overwritten.
+    ``written`` is the total count, used by the capture side as a clock.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+
+    def write(self, samples: np.ndarray) -> None:
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if n > first:
+            self._data[: n - first] = samples[first:]
+        self.written += n
+
+    def read(self, start: int, n: int) -> np.ndarray:
+        """Samples ``start .. start + n``; zeros where nothing was played yet
+        or the history was already overwritten."""
+        out = np.zeros(n, dtype=np.float32)
+        lo = max(start, self.written - self.capacity, 0)
+        hi = min(start + n, self.written)
+        if hi <= lo:
+            return out
+        begin = lo % self.capacity
+        first = min(hi - lo, self.capacity - begin)
+        out[lo - start: lo - start + first] = self._data[begin:begin + first]
+        if hi - lo > first:
+            out[lo - start + first: hi - start] = self._data[: hi - lo - first]
+        return out
+
+
+class EchoCanceller:
+    """Acoustic echo cancellation for open speakers, in front of the VAD.
+
+    A partitioned-block frequency-domain NLMS filter (MDF) learns the path
+    from the played reference to the microphone and subtracts the predicted
+    echo; a spectral-subtraction post-filter then removes what the linear
+    filter misses (speaker distortion, a path that just changed).
+
+    Double talk is handled with two filters: a background filter adapts
+    all the time with a fixed step, and its weights are copied to the
+    foreground filter (the one that produces the output) only while its
+    error is consistently lower. When the user talks over playback the
+    background filter starts to diverge and is reset from the foreground,
+    so the output never sees a filter that learned the user's voice.
+
+    ``process`` takes one microphone frame plus ``reference_mark``, the
+    value of ``reference.written`` when the frame was captured, and pulls
+    the matching playback from ``reference`` (filled by ``AudioPlayer``).
+    The echo path, including device latency, must fit in ``filter_ms``.
+    Output is delayed by one block (10 ms) by the post-filter overlap.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 30,
+        reference_rate: int = 24000,
+        filter_ms: int = 200,
+        step: float = 1.0,
+        suppress: bool = True,
+        suppression_floor: float = 0.05,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_duration_ms / 1000)
+        self.block = _block_size(self.frame_size, frame_duration_ms)
+        self.partitions = max(1, -(-int(sample_rate * filter_ms / 1000) // self.block))
+        self.step = step
+        self.suppress = suppress
+        self.suppression_floor = suppression_floor
+        self.reference_rate = reference_rate
+        self.reference = ReferenceBuffer(reference_rate * 2)
+        # Read lag behind the playback clock, covers output block jitter
+        self._headroom = reference_rate * 30 // 1000
+        n, bins = self.block, self.block + 1
+        self._window = np.sqrt(0.5 - 0.5 * np.cos(np.pi * np.arange(2 * n) / n))
+        self._resampler = Resampler(reference_rate, sample_rate)
+        self._weights = np.zeros((self.partitions, bins), dtype=np.complex128)
+        self._background = np.zeros_like(self._weights)
+        self._far = np.zeros((self.partitions, bins), dtype=np.complex128)
+        self._zeros = np.zeros(n)
+        self.stats_frames = 0
+        self._cost_total = 0.0
+        self.resyncs = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the learned echo path and the reference alignment."""
+        n, bins = self.block, self.block + 1
+        self._weights[:] = 0
+        self._background[:] = 0
+        self._far[:] = 0
+        self._x_prev = np.zeros(n)
+        self._e_prev = np.zeros(n)
+        self._y_prev = np.zeros(n)
+        self._ola = np.zeros(n)
+        self._noise: np.ndarray | None = None
+        self._residual = np.zeros(bins)
+        self._leak = np.ones(bins)
+        self._leak_err = np.ones(bins)
+        self._leak_echo = np.ones(bins)
+        self._fg_error = 0.0
+        self._bg_error = 0.0
+        self._bg_better = 0
+        self.leak = 1.0
+        self.erle_db = 0.0
+        self.copies = 0
+        self._ref_pos: int | None = None
+        self._ref_frac = 0.0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._resampler.reset()
+
+    def process(self, frame: bytes, reference_mark: int | None = None) -> bytes:
+        """Remove the echo from one PCM 16-bit microphone frame."""
+        if self.reference.written == 0:
+            return frame  # nothing has been played yet
+        t0 = time.perf_counter()
+        mic = np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+        ref = self._aligned_reference(len(mic), reference_mark)
+        out = self.cancel(mic, ref)
+        self._cost_total += (time.perf_counter() - t0) * 1e6
+        self.stats_frames += 1
+        return (np.clip(out, -1.0, 32767 / 32768) * 32768.0).astype("<i2").tobytes()
+
+    def cancel(self, mic: np.ndarray, ref: np.ndarray) -> np.ndarray:
+        """Cancel aligned float signals; length must be a multiple of ``block``."""
+        n = self.block
+        out = np.empty(len(mic), dtype=np.float32)
+        for i in range(0, len(mic), n):
+            out[i:i + n] = self._process_block(
+                np.asarray(mic[i:i + n], dtype=np.float64),
+                np.asarray(ref[i:i + n], dtype=np.float64),
+            )
+        return out
+
+    def stats(self) -> dict[str, float]:
+        """Processing cost per frame and how much echo is being removed."""
+        return {
+            "frames": self.stats_frames,
+            "mean_cost_us": self._cost_total / self.stats_frames if self.stats_frames else 0.0,
+            "erle_db": self.erle_db,
+            "leak": self.leak,
+            "filter_copies": self.copies,
+            "resyncs": self.resyncs,
+        }
+
+    def _aligned_reference(self, count: int, mark: int | None) -> np.ndarray:
+        """The played samples that line up with the next ``count`` mic samples.
+
+        Reference is consumed at exactly the nominal rate so the alignment
+        stays fixed; it is re-anchored to ``mark`` only when the two clocks
+        drift apart (stream restart, dropped input blocks). Each re-anchor
+        changes the echo delay the filter has learned.
+        """
+        exact = count * self.reference_rate / self.sample_rate + self._ref_frac
+        needed = int(exact)
+        self._ref_frac = exact - needed
+        mark = self.reference.written if mark is None else mark
+        # How far the read stays behind the newest played sample: it must
+        # never overtake it (those samples aren't written yet), and output
+        # callbacks arrive in blocks, so keep some headroom
+        lag = None if self._ref_pos is None else mark - (self._ref_pos + needed)
+        if lag is None or lag < 0 or lag > 2 * self._headroom:
+            if lag is not None:
+                self.resyncs += 1
+                logger.debug("Echo reference re-aligned (lag %d samples)", lag)
+            self._ref_pos = mark - needed - self._headroom
+            # A few samples of slack: the resampler's output count per call
+            # wobbles by one, and a gap would shift the whole timeline
+            self._pending = np.zeros(_SLACK, dtype=np.float32)
+            self._resampler.reset()
+        played = self.reference.read(self._ref_pos, needed)
+        self._ref_pos += needed
+        self._pending = np.concatenate((self._pending, self._resampler.process(played)))
+        if len(self._pending) < count:
+            self._pending = np.concatenate((self._pending, np.zeros(count - len(self._pending), np.float32)))
+        ref, self._pending = self._pending[:count], self._pending[count:]
+        return ref
+
+    def _process_block(self, d: np.ndarray, x: np.ndarray) -> np.ndarray:
+        n = self.block
+        self._far[1:] = self._far[:-1]
+        self._far[0] = np.fft.rfft(np.concatenate((self._x_prev, x)))
+        self._x_prev = x
+
+        # Echo estimates (overlap-save: the last n samples are valid)
+        y = np.fft.irfft(np.sum(self._weights * self._far, axis=0))[n:]
+        e = d - y
+        echo_only = False
+        s_xx = float(x @ x)
+        if s_xx > n * 1e-7:
+            y_bg = np.fft.irfft(np.sum(self._background * self._far, axis=0))[n:]
+            e_bg = d - y_bg
+            self._adapt(e_bg)
+            self._compare_filters(float(e @ e), float(e_bg @ e_bg))
+            s_dd, s_ee = float(d @ d), float(e @ e)
+            # Mostly echo in the mic: the error is what the filter missed
+            echo_only = s_ee < 0.1 * s_dd
+            erle = 10 * np.log10((s_dd + 1e-10) / (s_ee + 1e-10))
+            self.erle_db = 0.99 * self.erle_db + 0.01 * erle
+
+        if not self.suppress:
+            return e
+        return self._postfilter(e, y, echo_only)
+
+    def _adapt(self, e: np.ndarray) -> None:
+        """One NLMS step of the background filter."""
+        n = self.block
+        err_spec = np.fft.rfft(np.concatenate((self._zeros, e)))
+        power = np.sum(self._far.real ** 2 + self._far.imag ** 2, axis=0) + n * 1e-4
+        gradient = np.conj(self._far) * (self.step * err_spec / power)
+        # Gradient constraint: keep each partition a causal n-tap filter
+        taps = np.fft.irfft(gradient, axis=1)
+        taps[:, n:] = 0
+        self._background += np.fft.rfft(taps, axis=1)
+
+    def _compare_filters(self, fg_error: float, bg_error: float) -> None:
+        self._fg_error = 0.9 * self._fg_error + 0.1 * fg_error
+        self._bg_error = 0.9 * self._bg_error + 0.1 * bg_error
+        if self._bg_error < 0.8 * self._fg_error:
+            self._bg_better += 1
+            if self._bg_better >= 3:
+                self._weights[:] = self._background
+                self._fg_error = self._bg_error
+                self._bg_better = 0
+                self.copies += 1
+        else:
+            self._bg_better = 0
+            if self._bg_error > 1.5 * self._fg_error + self.block * 1e-7:
+                # Background is learning the near-end talker: roll it back
+                self._background[:] = self._weights
+                self._bg_error = self._fg_error
+
+    def _postfilter(self, e: np.ndarray, y: np.ndarray, echo_only: bool) -> np.ndarray:
+        """Residual echo suppression: per-bin spectral subtraction with
+        50% overlap-add (sqrt-Hann analysis and synthesis windows).
+
+        The residual in each bin is the echo estimate times that bin's leak
+        (error over echo power, learned while the filter is clearly
+        cancelling and nobody talks over it), held over a decaying tail for
+        reverberation the filter cuts short. Blocks that are no louder than
+        residual plus noise are taken down to the noise floor. Bins are
+        never pulled below the tracked background noise, so what is left of
+        the echo sinks into the noise instead of leaving holes that
+        noise-tracking VADs would read as level changes.
+        """
+        n = self.block
+        spec = np.fft.rfft(np.concatenate((self._e_prev, e)) * self._window)
+        echo = np.fft.rfft(np.concatenate((self._y_prev, y)) * self._window)
+        self._e_prev, self._y_prev = e, y
+        power = spec.real ** 2 + spec.imag ** 2
+        echo_power = echo.real ** 2 + echo.imag ** 2
+
+        if self._noise is None:
+            self._smoothed = power
+            self._noise = power
+        # Minimum tracking on smoothed power: falls fast, rises ~1 dB/s; the
+        # minimum sits below the mean noise power, hence the 1.5
+        self._smoothed = 0.7 * self._smoothed + 0.3 * power
+        self._noise = np.where(
+            self._smoothed < self._noise, 0.7 * self._noise + 0.3 * self._smoothed, self._noise * 1.003
+        )
+        noise = 1.5 * self._noise
+
+        if echo_only:
+            self._leak_err = 0.9 * self._leak_err + 0.1 * power
+            self._leak_echo = 0.9 * self._leak_echo + 0.1 * echo_power
+            self._leak = np.minimum(self._leak_err / (self._leak_echo + 1e-10), 1.0)
+            self.leak = float(np.mean(self._leak))
+        residual = np.maximum(2.0 * self._leak * echo_power, 0.6 * self._residual)
+        self._residual = residual
+
+        noise_gain = np.sqrt(noise / (power + 1e-10))
+        if np.sum(power) < 2.0 * np.sum(residual + noise):
+            gain = np.minimum(noise_gain, 1.0)  # echo only: down to the noise
+        else:
+            gain = np.maximum(1.0 - residual / (power + 1e-10), noise_gain)
+            gain = np.clip(gain, self.suppression_floor, 1.0)
+        frame = np.fft.irfft(spec * gain) * self._window
+        out = frame[:n] + self._ola
+        self._ola = frame[n:]
+        return out
+
+
+def _block_size(frame_size: int, frame_duration_ms: int) -> int:
+    """Largest split of the frame into ~10 ms blocks that divides it evenly."""
+    for count in range(max(1, round(frame_duration_ms / 10)), frame_size + 1):
+        if frame_size % count == 0:
+            return frame_size // count
+    return frame_size
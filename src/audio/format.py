@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+PCM_S16LE = "pcm_s16le"
+MP3 = "mp3"
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """Encoding and sample layout of an audio byte stream."""
+
+    encoding: str = PCM_S16LE
+    sample_rate: int = 24000
+    channels: int = 1
+
+    @property
+    def is_pcm(self) -> bool:
+        return self.encoding == PCM_S16LE
+
+    @property
+    def bytes_per_second(self) -> int:
+        """PCM byte rate (only meaningful for PCM formats)."""
+        return self.sample_rate * self.channels * 2
+
+    @classmethod
+    def from_elevenlabs(cls, output_format: str) -> "AudioFormat":
+        """Parse an ElevenLabs ``output_format`` such as ``pcm_24000`` or ``mp3_44100_128``."""
+        codec, _, rest = output_format.partition("_")
+        rate = int(rest.split("_")[0]) if rest else 44100
+        if codec == "pcm":
+            return cls(PCM_S16LE, rate)
+        if codec == "mp3":
+            return cls(MP3, rate)
+        raise ValueError(f"Unsupported ElevenLabs output format: {output_format}")
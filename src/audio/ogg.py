@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import io
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rates libopus encodes natively; anything else is resampled to 48 kHz
+_OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def _av():
+    try:
+        import av
+    except ImportError:
+        raise RuntimeError("PyAV not installed. Run: pip install av")
+    return av
+
+
+def decode_audio_file(data: bytes, sample_rate: int = 16000) -> bytes:
+    """Decode a whole audio file (OGG/Opus voice note, MP3, WAV, ...) to
+    PCM 16-bit mono at ``sample_rate``. CPU-bound: run it off the event loop."""
+    av = _av()
+    out: list[bytes] = []
+    with av.open(io.BytesIO(data), "r") as container:
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+        for frame in container.decode(stream):
+            out.extend(f.to_ndarray().tobytes() for f in resampler.resample(frame))
+        out.extend(f.to_ndarray().tobytes() for f in resampler.resample(None))
+    return b"".join(out)
+
+
+def encode_ogg_opus(pcm: bytes, sample_rate: int, bitrate: int = 32000) -> bytes:
+    """PCM 16-bit mono -> OGG/Opus, the format Telegram plays as a voice note.
+    CPU-bound: run it off the event loop."""
+    av = _av()
+    samples = np.frombuffer(pcm, dtype="<i2")
+    if not len(samples):
+        return b""
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="ogg") as container:
+        rate = sample_rate if sample_rate in _OPUS_RATES else 48000
+        stream = container.add_stream("libopus", rate=rate, layout="mono")
+        stream.bit_rate = bitrate
+        frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = sample_rate
+        if rate != sample_rate:
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+            frames = resampler.resample(frame) + resampler.resample(None)
+        else:
+            frames = [frame]
+        for f in frames + [None]:
+            for packet in stream.encode(f):
+                container.mux(packet)
+    return buf.getvalue()
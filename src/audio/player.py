@@ -1,25 +1,65 @@
 from __future__ import annotations
 
 import asyncio
-import io
 import logging
 import threading
+import time
 from collections.abc import AsyncIterator
 
+import numpy as np
+
+from src.audio.decoder import to_pcm
+from src.audio.echo import ReferenceBuffer
+from src.audio.format import AudioFormat
+from src.audio.resample import Resampler
+from src.audio.ring_buffer import RingBuffer
+
 logger = logging.getLogger(__name__)
 
 
 class AudioPlayer:
-    """Audio playback with barge-in support.
-
-    Plays audio through the default output device.
-    Can be interrupted (barge-in) at any time.
+    """Gapless audio playback with barge-in support.
+
+    One persistent output stream pulls samples from a lock-free ring buffer
+    in its realtime callback; ``play_stream`` only writes into the buffer.
+    Playback of a turn starts once ``jitter_ms`` of audio is buffered (or the
+    source ends), which absorbs network jitter without per-chunk gaps.
+    ``stop()`` silences output at the next callback block and drops
+    everything queued (barge-in). The device runs at ``sample_rate``;
+    audio in other rates is resampled on the way in. If ``echo_reference``
+    is set, every block sent to the device (silence included) is copied
+    into it for the echo canceller.
     """
 
-    def __init__(self, sample_rate: int = 24000) -> None:
+    def __init__(
+        self,
+        sample_rate: int = 24000,
+        jitter_ms: int = 60,
+        buffer_seconds: float = 30.0,
+        blocksize: int = 0,
+    ) -> None:
         self.sample_rate = sample_rate
+        self.jitter_ms = jitter_ms
+        self.buffer_seconds = buffer_seconds
+        self.blocksize = blocksize
+        self._ring = RingBuffer(int(sample_rate * buffer_seconds))
+        self._stream = None
+        self._stream_failed = False
+        self.echo_reference: ReferenceBuffer | None = None
         self._playing = False
+        self._writers = 0
         self._stop_event = threading.Event()
+        # Barge-ins requested / handled by the callback (it drops the ring)
+        self._stops_requested = 0
+        self._stops_done = 0
+        # Callback-side state (written by the audio thread)
+        self._prebuffering = True
+        self._end_of_stream = False
+        self._turn_started = 0.0
+        self._first_sound_at: float | None = None
+        self.frames_played = 0
+        self.underruns = 0
+        self.max_depth = 0
 
     @property
     def is_playing(self) -> bool:
@@ -28,91 +68,185 @@ class AudioPlayer:
     def stop(self) -> None:
         """Interrupt playback immediately (barge-in)."""
         if self._playing:
+            self._stops_requested += 1
             self._stop_event.set()
             logger.debug("Playback interrupted (barge-in)")
 
-    async def play_bytes(self, audio_data: bytes) -> None:
-        """Play raw audio bytes (expects mp3 or raw PCM)."""
+    def stats(self) -> dict[str, float]:
+        """Underruns, buffer depth and time-to-first-sound of the last turn."""
+        ttfs = (
+            (self._first_sound_at - self._turn_started) * 1000
+            if self._first_sound_at is not None
+            else 0.0
+        )
+        return {
+            "underruns": self.underruns,
+            "buffer_depth_ms": self._ring.available * 1000 / self.sample_rate,
+            "max_buffer_depth_ms": self.max_depth * 1000 / self.sample_rate,
+            "time_to_first_sound_ms": ttfs,
+            "frames_played": self.frames_played,
+        }
+
+    async def play_bytes(
+        self, audio_data: bytes, audio_format: AudioFormat | None = None
+    ) -> None:
+        """Play a complete audio buffer (PCM by default, MP3 is decoded)."""
         if not audio_data:
             return
-        self._playing = True
-        self._stop_event.clear()
-        try:
-            await asyncio.get_event_loop().run_in_executor(
-                None, self._play_sync, audio_data
-            )
-        finally:
-            self._playing = False
 
-    async def play_stream(self, audio_iter: AsyncIterator[bytes]) -> None:
-        """Play streaming audio chunks. Stops on barge-in."""
-        self._playing = True
-        self._stop_event.clear()
+        async def once() -> AsyncIterator[bytes]:
+            yield audio_data
+
+        await self.play_stream(once(), audio_format)
+
+    async def play_stream(
+        self, audio_iter: AsyncIterator[bytes], audio_format: AudioFormat | None = None
+    ) -> None:
+        """Queue streaming audio for gapless playback. Stops on barge-in.
+
+        Returns once the queued audio has been played (or interrupted).
+        """
+        audio_format = audio_format or AudioFormat(sample_rate=self.sample_rate)
+        resampler = Resampler(audio_format.sample_rate, self.sample_rate)
+        await self._await_discard()
+        self._begin_turn()
         try:
-            buffer = io.BytesIO()
-            async for chunk in audio_iter:
+            async for chunk in to_pcm(audio_iter, audio_format):
                 if self._stop_event.is_set():
                     logger.debug("Stream playback interrupted")
+                    # Close the source so in-flight synthesis is cancelled
+                    aclose = getattr(audio_iter, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
                     break
-                buffer.write(chunk)
-                # Play accumulated audio when buffer is large enough
-                if buffer.tell() >= 8192:
-                    await asyncio.get_event_loop().run_in_executor(
-                        None, self._play_sync, buffer.getvalue()
-                    )
-                    buffer = io.BytesIO()
-            # Play remaining buffer
-            if buffer.tell() > 0 and not self._stop_event.is_set():
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._play_sync, buffer.getvalue()
-                )
+                samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+                await self._enqueue(resampler.process(samples))
+            else:
+                await self._enqueue(resampler.flush())
+            if self._writers == 1:
+                self._end_of_stream = True
+                await self._drain()
         finally:
-            self._playing = False
+            self._writers -= 1
+            self._playing = self._writers > 0
+            stats = self.stats()
+            logger.debug(
+                "Playback done: first sound %.0fms, %d underruns, max depth %.0fms",
+                stats["time_to_first_sound_ms"],
+                stats["underruns"],
+                stats["max_buffer_depth_ms"],
+            )
+
+    def close(self) -> None:
+        """Close the output stream."""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    async def _await_discard(self, timeout: float = 0.5) -> None:
+        """Wait until the callback has dropped an interrupted turn's audio.
+
+        Only the callback may discard the ring (it is the reader), so a new
+        turn must not clear the stop flag and queue audio before it has.
+        """
+        deadline = time.monotonic() + timeout
+        while (
+            not self._writers
+            and self._stream is not None
+            and self._stops_done != self._stops_requested
+            and time.monotonic() < deadline
+        ):
+            await asyncio.sleep(0.005)
+
+    def _begin_turn(self) -> None:
+        if not self._writers:
+            self._stop_event.clear()
+            self._end_of_stream = False
+            self._turn_started = time.monotonic()
+            self._first_sound_at = None
+        # Concurrent writers (e.g. a filler clip, then the answer) share a turn
+        self._writers += 1
+        self._playing = True
+        self._ensure_stream()
 
-    def _play_sync(self, data: bytes) -> None:
-        """Synchronous playback. Tries sounddevice first, falls back to logging."""
-        if self._stop_event.is_set():
+    def _ensure_stream(self) -> None:
+        if self._stream is not None or self._stream_failed:
             return
         try:
-            import sounddevice as sd
-            import numpy as np
-
-            # Try to decode as mp3 first (ElevenLabs returns mp3)
-            try:
-                audio_array = self._decode_mp3(data)
-            except Exception:
-                # Assume raw PCM 16-bit
-                audio_array = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+            self._stream = self._open_stream()
+            self._stream.start()
+        except Exception as exc:
+            # No PortAudio / no output device: keep consuming audio silently
+            logger.warning("Audio output unavailable, skipping playback: %s", exc)
+            self._stream = None
+            self._stream_failed = True
+
+    def _open_stream(self):
+        import sounddevice as sd
+
+        return sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="float32",
+            blocksize=self.blocksize,
+            latency="low",
+            callback=self._callback,
+        )
+
+    async def _enqueue(self, samples: np.ndarray) -> None:
+        if self._stream is None:
+            return
+        while len(samples) and not self._stop_event.is_set():
+            written = self._ring.write(samples)
+            samples = samples[written:]
+            self.max_depth = max(self.max_depth, self._ring.available)
+            if len(samples):
+                # Buffer full: wait for the device to consume some audio
+                await asyncio.sleep(0.02)
+
+    async def _drain(self) -> None:
+        if self._stream is None:
+            return
+        while self._ring.available > 0 and not self._stop_event.is_set():
+            await asyncio.sleep(0.01)
+        # Let the last block leave the device buffer
+        await asyncio.sleep(getattr(self._stream, "latency", 0) or 0)
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        """Realtime output callback: never blocks, never allocates much."""
+        out = outdata[:, 0]
+        self._fill(out, frames)
+        if self.echo_reference is not None:
+            self.echo_reference.write(out)
+
+    def _fill(self, out: np.ndarray, frames: int) -> None:
+        requested = self._stops_requested
+        if self._stop_event.is_set() or self._stops_done != requested:
+            self._ring.discard()
+            self._stops_done = requested
+            self._prebuffering = True
+            out.fill(0)
+            return
 
-            if len(audio_array) == 0:
+        jitter = self.sample_rate * self.jitter_ms // 1000
+        if self._prebuffering:
+            if self._ring.available >= max(jitter, 1) or (
+                self._end_of_stream and self._ring.available > 0
+            ):
+                self._prebuffering = False
+            else:
+                out.fill(0)
                 return
 
-            sd.play(audio_array, self.sample_rate)
-            # Wait for playback with periodic stop checks
-            while sd.get_stream().active:
-                if self._stop_event.is_set():
-                    sd.stop()
-                    return
-                self._stop_event.wait(timeout=0.05)
-            sd.wait()
-        except ImportError:
-            logger.warning("sounddevice not available, skipping playback")
-        except Exception:
-            logger.exception("Playback error")
-
-    @staticmethod
-    def _decode_mp3(data: bytes) -> "np.ndarray":
-        """Decode mp3 bytes to numpy float32 array."""
-        import io
-        import numpy as np
-
-        try:
-            # Try using pydub if available
-            from pydub import AudioSegment
-            audio = AudioSegment.from_mp3(io.BytesIO(data))
-            samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
-            samples /= 2 ** (audio.sample_width * 8 - 1)
-            return samples
-        except ImportError:
-            # If pydub not available, raise to fall back to PCM
-            raise
+        n = self._ring.read_into(out)
+        if n:
+            if self._first_sound_at is None:
+                self._first_sound_at = time.monotonic()
+            self.frames_played += n
+        if n < frames:
+            out[n:] = 0
+            # Ran dry mid-turn: count it and rebuild the jitter buffer
+            if self._playing and not self._end_of_stream:
+                self.underruns += 1
+            self._prebuffering = True
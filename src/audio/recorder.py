@@ -4,6 +4,9 @@ import asyncio
 import logging
 import queue
 import threading
+from collections.abc import Callable
+
+from src.audio.resample import Resampler
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +14,13 @@ logger = logging.getLogger(__name__)
 class AudioRecorder:
     """Microphone audio capture using sounddevice.
 
-    Captures audio in frames suitable for VAD processing.
+    Captures audio in frames suitable for VAD processing. If the device
+    has to run at another rate (``device_sample_rate``, e.g. 48 kHz), audio
+    is resampled to ``sample_rate`` and re-framed to ``frame_duration_ms``.
+
+    ``reference_clock``, if set, is sampled in the capture callback and the
+    value for the last frame read is kept in ``frame_mark``; the echo
+    canceller uses it to line the frame up with what was being played.
     """
 
     def __init__(
@@ -19,11 +28,23 @@ class AudioRecorder:
         sample_rate: int = 16000,
         channels: int = 1,
         frame_duration_ms: int = 30,
+        device_sample_rate: int | None = None,
+        reference_clock: Callable[[], int] | None = None,
     ) -> None:
         self.sample_rate = sample_rate
         self.channels = channels
         self.frame_size = int(sample_rate * frame_duration_ms / 1000)
-        self._queue: queue.Queue[bytes] = queue.Queue()
+        self.device_sample_rate = device_sample_rate or sample_rate
+        self.device_frame_size = int(self.device_sample_rate * frame_duration_ms / 1000)
+        self._resampler = (
+            Resampler(self.device_sample_rate, sample_rate)
+            if self.device_sample_rate != sample_rate
+            else None
+        )
+        self.reference_clock = reference_clock
+        self.frame_mark: int | None = None
+        self._pending = b""
+        self._queue: queue.Queue[tuple[bytes, int | None]] = queue.Queue()
         self._running = False
         self._stream = None
 
@@ -40,11 +61,12 @@ class AudioRecorder:
         def callback(indata, frames, time_info, status):
             if status:
                 logger.warning("Audio input status: %s", status)
-            self._queue.put(bytes(indata))
+            mark = self.reference_clock() if self.reference_clock is not None else None
+            self._queue.put((bytes(indata), mark))
 
         self._stream = sd.RawInputStream(
-            samplerate=self.sample_rate,
-            blocksize=self.frame_size,
+            samplerate=self.device_sample_rate,
+            blocksize=self.device_frame_size,
             dtype="int16",
             channels=self.channels,
             callback=callback,
@@ -52,7 +74,7 @@ class AudioRecorder:
         self._stream.start()
         logger.info(
             "Recording started: %dHz, %dch, frame=%d samples",
-            self.sample_rate,
+            self.device_sample_rate,
             self.channels,
             self.frame_size,
         )
@@ -73,13 +95,24 @@ class AudioRecorder:
         try:
             # Non-blocking with small timeout to allow cooperative scheduling
             loop = asyncio.get_event_loop()
-            frame = await loop.run_in_executor(
+            frame, self.frame_mark = await loop.run_in_executor(
                 None, lambda: self._queue.get(timeout=0.1)
             )
+            if self._resampler is not None:
+                return self._reframe(self._resampler.process_pcm16(frame))
             return frame
         except queue.Empty:
             return None
 
+    def _reframe(self, pcm: bytes) -> bytes | None:
+        """Cut resampled audio back into fixed-size frames for the VAD."""
+        self._pending += pcm
+        frame_bytes = self.frame_size * 2 * self.channels
+        if len(self._pending) < frame_bytes:
+            return None
+        frame, self._pending = self._pending[:frame_bytes], self._pending[frame_bytes:]
+        return frame
+
     async def read_frames(self):
         """Async generator yielding audio frames."""
         while self._running:
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from math import ceil, gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Above this many phases a per-phase loop costs more than gathering windows
+_MAX_LOOP_PHASES = 8
+
+
+def _odd_length(length: int) -> int:
+    return length if length % 2 else length - 1
+
+
+@lru_cache(maxsize=32)
+def polyphase_filter(
+    up: int, down: int, zero_crossings: int = 8, rolloff: float = 0.92, beta: float = 8.6
+) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass split into ``up`` phases.
+
+    Returns a read-only ``(up, taps)`` float32 matrix; row ``p`` holds the
+    taps for output phase ``p``, reversed so it can be dotted directly with
+    a window of input samples (oldest first). Cached per rate pair.
+    """
+    ratio = max(up, down)
+    taps = ceil(2 * zero_crossings * ratio / up)
+    length = taps * up
+    # Odd-length symmetric filter (zero-padded to fill the phase matrix) so
+    # the delay is a whole number of upsampled samples
+    odd = _odd_length(length)
+    cutoff = rolloff * 0.5 / ratio  # cycles per upsampled sample
+    n = np.arange(odd) - (odd - 1) / 2
+    h = np.zeros(length)
+    h[:odd] = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(odd, beta)
+    h *= up / h.sum()  # unity DC gain after zero-stuffing
+    phases = h.reshape(taps, up).T[:, ::-1]
+    phases = np.ascontiguousarray(phases, dtype=np.float32)
+    phases.setflags(write=False)
+    return phases
+
+
+class Resampler:
+    """Streaming polyphase sample-rate converter for mono audio.
+
+    Chunks can have any length: the filter history and the fractional output
+    position carry over, so ``process(a) + process(b)`` equals
+    ``process(a + b)``. Each output phase is computed as one strided
+    matrix-vector product over a sliding window view of the input, so
+    there is no per-sample Python loop; ratios with many phases gather
+    all windows and use a single product instead.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, zero_crossings: int = 8) -> None:
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        g = gcd(from_rate, to_rate)
+        self.up = to_rate // g
+        self.down = from_rate // g
+        self._filter = polyphase_filter(self.up, self.down, zero_crossings)
+        self.taps = self._filter.shape[1]
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        # Position of the next output sample in upsampled units, relative to
+        # the first sample of the next chunk
+        self._position = 0
+
+    @property
+    def passthrough(self) -> bool:
+        return self.from_rate == self.to_rate
+
+    @property
+    def delay(self) -> float:
+        """Filter delay in seconds (group delay of the low-pass)."""
+        return (_odd_length(self.taps * self.up) - 1) / 2 / (self.from_rate * self.up)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample a chunk of float samples, return what is ready."""
+        if self.passthrough:
+            return np.asarray(samples, dtype=np.float32)
+        x = np.concatenate((self._history, np.asarray(samples, dtype=np.float32)))
+        n_in = len(x) - len(self._history)
+        up, down = self.up, self.down
+        start = self._position
+        n_out = max(0, -(-(n_in * up - start) // down))
+        out = np.empty(n_out, dtype=np.float32)
+        if n_out and up > _MAX_LOOP_PHASES:
+            # Many phases (e.g. 44.1k -> 48k, 160 phases): one gathered product
+            pos = start + np.arange(n_out) * down
+            first, phase = np.divmod(pos, up)
+            windows = sliding_window_view(x, self.taps)
+            out = np.einsum("nk,nk->n", windows[first], self._filter[phase])
+        elif n_out:
+            windows = sliding_window_view(x, self.taps)
+            for r in range(min(up, n_out)):
+                pos = start + r * down
+                first, phase = divmod(pos, up)
+                count = len(range(r, n_out, up))
+                rows = windows[first: first + (count - 1) * down + 1: down]
+                out[r::up] = rows @ self._filter[phase]
+        self._position = start + n_out * down - n_in * up
+        self._history = x[len(x) - len(self._history):].copy()
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Push out the samples still inside the filter at end of stream."""
+        if self.passthrough:
+            return np.empty(0, dtype=np.float32)
+        return self.process(np.zeros(self.taps // 2, dtype=np.float32))
+
+    def process_pcm16(self, data: bytes) -> bytes:
+        """Resample little-endian int16 PCM bytes."""
+        if self.passthrough:
+            return data
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+        out = self.process(samples)
+        return (np.clip(out, -1.0, 32767 / 32768) * 32768.0).astype("<i2").tobytes()
+
+    def reset(self) -> None:
+        self._history[:] = 0
+        self._position = 0
+
+
+def resample_pcm16(data: bytes, from_rate: int, to_rate: int) -> bytes:
+    """One-shot conversion of a complete int16 PCM buffer."""
+    if from_rate == to_rate:
+        return data
+    resampler = Resampler(from_rate, to_rate)
+    samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    out = np.concatenate((resampler.process(samples), resampler.flush()))
+    # Drop the filter delay so the output lines up with the input
+    skip = round(resampler.delay * to_rate)
+    out = out[skip: skip + round(len(samples) * to_rate / from_rate)]
+    return (np.clip(out, -1.0, 32767 / 32768) * 32768.0).astype("<i2").tobytes()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class RingBuffer:
+    """Single-producer / single-consumer sample ring buffer.
+
+    Lock-free: the producer only advances ``_write`` and the consumer only
+    advances ``_read``; both are plain ints published after the copy, which
+    is safe under the GIL. Built for an asyncio writer feeding a realtime
+    audio callback thread without blocking it.
+    """
+
+    def __init__(self, capacity: int, dtype: type = np.float32) -> None:
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._write = 0  # total samples written (producer-owned)
+        self._read = 0  # total samples read (consumer-owned)
+
+    @property
+    def available(self) -> int:
+        """Samples ready to be read."""
+        return self._write - self._read
+
+    @property
+    def free(self) -> int:
+        """Samples that can be written without overwriting unread data."""
+        return self.capacity - self.available
+
+    def write(self, samples: np.ndarray) -> int:
+        """Producer: copy as many samples as fit, return the count written."""
+        n = min(len(samples), self.free)
+        if n <= 0:
+            return 0
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if n > first:
+            self._data[: n - first] = samples[first:n]
+        self._write += n
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Consumer: fill ``out`` from the buffer, return the count read."""
+        n = min(len(out), self.available)
+        if n <= 0:
+            return 0
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        if n > first:
+            out[first:n] = self._data[: n - first]
+        self._read += n
+        return n
+
+    def discard(self) -> int:
+        """Consumer: drop everything unread, return the count dropped."""
+        dropped = self.available
+        self._read += dropped
+        return dropped
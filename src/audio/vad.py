@@ -1,49 +1,145 @@
 from __future__ import annotations
 
 import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
 
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
-class EnergyVAD:
-    """Simple energy-based Voice Activity Detection.
+class VoiceActivityDetector(ABC):
+    """Frame-by-frame voice activity detection with utterance events.
+
+    Backends only score frames (``speech_probability``); the base class turns
+    scores into events, tracks the silence tail that ends an utterance and
+    measures how long each frame takes to score. Speech starts (and a
+    running silence tail is cancelled) only after ``start_frames``
+    consecutive voiced frames; the frames before the one that triggered it
+    are kept in ``pre_roll`` so the utterance keeps its onset.
 
-    Detects speech by comparing RMS energy against a threshold.
-    Tracks silence duration to detect end-of-utterance.
+    Events returned by ``process_frame``:
+        "speech_start" — voice activity just started
+        "speech_end"   — silence long enough to mark end of utterance
+        "speech"       — ongoing speech (including the silence tail)
+        "silence"      — ongoing silence
     """
 
     def __init__(
         self,
-        threshold: float = 0.5,
         silence_duration_ms: int = 800,
         sample_rate: int = 16000,
         frame_duration_ms: int = 30,
+        start_frames: int = 1,
+        probability_threshold: float = 0.5,
     ) -> None:
-        self.threshold = threshold
         self.sample_rate = sample_rate
         self.frame_duration_ms = frame_duration_ms
-        self._silence_frames_needed = int(
-            silence_duration_ms / frame_duration_ms
-        )
+        self.start_frames = start_frames
+        self.probability_threshold = probability_threshold
+        self._silence_frames_needed = max(1, int(silence_duration_ms / frame_duration_ms))
+        self._silence_frame_count = 0
+        self._voiced_run = 0
+        self._is_speaking = False
+        # Frames before the one that started speech (its first voiced ones)
+        self._recent: deque[bytes] = deque(maxlen=max(0, start_frames - 1))
+        self.pre_roll: list[bytes] = []
+        self.last_probability = 0.0
+        self.frames = 0
+        self.speech_frames = 0
+        self._cost_total = 0.0
+        self.max_cost_us = 0.0
+
+    @abstractmethod
+    def speech_probability(self, audio: np.ndarray) -> float:
+        """Probability (0..1) that a frame of float samples contains speech."""
+        ...
+
+    def process_frame(self, frame: bytes) -> str:
+        """Process a single PCM 16-bit audio frame, return the event."""
+        t0 = time.perf_counter()
+        audio = np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0
+        probability = self.speech_probability(audio)
+        cost_us = (time.perf_counter() - t0) * 1e6
+        self._cost_total += cost_us
+        self.max_cost_us = max(self.max_cost_us, cost_us)
+        self.frames += 1
+        self.last_probability = probability
+
+        is_voice = probability >= self.probability_threshold
+        if is_voice:
+            self.speech_frames += 1
+            self._voiced_run += 1
+            if not self._is_speaking:
+                if self._voiced_run < self.start_frames:
+                    self._recent.append(frame)
+                    return "silence"
+                self.pre_roll = list(self._recent)
+                self._recent.clear()
+                self._is_speaking = True
+                self._silence_frame_count = 0
+                logger.debug("VAD: speech_start (p=%.2f)", probability)
+                return "speech_start"
+            # Isolated blips (clicks) inside the silence tail don't restart it
+            if self._voiced_run >= self.start_frames:
+                self._silence_frame_count = 0
+            return "speech"
+
+        self._voiced_run = 0
+        self._recent.clear()
+        if self._is_speaking:
+            self._silence_frame_count += 1
+            if self._silence_frame_count >= self._silence_frames_needed:
+                self._is_speaking = False
+                self._silence_frame_count = 0
+                logger.debug("VAD: speech_end")
+                return "speech_end"
+            return "speech"  # Still within silence tolerance
+        return "silence"
+
+    def reset(self) -> None:
+        """Reset state for a new utterance."""
         self._silence_frame_count = 0
+        self._voiced_run = 0
         self._is_speaking = False
+        self._recent.clear()
+        self.pre_roll = []
+
+    def stats(self) -> dict[str, float]:
+        """Per-frame scoring cost and share of frames classified as speech."""
+        return {
+            "frames": self.frames,
+            "mean_cost_us": self._cost_total / self.frames if self.frames else 0.0,
+            "max_cost_us": self.max_cost_us,
+            "speech_ratio": self.speech_frames / self.frames if self.frames else 0.0,
+            "last_probability": self.last_probability,
+        }
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """Simple energy-based Voice Activity Detection.
+
+    Detects speech by comparing RMS energy against a threshold relative to
+    a noise floor calibrated on the first ~second of audio.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        silence_duration_ms: int = 800,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 30,
+    ) -> None:
+        super().__init__(silence_duration_ms, sample_rate, frame_duration_ms)
+        self.threshold = threshold
         self._energy_floor = 0.001
         self._calibrated = False
         self._calibration_frames: list[float] = []
         self._calibration_count = 30  # ~1 second of frames for calibration
 
-    def process_frame(self, frame: bytes) -> str:
-        """Process a single audio frame.
-
-        Returns:
-            "speech_start" — voice activity just started
-            "speech_end"   — silence long enough to mark end of utterance
-            "speech"       — ongoing speech
-            "silence"      — ongoing silence
-        """
-        audio = np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0
+    def speech_probability(self, audio: np.ndarray) -> float:
         rms = float(np.sqrt(np.mean(audio ** 2)))
 
         # Auto-calibrate noise floor from first N frames
@@ -53,30 +149,107 @@ class EnergyVAD:
                 self._energy_floor = np.mean(self._calibration_frames) * 1.5 + 0.001
                 self._calibrated = True
                 logger.debug("VAD calibrated: noise floor=%.4f", self._energy_floor)
-            return "silence"
+            return 0.0
 
-        # Adaptive threshold relative to noise floor
-        is_voice = rms > max(self._energy_floor * (1 + self.threshold), 0.01)
+        # Adaptive threshold relative to noise floor; 0.5 exactly at the threshold
+        level = max(self._energy_floor * (1 + self.threshold), 0.01)
+        return rms / (rms + level)
 
-        if is_voice:
-            self._silence_frame_count = 0
-            if not self._is_speaking:
-                self._is_speaking = True
-                logger.debug("VAD: speech_start (rms=%.4f)", rms)
-                return "speech_start"
-            return "speech"
+
+class WebRtcVAD(VoiceActivityDetector):
+    """Google WebRTC VAD (GMM on sub-band energies), via ``webrtcvad``.
+
+    Each frame is scored in 10 ms slices; the probability is the share of
+    voiced slices. No calibration period. ``aggressiveness`` 0..3 trades
+    missed speech for fewer false triggers (3 rejects most speaker echo
+    and background noise).
+    """
+
+    def __init__(
+        self,
+        aggressiveness: int = 3,
+        silence_duration_ms: int = 500,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 30,
+        start_frames: int = 3,
+    ) -> None:
+        try:
+            import webrtcvad
+        except ImportError:
+            raise RuntimeError("webrtcvad not installed. Run: pip install webrtcvad")
+        if sample_rate not in (8000, 16000, 32000, 48000):
+            raise ValueError(f"webrtcvad does not support {sample_rate} Hz")
+        super().__init__(silence_duration_ms, sample_rate, frame_duration_ms, start_frames)
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self._slice = sample_rate // 100
+
+    def speech_probability(self, audio: np.ndarray) -> float:
+        pcm = (audio * 32768.0).astype("<i2").tobytes()
+        step = self._slice * 2
+        slices = [pcm[i:i + step] for i in range(0, len(pcm) - step + 1, step)]
+        if not slices:
+            return 0.0
+        voiced = sum(self._vad.is_speech(s, self.sample_rate) for s in slices)
+        return voiced / len(slices)
+
+
+class SpectralVAD(VoiceActivityDetector):
+    """NumPy spectral VAD: speech-band SNR plus spectral flux onsets.
+
+    The log spectrum (250-4000 Hz) is smoothed over time, compared with a
+    per-bin noise estimate, and averaged in dB over bins, which is far more
+    stable than raw frame energy. The noise estimate adapts from the first
+    frame (no calibration second): it drops quickly when the input gets
+    quieter and follows the spectrum while there is no speech. Positive
+    spectral flux (new energy appearing) lifts the score at onsets so the
+    start of speech is not missed while the smoothing catches up.
+    """
+
+    def __init__(
+        self,
+        silence_duration_ms: int = 500,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 30,
+        start_frames: int = 3,
+        snr_db: float = 5.0,
+    ) -> None:
+        super().__init__(silence_duration_ms, sample_rate, frame_duration_ms, start_frames)
+        self.snr_db = snr_db
+        n = int(sample_rate * frame_duration_ms / 1000)
+        self._window = np.hanning(n).astype(np.float32)
+        freqs = np.fft.rfftfreq(n, 1 / sample_rate)
+        self._band = (freqs >= 250) & (freqs <= 4000)
+        self._smoothed: np.ndarray | None = None
+        self._noise: np.ndarray | None = None
+
+    def speech_probability(self, audio: np.ndarray) -> float:
+        if len(audio) != len(self._window):
+            return 0.0
+        spectrum = np.fft.rfft(audio * self._window)[self._band]
+        level = np.log10(spectrum.real ** 2 + spectrum.imag ** 2 + 1e-10)
+
+        if self._smoothed is None:
+            self._smoothed = level
+            self._noise = level.copy()
+            return 0.0
+
+        previous = self._smoothed
+        self._smoothed = 0.5 * previous + 0.5 * level
+        # The bin average is stable enough to score each frame on its own,
+        # so a click lasting one frame can't hold the score up for the next
+        snr = 10 * float(np.mean(level - self._noise))
+        flux = float(np.mean(np.maximum(level - previous, 0.0)))
+
+        score = 1.2 * (snr - self.snr_db) + 4.0 * flux
+        probability = float(1.0 / (1.0 + np.exp(-np.clip(score, -30, 30))))
+
+        if snr < 0:
+            self._noise = 0.5 * self._noise + 0.5 * self._smoothed  # got quieter
+        elif probability < self.probability_threshold:
+            self._noise = 0.9 * self._noise + 0.1 * self._smoothed
         else:
-            if self._is_speaking:
-                self._silence_frame_count += 1
-                if self._silence_frame_count >= self._silence_frames_needed:
-                    self._is_speaking = False
-                    self._silence_frame_count = 0
-                    logger.debug("VAD: speech_end")
-                    return "speech_end"
-                return "speech"  # Still within silence tolerance
-            return "silence"
+            self._noise += 0.001  # a rising noise floor catches up eventually
+        return probability
 
-    def reset(self) -> None:
-        """Reset state for a new utterance."""
-        self._silence_frame_count = 0
-        self._is_speaking = False
+
+VAD_BACKENDS = ("energy", "webrtc", "spectral")
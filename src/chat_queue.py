@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Recent queue waits kept for the percentiles
+_WAIT_SAMPLES = 1024
+
+
+@dataclass
+class _Pending(Generic[T]):
+    item: T
+    coalesce: bool
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ChatQueue(Generic[T]):
+    """Per-chat serial processing with parallelism across chats.
+
+    Every chat is an actor: its items are handled one batch at a time, in
+    arrival order, by a task that exists only while the chat has work, so
+    two quick messages never run on the same agent at once. At most
+    ``max_concurrency`` batches run across all chats (the LLM is the
+    bottleneck), and a chat may have at most ``max_backlog`` items
+    waiting; ``submit`` refuses more.
+
+    Bursts are coalesced: a batch starts once the chat has been quiet for
+    ``coalesce_ms`` and takes every consecutive coalescable item queued
+    by then, including those that arrived while the previous batch ran.
+    Items submitted with ``coalesce=False`` (commands) are handled alone.
+    ``handler(chat_id, items)`` does the work.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Hashable, list[T]], Awaitable[None]],
+        max_concurrency: int = 8,
+        max_backlog: int = 5,
+        coalesce_ms: float = 300.0,
+    ) -> None:
+        self.handler = handler
+        self.max_backlog = max_backlog
+        self.coalesce_s = coalesce_ms / 1000
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._queues: dict[Hashable, deque[_Pending[T]]] = {}
+        self._actors: dict[Hashable, asyncio.Task] = {}
+        self._waits: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self.running = 0
+        self.submitted = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed = 0
+
+    def submit(self, chat_id: Hashable, item: T, coalesce: bool = True) -> bool:
+        """Queue an item for its chat; False if the chat's backlog is full."""
+        queue = self._queues.setdefault(chat_id, deque())
+        if len(queue) >= self.max_backlog:
+            self.dropped += 1
+            logger.warning("Chat %s backlog full (%d), dropping an item", chat_id, len(queue))
+            return False
+        queue.append(_Pending(item, coalesce))
+        self.submitted += 1
+        if chat_id not in self._actors:
+            self._actors[chat_id] = asyncio.create_task(self._run(chat_id, queue))
+        return True
+
+    async def join(self, timeout: float | None = None) -> bool:
+        """Wait until every chat's queued work is done; False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while self._actors:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            await asyncio.wait(list(self._actors.values()), timeout=remaining)
+        return True
+
+    async def close(self) -> None:
+        """Cancel all chats' work."""
+        for task in list(self._actors.values()):
+            task.cancel()
+        await asyncio.gather(*self._actors.values(), return_exceptions=True)
+        self._actors.clear()
+        self._queues.clear()
+
+    def stats(self) -> dict[str, float]:
+        """Throughput and time items spent waiting before their batch started."""
+        waits = sorted(self._waits)
+        return {
+            "chats": len(self._actors),
+            "queued": sum(len(q) for q in self._queues.values()),
+            "running": self.running,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failed": self.failed,
+            "wait_ms_p50": _percentile(waits, 0.5) * 1000,
+            "wait_ms_p95": _percentile(waits, 0.95) * 1000,
+            "wait_ms_max": (waits[-1] if waits else 0.0) * 1000,
+        }
+
+    async def _run(self, chat_id: Hashable, queue: deque[_Pending[T]]) -> None:
+        try:
+            while queue:
+                await self._settle(queue)
+                batch = self._take(queue)
+                async with self._slots:
+                    now = time.monotonic()
+                    self._waits.extend(now - p.enqueued_at for p in batch)
+                    self.running += 1
+                    self.batches += 1
+                    try:
+                        await self.handler(chat_id, [p.item for p in batch])
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        self.failed += 1
+                        logger.exception("Chat %s: handler failed", chat_id)
+                    finally:
+                        self.running -= 1
+        finally:
+            del self._actors[chat_id]
+            if self._queues.get(chat_id) is queue and not queue:
+                del self._queues[chat_id]
+
+    async def _settle(self, queue: deque[_Pending[T]]) -> None:
+        """Wait until no new item has arrived for ``coalesce_s``."""
+        if not queue[0].coalesce:
+            return
+        while True:
+            quiet = time.monotonic() - queue[-1].enqueued_at
+            if quiet >= self.coalesce_s:
+                return
+            await asyncio.sleep(self.coalesce_s - quiet)
+
+    @staticmethod
+    def _take(queue: deque[_Pending[T]]) -> list[_Pending[T]]:
+        first = queue.popleft()
+        batch = [first]
+        if first.coalesce:
+            while queue and queue[0].coalesce:
+                batch.append(queue.popleft())
+        return batch
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
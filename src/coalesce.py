@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# C-accelerated JSON string escaping (quotes included)
+_encode_string = json.encoder.encode_basestring_ascii
+_TOKEN_PREFIX = '{"type":"token","text":'
+_DONE_PREFIX = '{"type":"done","text":'
+
+
+def token_message(text: str) -> str:
+    """``{"type": "token", "text": text}`` without a generic ``json.dumps``."""
+    return _TOKEN_PREFIX + _encode_string(text) + "}"
+
+
+def done_message(text: str) -> str:
+    return _DONE_PREFIX + _encode_string(text) + "}"
+
+
+class TokenCoalescer:
+    """Batches streamed tokens into fewer WebSocket text frames.
+
+    The first token goes out at once (time to first token is what users
+    notice); after that, tokens are held for at most ``window_ms`` or until
+    ``max_chars`` have piled up, then sent as one ``token`` message. A
+    timer flushes a held batch even if no further token arrives, so a
+    stalled stream never sits on text. ``window_ms=0`` sends every token
+    on its own (the old behaviour). The 80 ms default is where
+    bench/ws_stream.py (recorded gpt-4o-mini pace) gets ~3 tokens per
+    frame and ~25% less server CPU; 20-30 ms barely batches at that pace.
+
+    ``send`` takes a ready-to-send text frame (``ws.send_text``).
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        window_ms: float = 80.0,
+        max_chars: int = 1024,
+    ) -> None:
+        self.send = send
+        self.window_s = window_ms / 1000
+        self.max_chars = max_chars
+        self._parts: list[str] = []
+        self._size = 0
+        self._opened_at = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._timed_flush: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._started = False
+        self.tokens = 0
+        self.frames = 0
+
+    async def add(self, token: str) -> None:
+        if not token:
+            return
+        self.tokens += 1
+        if not self._started or self.window_s <= 0:
+            self._started = True
+            await self._send(token)
+            return
+        if not self._parts:
+            self._opened_at = time.monotonic()
+            self._timer = asyncio.get_running_loop().call_later(self.window_s, self._on_timer)
+        self._parts.append(token)
+        self._size += len(token)
+        if self._size >= self.max_chars or time.monotonic() - self._opened_at >= self.window_s:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send whatever is held now."""
+        self.cancel_timer()
+        if not self._parts:
+            return
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        await self._send(text)
+
+    async def close(self, done_text: str | None = None) -> None:
+        """Flush the tail and, if given, send the ``done`` message."""
+        await self.flush()
+        if done_text is not None:
+            async with self._lock:
+                await self.send(done_message(done_text))
+                self.frames += 1
+
+    def cancel_timer(self) -> None:
+        """Stop a pending timed flush (the stream ended or failed)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        # Keep a reference: the loop holds tasks only weakly
+        self._timed_flush = asyncio.get_running_loop().create_task(self.flush())
+        self._timed_flush.add_done_callback(self._timed_flush_done)
+
+    def _timed_flush_done(self, task: asyncio.Task) -> None:
+        if self._timed_flush is task:
+            self._timed_flush = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Timed token flush failed: %s", task.exception())
+
+    async def _send(self, text: str) -> None:
+        # The timer's flush and add() may race: keep frames in order
+        async with self._lock:
+            await self.send(token_message(text))
+            self.frames += 1
+
+
+async def stream_tokens(
+    send: Callable[[str], Awaitable[None]],
+    tokens: AsyncIterator[str],
+    window_ms: float = 80.0,
+    max_chars: int = 1024,
+) -> str:
+    """Stream a response as coalesced ``token`` frames plus ``done``.
+
+    Returns the full text.
+    """
+    coalescer = TokenCoalescer(send, window_ms=window_ms, max_chars=max_chars)
+    parts: list[str] = []
+    try:
+        async for token in tokens:
+            parts.append(token)
+            await coalescer.add(token)
+    finally:
+        coalescer.cancel_timer()
+    full = "".join(parts)
+    await coalescer.close(full)
+    logger.debug("Streamed %d tokens in %d frames", coalescer.tokens, coalescer.frames)
+    return full
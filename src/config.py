@@ -15,6 +15,13 @@ class Settings(BaseSettings):
     elevenlabs_api_key: str = ""
     elevenlabs_voice_id: str = "21m00Tcm4TlvDq8ikWAM"
     elevenlabs_model_id: str = "eleven_turbo_v2_5"
+    elevenlabs_output_format: str = "pcm_24000"  # pcm_16000/pcm_24000 or mp3_44100_128
+    tts_mode: str = "http"  # "http" (per-sentence requests) or "websocket"
+    tts_lookahead: int = 2
+    tts_cache_dir: str = "./.cache/tts"  # empty disables the audio cache (http mode only)
+    tts_cache_max_mb: int = 256
+    filler_enabled: bool = True
+    filler_threshold_ms: int = 900  # play a filler if the answer is predicted later
 
     # LLM
     llm_api_key: str = ""
@@ -25,6 +32,7 @@ class Settings(BaseSettings):
     stt_provider: str = "whisper"
     deepgram_api_key: str = ""
     whisper_model: str = "base"
+    stt_language: str = "en"  # ISO code; empty = auto-detect
 
     # Knowledge
     knowledge_dir: str = "./knowledge"
@@ -35,18 +43,53 @@ class Settings(BaseSettings):
     sample_rate: int = 16000
     channels: int = 1
     frame_duration_ms: int = 30
-    vad_threshold: float = 0.5
+    capture_sample_rate: int = 0  # mic device rate; 0 = capture at sample_rate
+    vad_backend: str = "spectral"  # "spectral", "webrtc" or "energy"; see bench/vad.py
+    vad_aggressiveness: int = 3  # webrtc only, 0..3
+    vad_threshold: float = 0.5  # energy only
     vad_silence_duration_ms: int = 800
+    playback_jitter_ms: int = 60
+    # Remove the agent's own playback from the mic (open speakers). Opt-in:
+    # it still self-interrupts on 10 of 19 bench/echo.py answers, adds 10 ms
+    # of delay and spectral suppression to every mic frame; headsets need none
+    echo_cancel: bool = False
+    echo_filter_ms: int = 200  # echo path length the canceller models
 
     # Server
     web_host: str = "0.0.0.0"
     web_port: int = 8000
+    web_workers: int = 1  # worker processes; sessions stick to the one that created them
+    session_max: int = 100  # concurrent web sessions (idle ones are evicted first)
+    session_idle_ttl_s: float = 1800  # drop sessions unused this long
+    session_max_history: int = 40  # messages kept per session
+    ws_coalesce_ms: float = 80  # batch streamed tokens per frame; 0 = one frame per token
+    ws_coalesce_chars: int = 1024
+    web_stt_workers: int = 2  # concurrent voice-session transcriptions (a Whisper model each)
 
     # Agent
     person_name: str = "Daniel"
 
     # Telegram
     telegram_bot_token: str = ""
+    telegram_session_max: int = 1000  # chats held in memory
+    telegram_session_idle_ttl_s: float = 600  # then they live only in the database
+    telegram_session_db: str = "./.cache/telegram_sessions.sqlite3"  # empty: memory only
+    telegram_session_flush_s: float = 5  # write-behind interval
+    telegram_session_retention_days: float = 90
+    telegram_max_concurrency: int = 8  # chats answered at once
+    telegram_chat_backlog: int = 5  # messages waiting per chat
+    telegram_coalesce_ms: float = 300  # answer a burst of messages as one
+    telegram_stream_replies: bool = True  # show answers as they are generated
+    telegram_edit_interval_s: float = 1.0  # minimum spacing of message edits per chat
+    telegram_voice: bool = True  # answer voice notes (and reply by voice with a TTS key)
+    telegram_stt_language: str = "ru"  # voice notes; empty = auto-detect
+    telegram_stt_workers: int = 2  # concurrent transcriptions (a Whisper model each)
+    telegram_codec_workers: int = 2  # threads decoding/encoding OGG/Opus
+    telegram_webhook_url: str = ""  # public https URL; empty = long polling
+    telegram_webhook_host: str = "0.0.0.0"
+    telegram_webhook_port: int = 8443
+    telegram_webhook_secret: str = ""  # empty = random per run
+    telegram_api_url: str = ""  # other Bot API server; empty = api.telegram.org
 
     # Logging
     log_level: str = "INFO"
@@ -20,3 +20,18 @@ class LLMClient(ABC):
         async for token in self.stream_completion(messages):
             parts.append(token)
         return "".join(parts)
+
+    def model_params(self) -> dict[str, object]:
+        """Parameters that, together with the messages, determine the output.
+
+        Used as part of the recording key (see ``src.llm.cache``), so
+        anything affecting the completion (model, endpoint, sampling) must
+        be included.
+        """
+        return {"provider": type(self).__name__}
+
+    async def warmup(self) -> None:
+        """Open provider connections ahead of first use. Default: no-op."""
+
+    async def aclose(self) -> None:
+        """Release provider connections. Default: no-op."""
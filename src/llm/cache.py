@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from pathlib import Path
+
+from src.llm.base import LLMClient
+
+logger = logging.getLogger(__name__)
+
+
+class CacheMiss(LookupError):
+    """A replay-only recorder was asked for a completion it never recorded."""
+
+
+def completion_key(model_params: dict[str, object], messages: list[dict[str, str]]) -> str:
+    """Content address of the completion for ``messages`` under ``model_params``."""
+    payload = json.dumps(
+        {"model": model_params, "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionStore:
+    """Recorded completions on disk, one JSON file per key.
+
+    Entries live at ``<dir>/<key[:2]>/<key>.json`` and hold the messages
+    and the streamed tokens, so a replay streams exactly what was
+    recorded. Files are written to a temp name and renamed, so concurrent
+    runs never see half an entry.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("??/*.json"))
+
+    def get(self, key: str) -> list[str] | None:
+        try:
+            return json.loads(self.path(key).read_text(encoding="utf-8"))["tokens"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, messages: list[dict[str, str]], tokens: list[str]) -> None:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.{id(tokens)}.tmp")
+        tmp_path.write_text(
+            json.dumps({"messages": messages, "tokens": tokens}, ensure_ascii=False, indent=1),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+
+
+class RecordingLLMClient(LLMClient):
+    """Record/replay wrapper around any ``LLMClient``.
+
+    Each request is looked up by (model params, messages). Hits replay the
+    recorded tokens without touching the model; misses go to the wrapped
+    client and are recorded once their stream completes. With
+    ``replay_only`` a miss raises ``CacheMiss`` instead, for runs that
+    must be reproducible (and need no API key).
+    """
+
+    def __init__(self, inner: LLMClient, store: CompletionStore, replay_only: bool = False) -> None:
+        self.inner = inner
+        self.store = store
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+
+    def model_params(self) -> dict[str, object]:
+        return self.inner.model_params()
+
+    async def stream_completion(
+        self, messages: list[dict[str, str]]
+    ) -> AsyncIterator[str]:
+        key = completion_key(self.inner.model_params(), messages)
+        tokens = self.store.get(key)
+        if tokens is not None:
+            self.hits += 1
+            for token in tokens:
+                yield token
+            return
+
+        self.misses += 1
+        if self.replay_only:
+            raise CacheMiss(f"No recorded completion {key[:12]} ({len(messages)} messages)")
+
+        recorded: list[str] = []
+        async with aclosing(self.inner.stream_completion(messages)) as stream:
+            async for token in stream:
+                recorded.append(token)
+                yield token
+        # Only reached when the stream completed: never record a cut-off answer
+        self.store.put(key, messages, recorded)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def warmup(self) -> None:
+        if not self.replay_only:
+            await self.inner.warmup()
+
+    async def aclose(self) -> None:
+        logger.info("LLM recordings: %d replayed / %d from the model", self.hits, self.misses)
+        await self.inner.aclose()
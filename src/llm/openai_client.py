@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from collections.abc import AsyncIterator
 
+import httpx
 from openai import AsyncOpenAI
 
 from src.llm.base import LLMClient
@@ -13,11 +14,20 @@ logger = logging.getLogger(__name__)
 class OpenAILLMClient(LLMClient):
     """OpenAI-compatible LLM client with streaming."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini", base_url: str | None = None) -> None:
+    temperature = 0.3
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o-mini",
+        base_url: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+    ) -> None:
         self.model = model
         self.client = AsyncOpenAI(
             api_key=api_key,
             base_url=base_url or "https://api.openai.com/v1",
+            http_client=http_client,
         )
 
     async def stream_completion(
@@ -28,9 +38,22 @@ class OpenAILLMClient(LLMClient):
             model=self.model,
             messages=messages,  # type: ignore[arg-type]
             stream=True,
-            temperature=0.3,
+            temperature=self.temperature,
         )
         async for chunk in stream:
             delta = chunk.choices[0].delta if chunk.choices else None
             if delta and delta.content:
                 yield delta.content
+
+    def model_params(self) -> dict[str, object]:
+        return {
+            "provider": "openai",
+            "base_url": str(self.client.base_url),
+            "model": self.model,
+            "temperature": self.temperature,
+        }
+
+    async def warmup(self) -> None:
+        """Open a pooled connection to the API with a cheap request."""
+        await self.client.models.list()
+        logger.debug("LLM connection warmed up")
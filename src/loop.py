@@ -3,12 +3,16 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 
 from src.agent.agent import InterviewAgent
-from src.audio.vad import EnergyVAD
+from src.agent.spoken import SpokenFilter, spoken_part
+from src.audio.vad import VoiceActivityDetector
 from src.stt.base import STTClient
 from src.transport.base import TransportAdapter
 from src.tts.base import TTSClient
+from src.tts.fillers import FillerLibrary, LatencyEstimator, with_filler
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +22,10 @@ class VoiceLoop:
 
     Flow: Transport(mic) -> VAD -> STT -> Agent -> TTS -> Transport(speakers)
     Supports barge-in: if user speaks during TTS playback, stop and listen.
+    When the answer is predicted to take longer than ``filler_threshold_ms``
+    after the user stops speaking, a short filler clip plays first.
+    ``console=False`` keeps the transcript off stdout (servers running
+    many sessions).
     """
 
     def __init__(
@@ -26,13 +34,21 @@ class VoiceLoop:
         stt: STTClient,
         tts: TTSClient,
         transport: TransportAdapter,
-        vad: EnergyVAD,
+        vad: VoiceActivityDetector,
+        fillers: FillerLibrary | None = None,
+        filler_threshold_ms: float = 900,
+        console: bool = True,
     ) -> None:
         self.agent = agent
         self.stt = stt
         self.tts = tts
         self.transport = transport
         self.vad = vad
+        self.fillers = fillers
+        self.filler_threshold_ms = filler_threshold_ms
+        self.console = console
+        # Time from transcript to first answer audio, learned over turns
+        self.answer_latency = LatencyEstimator(initial_ms=filler_threshold_ms)
         self._running = False
 
     async def run(self) -> None:
@@ -40,7 +56,7 @@ class VoiceLoop:
         self._running = True
         await self.transport.start()
         logger.info("Voice loop started. Speak into your microphone...")
-        print("\n🎤 Listening... (Ctrl+C to stop)\n")
+        self._print("\n🎤 Listening... (Ctrl+C to stop)\n")
 
         try:
             while self._running:
@@ -60,13 +76,13 @@ class VoiceLoop:
                     continue
 
                 logger.info("STT (%.0fms): %s", (t_stt - t_start) * 1000, transcript)
-                print(f"\n👤 You: {transcript}")
+                self._print(f"\n👤 You: {transcript}")
 
                 # Generate and speak response
                 await self._generate_and_speak(transcript, t_start)
 
         except KeyboardInterrupt:
-            print("\nStopping...")
+            self._print("\nStopping...")
         finally:
             await self.stop()
 
@@ -74,7 +90,11 @@ class VoiceLoop:
         """Stop the voice loop."""
         self._running = False
         await self.transport.stop()
-        logger.info("Voice loop stopped")
+        stats = self.vad.stats()
+        logger.info(
+            "Voice loop stopped (VAD: %d frames, %.0fus/frame mean, %.0fus max)",
+            stats["frames"], stats["mean_cost_us"], stats["max_cost_us"],
+        )
 
     async def _collect_utterance(self) -> bytes | None:
         """Collect audio frames until end-of-utterance detected by VAD."""
@@ -94,7 +114,8 @@ class VoiceLoop:
 
             if event == "speech_start":
                 collecting = True
-                audio_chunks = [frame]
+                # The voiced frames the VAD needed before confirming speech
+                audio_chunks = [*self.vad.pre_roll, frame]
             elif event == "speech" and collecting:
                 audio_chunks.append(frame)
             elif event == "speech_end" and collecting:
@@ -102,35 +123,123 @@ class VoiceLoop:
                 self.vad.reset()
                 return b"".join(audio_chunks)
 
+        if self._running:
+            # Input ended (replay finished, device closed): nothing more to hear
+            logger.info("Audio input ended, stopping")
+            self._running = False
         return None
 
     async def _generate_and_speak(self, transcript: str, t_start: float) -> None:
-        """Generate agent response and stream TTS output."""
-        print("🤖 Agent: ", end="", flush=True)
+        """Generate agent response and stream TTS output.
 
-        # Collect response text for display and TTS
-        full_response: list[str] = []
+        The full response is printed and kept in history; only the spoken
+        part goes to TTS. TTS input is closed as soon as the "Sources:" /
+        "Stage:" trailer starts, so the last sentence is synthesized without
+        waiting for the rest of the response.
+        """
+        self._print("🤖 Agent: ", end="", flush=True)
+
+        spoken = SpokenFilter()
+        tts_input: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def pump() -> None:
+            try:
+                async for token in self.agent.respond_stream(transcript):
+                    self._print(token, end="", flush=True)
+                    if spoken.done:
+                        continue
+                    text = spoken.feed(token)
+                    if text:
+                        tts_input.put_nowait(text)
+                    if spoken.done:
+                        logger.debug("Response trailer reached, closing TTS input")
+                        tts_input.put_nowait(None)
+                tail = spoken.finish()
+                if tail:
+                    tts_input.put_nowait(tail)
+            finally:
+                tts_input.put_nowait(None)
+
+        spoken_to_end = False
 
         async def text_stream():
-            async for token in self.agent.respond_stream(transcript):
-                full_response.append(token)
-                print(token, end="", flush=True)
-                yield token
+            nonlocal spoken_to_end
+            while (text := await tts_input.get()) is not None:
+                yield text
+            spoken_to_end = True
 
-        # Stream text through TTS and play audio
+        interruptions = self.transport.interruptions
+        pump_task = asyncio.create_task(pump())
         try:
-            audio_stream = self.tts.synthesize_stream(text_stream())
-            await self.transport.write_audio_stream(audio_stream)
-        except Exception:
-            logger.exception("TTS/playback error")
+            # Stream text through TTS and play audio
+            try:
+                audio_stream = self._timed(
+                    self.tts.synthesize_stream(text_stream()), time.monotonic()
+                )
+                filler = self._pick_filler(transcript, t_start)
+                if filler is not None:
+                    audio_stream = with_filler(filler, audio_stream)
+                await self.transport.write_audio_stream(audio_stream, self.tts.audio_format)
+            except Exception:
+                logger.exception("TTS/playback error")
+            barged_in = self.transport.interruptions != interruptions
+            if barged_in and not spoken_to_end and not pump_task.done():
+                # The candidate cut the answer off: stop generating instead
+                # of waiting for the rest of it
+                logger.info("Answer interrupted, cancelling generation")
+                pump_task.cancel()
+                await asyncio.wait([pump_task])
+            else:
+                # Let the agent finish the response (display, history),
+                # also when TTS or playback failed
+                try:
+                    await pump_task
+                except Exception:
+                    logger.exception("Agent error")
+        finally:
+            if not pump_task.done():
+                pump_task.cancel()
 
         t_end = time.monotonic()
-        print()  # newline after response
+        self._print()  # newline after response
         logger.info(
             "Total turn time: %.0fms",
             (t_end - t_start) * 1000,
         )
 
+    def _print(self, *args, **kwargs) -> None:
+        if self.console:
+            print(*args, **kwargs)
+
+    def _pick_filler(self, transcript: str, t_start: float) -> bytes | None:
+        """A filler clip if the answer is predicted to arrive too late."""
+        if self.fillers is None:
+            return None
+        elapsed_ms = (time.monotonic() - t_start) * 1000
+        predicted_ms = elapsed_ms + self.answer_latency.value_ms
+        if predicted_ms < self.filler_threshold_ms:
+            return None
+        picked = self.fillers.pick(transcript)
+        if picked is None:
+            return None
+        text, audio = picked
+        logger.info("Filler %r (predicted first audio in %.0fms)", text, predicted_ms)
+        return audio
+
+    async def _timed(
+        self, audio_iter: AsyncIterator[bytes], t_ready: float
+    ) -> AsyncIterator[bytes]:
+        """Measure time to the first answer audio for the latency estimate."""
+        first = True
+        async with aclosing(audio_iter) as audio:
+            async for chunk in audio:
+                if first and chunk:
+                    first = False
+                    latency_ms = (time.monotonic() - t_ready) * 1000
+                    self.answer_latency.update(latency_ms)
+                    logger.info("First answer audio in %.0fms", latency_ms)
+                yield chunk
+
 
 class TextLoop:
     """Text-only interaction loop for testing without audio hardware."""
@@ -138,6 +247,7 @@ class TextLoop:
     def __init__(self, agent: InterviewAgent, tts: TTSClient | None = None) -> None:
         self.agent = agent
         self.tts = tts
+        self._player = None
 
     async def run(self) -> None:
         """Run the text interaction loop."""
@@ -169,14 +279,18 @@ class TextLoop:
             # Optional: play TTS
             if self.tts:
                 try:
-                    response_text = "".join(full_response)
-                    # Only speak the answer part, not the sources
-                    answer_part = response_text.split("Sources:")[0].strip()
+                    # Only speak the answer part, not the sources / stage label
+                    answer_part = spoken_part("".join(full_response))
                     if answer_part:
                         audio = await self.tts.synthesize(answer_part)
                         if audio:
                             from src.audio.player import AudioPlayer
-                            player = AudioPlayer(sample_rate=24000)
-                            await player.play_bytes(audio)
+                            audio_format = self.tts.audio_format
+                            if self._player is None:
+                                self._player = AudioPlayer(sample_rate=audio_format.sample_rate)
+                            await self._player.play_bytes(audio, audio_format)
                 except Exception:
                     logger.exception("TTS playback failed (non-fatal)")
+
+        if self._player is not None:
+            self._player.close()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional ``h2`` package."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class ResourceRegistry:
+    """App-level owner of long-lived clients.
+
+    Provider clients share one pooled ``httpx.AsyncClient`` per provider
+    (keepalive + HTTP/2 when available), so sentences and completions reuse
+    warm TCP/TLS connections instead of handshaking on every request.
+    Everything registered here is warmed up at startup and closed on shutdown.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 120.0,
+    ) -> None:
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = _http2_available()
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._warmups: list[Callable[[], Awaitable[None]]] = []
+        self._closers: list[Callable[[], Awaitable[None]]] = []
+
+    def http_client(self, name: str, timeout: float = 30.0) -> httpx.AsyncClient:
+        """Return the shared HTTP client for ``name``, creating it on first use."""
+        client = self._clients.get(name)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=self._http2,
+                limits=self._limits,
+                timeout=timeout,
+            )
+            self._clients[name] = client
+            logger.debug("Created HTTP client %r (http2=%s)", name, self._http2)
+        return client
+
+    def register(self, resource: object) -> None:
+        """Track a resource exposing optional ``warmup()`` / ``aclose()``."""
+        warmup = getattr(resource, "warmup", None)
+        if warmup is not None:
+            self._warmups.append(warmup)
+        aclose = getattr(resource, "aclose", None)
+        if aclose is not None:
+            self._closers.append(aclose)
+
+    async def warmup(self) -> None:
+        """Open provider connections before the first request needs them."""
+        warmups, self._warmups = self._warmups, []
+        for warmup in warmups:
+            try:
+                await warmup()
+            except Exception:
+                logger.warning("Warmup failed for %r", warmup, exc_info=True)
+
+    async def aclose(self) -> None:
+        """Close registered resources, then the shared HTTP clients."""
+        closers, self._closers = self._closers, []
+        for aclose in reversed(closers):
+            try:
+                await aclose()
+            except Exception:
+                logger.exception("Failed to close %r", aclose)
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        logger.debug("Closed %d HTTP clients", len(clients))
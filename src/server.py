@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import resource
+import selectors
+import signal
+import socket
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# ``?session=w<worker>.<token>`` in the request line of a reconnect
+_SESSION_WORKER = re.compile(rb"[?&]session=w(\d+)\.")
+
+# Snapshot keys that only ever grow (Prometheus counters), the rest are gauges
+_COUNTERS = {"created", "evicted", "rejected", "resume_misses", "messages", "cpu_seconds"}
+# How per-worker values combine into a total; anything else is summed
+_COMBINE: dict[str, Callable[[list[float]], float]] = {"max_session_bytes": max, "uptime_s": min}
+_NOT_TOTALLED = {"pid", "worker", "mean_session_bytes"}
+
+
+def session_prefix(worker: int) -> str:
+    """Session token prefix that routes reconnects back to ``worker``."""
+    return f"w{worker}."
+
+
+def worker_for(request_head: bytes) -> int | None:
+    """The worker owning the session named in an HTTP request line, if any."""
+    match = _SESSION_WORKER.search(request_head.split(b"\n", 1)[0])
+    return int(match.group(1)) if match else None
+
+
+def process_stats() -> dict[str, float]:
+    """CPU time and resident memory of this process."""
+    times = os.times()
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        rss = pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current, but better than nothing (KB on Linux, B on macOS)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {"cpu_seconds": times.user + times.system, "rss_bytes": rss}
+
+
+class StatsBoard:
+    """Where worker processes post stats snapshots for each other.
+
+    Every worker atomically rewrites ``worker-<n>.json`` in a shared
+    ``directory`` about once a second, so whichever worker serves
+    ``/metrics`` or ``/healthz`` can aggregate all of them. A snapshot
+    older than ``max_age_s`` counts as a dead worker. Without a directory
+    (single process) only the caller's own snapshot is seen.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        worker: int = 0,
+        workers: int = 1,
+        max_age_s: float = 5.0,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.worker = worker
+        self.workers = workers
+        self.max_age_s = max_age_s
+
+    def publish(self, snapshot: dict[str, float]) -> None:
+        if self.directory is None:
+            return
+        path = self.directory / f"worker-{self.worker}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({**snapshot, "published_at": time.time()}))
+        os.replace(tmp, path)
+
+    def collect(self, own: dict[str, float]) -> dict[int, dict[str, float]]:
+        """Fresh snapshots by worker index, ``own`` standing in for this worker."""
+        snapshots: dict[int, dict[str, float]] = {}
+        if self.directory is not None:
+            now = time.time()
+            for index in range(self.workers):
+                try:
+                    snapshot = json.loads((self.directory / f"worker-{index}.json").read_text())
+                except (OSError, ValueError):
+                    continue
+                if now - snapshot.pop("published_at", 0.0) <= self.max_age_s:
+                    snapshots[index] = snapshot
+        snapshots[self.worker] = own
+        return snapshots
+
+
+def aggregate(snapshots: dict[int, dict[str, float]]) -> dict[str, float]:
+    """Totals across workers (sums, except maxima and the youngest uptime)."""
+    keys = {key for snapshot in snapshots.values() for key in snapshot} - _NOT_TOTALLED
+    totals = {
+        key: _COMBINE.get(key, sum)([s[key] for s in snapshots.values() if key in s])
+        for key in sorted(keys)
+    }
+    if totals.get("sessions"):
+        totals["mean_session_bytes"] = totals.get("memory_bytes", 0.0) / totals["sessions"]
+    return totals
+
+
+def render_metrics(snapshots: dict[int, dict[str, float]], workers: int, prefix: str = "interview") -> str:
+    """Prometheus text format: ``<prefix>_<key>`` totals across workers and
+    ``<prefix>_worker_<key>{worker="n"}`` per worker."""
+    lines = [
+        f"# TYPE {prefix}_workers gauge",
+        f"{prefix}_workers {workers}",
+        f"# TYPE {prefix}_workers_alive gauge",
+        f"{prefix}_workers_alive {len(snapshots)}",
+    ]
+    for key, value in aggregate(snapshots).items():
+        kind = "counter" if key in _COUNTERS else "gauge"
+        lines.append(f"# TYPE {prefix}_{key} {kind}")
+        lines.append(f"{prefix}_{key} {value:g}")
+        per_worker = [(index, s[key]) for index, s in sorted(snapshots.items()) if key in s]
+        if per_worker:
+            lines.append(f"# TYPE {prefix}_worker_{key} {kind}")
+            lines.extend(f'{prefix}_worker_{key}{{worker="{index}"}} {v:g}' for index, v in per_worker)
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class _Worker:
+    index: int
+    pid: int
+    channel: socket.socket
+    started: float = field(default_factory=time.monotonic)
+
+
+class PreforkServer:
+    """N worker processes behind one listening port, with sticky sessions.
+
+    The parent binds the port, forks ``workers`` children and then only
+    accepts connections: it peeks at the request line and passes the
+    socket (``SCM_RIGHTS`` over a Unix socket pair) to the worker named by
+    a ``?session=w<n>.…`` token, or round-robin for new clients. Each
+    worker runs ``worker_main(index, channel)`` and serves the sockets it
+    receives (see ``serve_handed_off``). Whatever the parent built before
+    ``run()`` (the knowledge index) is inherited copy-on-write by every
+    worker.
+
+    A worker that dies is restarted; one that exits with an error within
+    ``min_uptime_s`` of starting stops the server (a config error would
+    only crash again). SIGINT/SIGTERM stop the workers gracefully.
+    Unix only.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        worker_main: Callable[[int, socket.socket], None],
+        min_uptime_s: float = 5.0,
+        peek_bytes: int = 2048,
+        handoff_timeout_s: float = 10.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.worker_main = worker_main
+        self.min_uptime_s = min_uptime_s
+        self.peek_bytes = peek_bytes
+        self.handoff_timeout_s = handoff_timeout_s
+        self._workers: list[_Worker | None] = [None] * workers
+        self._pending: dict[socket.socket, float] = {}
+        self._next = 0
+        self._stopping = False
+        self._listener: socket.socket | None = None
+        self._selector: selectors.BaseSelector | None = None
+        self.exit_code = 0
+        self.handed_off = 0
+        self.sticky = 0
+
+    def run(self) -> int:
+        """Serve until signalled; returns the exit code."""
+        self._listener = socket.create_server((self.host, self.port), backlog=2048)
+        self._listener.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        previous = {sig: signal.signal(sig, self._on_signal) for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            for index in range(self.workers):
+                self._spawn(index)
+            while not self._stopping:
+                for key, _ in self._selector.select(timeout=0.5):
+                    if key.fileobj is self._listener:
+                        self._accept()
+                    else:
+                        self._hand_off(key.fileobj)
+                self._reap()
+                self._expire_pending()
+        finally:
+            self._shutdown()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+        logger.info("Prefork server stopped: %d connections handed off, %d sticky", self.handed_off, self.sticky)
+        return self.exit_code
+
+    def _on_signal(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _spawn(self, index: int) -> None:
+        parent_end, child_end = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                self._selector.close()
+                self._listener.close()
+                parent_end.close()
+                for worker in self._workers:
+                    if worker is not None:
+                        worker.channel.close()
+                for conn in self._pending:
+                    conn.close()
+                self.worker_main(index, child_end)
+            except KeyboardInterrupt:
+                pass
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("Worker %d crashed", index)
+                code = 1
+            finally:
+                os._exit(code)
+        child_end.close()
+        parent_end.setblocking(False)
+        self._workers[index] = _Worker(index=index, pid=pid, channel=parent_end)
+        logger.info("Started worker %d (pid %d)", index, pid)
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.warning("accept() failed: %s", e)
+                return
+            self._pending[conn] = time.monotonic() + self.handoff_timeout_s
+            self._selector.register(conn, selectors.EVENT_READ)
+
+    def _hand_off(self, conn: socket.socket) -> None:
+        """Pass a connection whose first bytes have arrived to a worker."""
+        self._selector.unregister(conn)
+        del self._pending[conn]
+        try:
+            head = conn.recv(self.peek_bytes, socket.MSG_PEEK)
+        except OSError:
+            head = b""
+        if head:
+            preferred = worker_for(head)
+            for worker in self._candidates(preferred):
+                try:
+                    socket.send_fds(worker.channel, [b"c"], [conn.fileno()])
+                except OSError:
+                    # Busy (channel full) or gone: next worker
+                    continue
+                self.handed_off += 1
+                if worker.index == preferred:
+                    self.sticky += 1
+                break
+            else:
+                logger.warning("No worker accepted the connection, dropping it")
+        conn.close()
+
+    def _candidates(self, preferred: int | None) -> list[_Worker]:
+        alive = [w for w in self._workers if w is not None]
+        if not alive:
+            return []
+        start = self._next % len(alive)
+        self._next += 1
+        ordered = alive[start:] + alive[:start]
+        if preferred is not None:
+            ordered.sort(key=lambda w: w.index != preferred)
+        return ordered
+
+    def _expire_pending(self) -> None:
+        now = time.monotonic()
+        for conn, deadline in list(self._pending.items()):
+            if now > deadline:
+                self._selector.unregister(conn)
+                del self._pending[conn]
+                conn.close()
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = next((w for w in self._workers if w is not None and w.pid == pid), None)
+            if worker is None:
+                continue
+            worker.channel.close()
+            self._workers[worker.index] = None
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping:
+                continue
+            if code > 0 and time.monotonic() - worker.started < self.min_uptime_s:
+                logger.error("Worker %d exited with %d right after starting, stopping", worker.index, code)
+                self.exit_code = code
+                self._stopping = True
+                continue
+            logger.warning("Worker %d (pid %d) exited with %d, restarting", worker.index, pid, code)
+            self._spawn(worker.index)
+
+    def _shutdown(self, timeout_s: float = 15.0) -> None:
+        for conn in self._pending:
+            conn.close()
+        self._pending.clear()
+        if self._selector is not None:
+            self._selector.close()
+        if self._listener is not None:
+            self._listener.close()
+        for worker in self._workers:
+            if worker is not None:
+                try:
+                    os.kill(worker.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+        deadline = time.monotonic() + timeout_s
+        while any(self._workers) and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for worker in self._workers:
+            if worker is not None:
+                logger.warning("Worker %d did not stop in time, killing it", worker.index)
+                try:
+                    os.kill(worker.pid, signal.SIGKILL)
+                    os.waitpid(worker.pid, 0)
+                except (ProcessLookupError, ChildProcessError):
+                    pass
+                worker.channel.close()
+        self._workers = [None] * self.workers
+
+
+async def serve_handed_off(app, channel: socket.socket, log_level: str = "info") -> None:
+    """Run ``app`` with uvicorn on connections passed over ``channel``
+    (a worker of ``PreforkServer``) instead of a listening socket.
+
+    Mirrors ``uvicorn.Server.serve()`` minus the bind: the app's lifespan
+    runs, each received socket gets uvicorn's HTTP/WebSocket protocol, and
+    SIGINT/SIGTERM or the parent going away shut down gracefully.
+    ``serve(sockets=...)`` only takes listening sockets, so this drives
+    ``Server`` internals (``startup``/``main_loop``/``shutdown``, the
+    config's protocol classes); requirements.txt pins the uvicorn range
+    the prefork test passes on.
+    """
+    import uvicorn
+
+    config = uvicorn.Config(app, log_level=log_level)
+    config.load()
+    server = uvicorn.Server(config)
+    server.lifespan = config.lifespan_class(config)
+    await server.startup(sockets=[])
+    if server.should_exit:
+        return
+
+    loop = asyncio.get_running_loop()
+
+    def protocol_factory():
+        return config.http_protocol_class(
+            config=config, server_state=server.server_state, app_state=server.lifespan.state
+        )
+
+    async def serve_socket(sock: socket.socket) -> None:
+        try:
+            await loop.connect_accepted_socket(protocol_factory, sock)
+        except OSError as e:
+            logger.debug("Handed-off connection failed: %s", e)
+            sock.close()
+
+    def on_channel() -> None:
+        while True:
+            try:
+                message, fds, _, _ = socket.recv_fds(channel, 1, 1)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                message, fds = b"", []
+            if not message and not fds:
+                logger.info("Parent process went away, shutting down")
+                loop.remove_reader(channel.fileno())
+                server.should_exit = True
+                return
+            for fd in fds:
+                sock = socket.socket(fileno=fd)
+                sock.setblocking(False)
+                loop.create_task(serve_socket(sock))
+
+    def on_signal() -> None:
+        server.should_exit = True
+
+    channel.setblocking(False)
+    loop.add_reader(channel.fileno(), on_channel)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, on_signal)
+    logger.info("Worker process [%d] serving", os.getpid())
+    try:
+        await server.main_loop()
+    finally:
+        loop.remove_reader(channel.fileno())
+        await server.shutdown()
+        channel.close()
@@ -5,13 +5,24 @@ from collections.abc import AsyncIterator
 
 
 class STTClient(ABC):
-    """Abstract base for speech-to-text providers."""
+    """Abstract base for speech-to-text providers.
+
+    ``blocking`` marks clients that compute locally (a CPU-bound model)
+    rather than awaiting a remote service; they implement the work in
+    ``transcribe_blocking``, which callers may run on a worker thread.
+    """
+
+    blocking: bool = False
 
     @abstractmethod
     async def transcribe(self, audio: bytes, sample_rate: int = 16000) -> str:
         """Transcribe a complete audio buffer to text."""
         ...
 
+    def transcribe_blocking(self, audio: bytes, sample_rate: int = 16000) -> str:
+        """Transcribe on the calling thread (``blocking`` clients only)."""
+        raise NotImplementedError(f"{type(self).__name__} is not a blocking client")
+
     async def transcribe_stream(
         self, audio_iter: AsyncIterator[bytes]
     ) -> AsyncIterator[str]:
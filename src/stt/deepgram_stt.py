@@ -18,9 +18,10 @@ class DeepgramSTT(STTClient):
     Requires DEEPGRAM_API_KEY environment variable.
     """
 
-    def __init__(self, api_key: str, sample_rate: int = 16000) -> None:
+    def __init__(self, api_key: str, sample_rate: int = 16000, language: str | None = "en") -> None:
         self.api_key = api_key
         self.sample_rate = sample_rate
+        self.language = language  # None: detected (batch only; streaming uses "en")
 
     async def transcribe(self, audio: bytes, sample_rate: int = 16000) -> str:
         """Batch transcription via Deepgram REST API."""
@@ -36,8 +37,11 @@ class DeepgramSTT(STTClient):
             "sample_rate": str(sample_rate),
             "channels": "1",
             "model": "nova-2",
-            "language": "en",
         }
+        if self.language:
+            params["language"] = self.language
+        else:
+            params["detect_language"] = "true"
         async with httpx.AsyncClient(timeout=30.0) as client:
             resp = await client.post(
                 url, content=audio, headers=headers, params=params
@@ -67,7 +71,7 @@ class DeepgramSTT(STTClient):
 
         params = (
             f"?encoding=linear16&sample_rate={self.sample_rate}"
-            f"&channels=1&model=nova-2&language=en"
+            f"&channels=1&model=nova-2&language={self.language or 'en'}"
             f"&punctuate=true&interim_results=false"
         )
         url = _DEEPGRAM_WS_URL + params
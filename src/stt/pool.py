@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+from src.stt.base import STTClient
+
+logger = logging.getLogger(__name__)
+
+
+class STTPool(STTClient):
+    """A fixed number of STT clients shared by concurrent callers.
+
+    At most ``size`` transcriptions run at once, each on its own client
+    from ``factory`` (created on first need, so a local model is loaded
+    only as often as the load requires). Blocking clients (local Whisper)
+    run ``transcribe_blocking`` on a worker thread, so one long
+    transcription doesn't freeze everything else; remote ones are awaited
+    in place and the pool just caps their concurrency.
+
+    The pool is itself an ``STTClient`` (a non-blocking one), so a
+    ``VoiceLoop`` can use it in place of a single client.
+    """
+
+    def __init__(self, factory: Callable[[], STTClient], size: int = 2) -> None:
+        self.factory = factory
+        self.size = size
+        self._idle: asyncio.Queue[STTClient] = asyncio.Queue()
+        self._created = 0
+        self._slots = asyncio.Semaphore(size)
+
+    async def transcribe(self, audio: bytes, sample_rate: int = 16000) -> str:
+        async with self._slots:
+            client = self._idle.get_nowait() if not self._idle.empty() else self._create()
+            try:
+                if client.blocking:
+                    return await asyncio.to_thread(client.transcribe_blocking, audio, sample_rate)
+                return await client.transcribe(audio, sample_rate)
+            finally:
+                self._idle.put_nowait(client)
+
+    def _create(self) -> STTClient:
+        self._created += 1
+        logger.info("STT pool: creating client %d/%d", self._created, self.size)
+        return self.factory()
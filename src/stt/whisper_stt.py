@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import io
 import logging
 import tempfile
@@ -8,17 +9,27 @@ from collections.abc import AsyncIterator
 
 import numpy as np
 
+from src.audio.resample import resample_pcm16
 from src.stt.base import STTClient
 
 logger = logging.getLogger(__name__)
 
+WHISPER_SAMPLE_RATE = 16000
+
 
 class WhisperSTT(STTClient):
-    """Local STT using faster-whisper."""
+    """Local STT using faster-whisper.
+
+    ``language`` is an ISO code such as ``"en"`` or ``"ru"``; ``None``
+    lets Whisper detect it from the first 30 seconds of each clip.
+    """
 
-    def __init__(self, model_size: str = "base") -> None:
+    blocking = True
+
+    def __init__(self, model_size: str = "base", language: str | None = "en") -> None:
         self._model = None
         self._model_size = model_size
+        self.language = language
 
     def _ensure_model(self) -> None:
         if self._model is not None:
@@ -38,9 +49,18 @@ class WhisperSTT(STTClient):
             )
 
     async def transcribe(self, audio: bytes, sample_rate: int = 16000) -> str:
-        """Transcribe raw PCM 16-bit audio bytes."""
+        """Transcribe raw PCM 16-bit audio bytes on a worker thread."""
+        return await asyncio.to_thread(self.transcribe_blocking, audio, sample_rate)
+
+    def transcribe_blocking(self, audio: bytes, sample_rate: int = 16000) -> str:
+        """Transcribe raw PCM 16-bit audio bytes on the calling thread."""
         self._ensure_model()
 
+        # Whisper models are trained on 16 kHz audio
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            audio = resample_pcm16(audio, sample_rate, WHISPER_SAMPLE_RATE)
+            sample_rate = WHISPER_SAMPLE_RATE
+
         # Convert raw PCM bytes to WAV in memory
         wav_buf = io.BytesIO()
         with wave.open(wav_buf, "wb") as wf:
@@ -56,7 +76,7 @@ class WhisperSTT(STTClient):
         segments, info = self._model.transcribe(
             audio_array,
             beam_size=1,
-            language="en",
+            language=self.language,
             vad_filter=True,
         )
         text = " ".join(seg.text.strip() for seg in segments)
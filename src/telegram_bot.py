@@ -1,12 +1,27 @@
 """Telegram bot interface for the interview agent."""
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Callable
 
 from aiogram import Bot, Dispatcher, Router, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import BufferedInputFile
 from aiogram.filters import Command
 
 from src.agent.agent import InterviewAgent
+from src.agent.spoken import spoken_part
+from src.agent.sessions import SessionLimitError, SessionManager
+from src.agent.store import SQLiteSessionStore
+from src.chat_queue import ChatQueue
+from src.stt.base import STTClient
+from src.stt.pool import STTPool
+from src.telegram_stream import StreamingReply, split_message
+from src.telegram_voice import StageTimer, VoicePipeline, duration_s, is_silent
+from src.telegram_webhook import serve_webhook
+from src.tts.base import TTSClient
 from src.knowledge.retriever import KnowledgeRetriever
 from src.llm.base import LLMClient
 
@@ -14,35 +29,59 @@ logger = logging.getLogger(__name__)
 
 router = Router()
 
-# Per-chat agent instances: chat_id -> InterviewAgent
-_agents: dict[int, InterviewAgent] = {}
+# Per-chat sessions keyed by chat id: a bounded in-memory tier, written
+# behind to SQLite when configured (set in run_bot)
+_sessions: SessionManager | None = None
+
+# Per-chat actors: each chat's messages are answered one batch at a time
+_queue: ChatQueue[types.Message] | None = None
+
+# Voice notes in, voice replies out; None when voice is off (set in run_bot)
+_voice: VoicePipeline | None = None
 
 # Shared dependencies (set in run_bot)
 _retriever: KnowledgeRetriever | None = None
 _llm: LLMClient | None = None
 _person_name: str = "Daniel"
 _max_chunks: int = 5
+_max_history: int | None = None
+_stream_replies: bool = True
+_edit_interval_s: float = 1.0
 
 
-def _reset_agent(chat_id: int) -> InterviewAgent:
-    """Drop old agent (if any) and create a fresh one."""
-    _agents.pop(chat_id, None)
+def _new_agent() -> InterviewAgent:
     assert _retriever is not None and _llm is not None
-    agent = InterviewAgent(
+    return InterviewAgent(
         llm=_llm,
         retriever=_retriever,
         person_name=_person_name,
         max_chunks=_max_chunks,
+        max_history=_max_history,
     )
-    _agents[chat_id] = agent
-    return agent
 
 
-def _get_agent(chat_id: int) -> InterviewAgent:
-    """Get existing agent or create a new one."""
-    if chat_id not in _agents:
-        return _reset_agent(chat_id)
-    return _agents[chat_id]
+def _reset_agent(chat_id: int) -> None:
+    """Start the chat's interview over."""
+    assert _sessions is not None
+    session = _sessions.open(str(chat_id))
+    session.agent.reset_history()
+    _sessions.release(session)
+
+
+async def _flush_sessions(interval_s: float) -> None:
+    """Write changed conversations to the store every ``interval_s``,
+    dropping the ones that have idled out from memory."""
+    assert _sessions is not None
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            _sessions.evict_idle()
+            written = _sessions.flush()
+        except Exception:
+            logger.exception("Could not save Telegram sessions")
+            continue
+        if written:
+            logger.debug("Saved %d Telegram sessions", written)
 
 
 GREETING = (
@@ -62,39 +101,161 @@ GREETING = (
 )
 
 
+NEWCHAT = (
+    "Новый диалог! Вся предыдущая история очищена.\n\n"
+    "Привет, давай начнём сначала — расскажи о себе!"
+)
+
+FAILED = "Что-то пошло не так 😔 Попробуй ещё раз через минуту."
+BUSY = "Подожди, я ещё отвечаю на предыдущие сообщения."
+SESSION_LIMIT = "Сейчас слишком много собеседников, попробуй через минуту."
+
+# Commands that restart the interview, and what they answer
+_RESET_COMMANDS = {"/start": GREETING, "/newchat": NEWCHAT}
+
+
+async def _submit(message: types.Message, coalesce: bool = True) -> None:
+    """Queue a message for the chat's actor, or say so if its backlog is full."""
+    assert _queue is not None
+    if not _queue.submit(message.chat.id, message, coalesce=coalesce):
+        await message.answer(BUSY)
+
+
 @router.message(Command("start"))
 async def cmd_start(message: types.Message) -> None:
     """Handle /start — first launch, same as newchat."""
-    _reset_agent(message.chat.id)
-    await message.answer(GREETING.format(name=_person_name))
+    await _submit(message, coalesce=False)
 
 
 @router.message(Command("newchat"))
 async def cmd_newchat(message: types.Message) -> None:
     """Handle /newchat — wipe memory, start a fresh interview."""
-    _reset_agent(message.chat.id)
-    await message.answer(
-        "Новый диалог! Вся предыдущая история очищена.\n\n"
-        "Привет, давай начнём сначала — расскажи о себе!"
-    )
+    await _submit(message, coalesce=False)
 
 
 @router.message()
 async def handle_message(message: types.Message) -> None:
-    """Handle text messages — send to agent and reply."""
-    if not message.text:
+    """Handle text and voice messages — queue them for the chat's actor."""
+    if message.voice and _voice is not None:
+        await _submit(message, coalesce=False)
+    elif message.text:
+        await _submit(message)
+
+
+async def _process(chat_id: int, messages: list[types.Message]) -> None:
+    """Answer one batch for a chat: a command, a voice note, or a burst of
+    messages answered as one turn."""
+    try:
+        await _process_batch(chat_id, messages)
+    except Exception:
+        # Tell the candidate instead of going silent; the queue logs the error
+        try:
+            await messages[-1].answer(FAILED)
+        except Exception as e:
+            logger.warning("Chat %d: could not report the failure: %s", chat_id, e)
+        raise
+
+
+async def _process_batch(chat_id: int, messages: list[types.Message]) -> None:
+    last = messages[-1]
+    if last.voice:
+        await _answer_voice(chat_id, last)
         return
+    command = last.text.split(maxsplit=1)[0].split("@")[0] if len(messages) == 1 else ""
+    if command in _RESET_COMMANDS:
+        try:
+            _reset_agent(chat_id)
+        except SessionLimitError as e:
+            logger.warning("Chat %d rejected: %s", chat_id, e)
+            await last.answer(SESSION_LIMIT)
+            return
+        await last.answer(_RESET_COMMANDS[command].format(name=_person_name))
+        return
+
+    text = "\n".join(m.text for m in messages)
+    logger.info("Chat %d: %s (%d messages)", chat_id, text[:100], len(messages))
+    await _answer(chat_id, text, last)
+
+
+async def _answer_voice(chat_id: int, message: types.Message) -> None:
+    """Voice note -> PCM -> transcript -> answer (as text) -> voice reply."""
+    assert _voice is not None
+    timer = StageTimer()
+    note = await message.bot.download(message.voice)
+    timer.lap("download")
+    pcm = await _voice.decode(note.read())
+    timer.lap("decode")
+    text = "" if is_silent(pcm) else await _voice.transcribe(pcm)
+    timer.lap("stt")
+    logger.info("Chat %d: voice note %.1fs: %s", chat_id, duration_s(pcm, _voice.sample_rate), text[:100])
+    if not text:
+        await message.reply("Не получилось разобрать голосовое — попробуй ещё раз или напиши текстом.")
+        return
+
+    await message.reply(f"🎤 {text}")
+    response = await _answer(chat_id, text, message)
+    timer.lap("answer")
+    if response is None:
+        return
+    speech = await _voice.synthesize(spoken_part(response))
+    timer.lap("tts")
+    if speech is not None:
+        ogg = await _voice.encode(*speech)
+        timer.lap("encode")
+        await message.answer_voice(BufferedInputFile(ogg, filename="reply.ogg"))
+        timer.lap("upload")
+    _voice.record(timer)
+    logger.info("Chat %d: voice reply: %s", chat_id, timer)
+
 
-    chat_id = message.chat.id
-    agent = _get_agent(chat_id)
+async def _answer(chat_id: int, text: str, last: types.Message) -> str | None:
+    """Run one turn on the chat's agent and deliver the reply as text."""
+    assert _sessions is not None
+    try:
+        session = _sessions.open(str(chat_id))
+    except SessionLimitError as e:
+        logger.warning("Chat %d rejected: %s", chat_id, e)
+        await last.answer(SESSION_LIMIT)
+        return None
 
-    logger.info("Chat %d: %s", chat_id, message.text[:100])
-    response = await agent.respond(message.text)
+    try:
+        if _stream_replies:
+            # First tokens go out at once, the message is edited as the rest arrives
+            reply = StreamingReply(last.bot, chat_id, min_interval_s=_edit_interval_s)
+            response = await reply.stream(session.agent.respond_stream(text))
+        else:
+            response = await session.agent.respond(text)
+            # Telegram messages have a 4096 char limit; split if needed
+            for page in split_message(response):
+                await last.answer(page)
+    finally:
+        _sessions.release(session)
     logger.info("Chat %d: response %d chars", chat_id, len(response))
+    return response
 
-    # Telegram messages have a 4096 char limit; split if needed
-    for i in range(0, len(response), 4096):
-        await message.answer(response[i : i + 4096])
+
+async def _log_queue_stats(interval_s: float) -> None:
+    assert _queue is not None
+    reported = 0
+    while True:
+        await asyncio.sleep(interval_s)
+        stats = _queue.stats()
+        if stats["submitted"] == reported:
+            continue
+        reported = stats["submitted"]
+        logger.info(
+            "Chat queue: %d chats busy, %d queued, %d batches, %d dropped, "
+            "wait p50 %.0f ms / p95 %.0f ms / max %.0f ms",
+            stats["chats"], stats["queued"], stats["batches"], stats["dropped"],
+            stats["wait_ms_p50"], stats["wait_ms_p95"], stats["wait_ms_max"],
+        )
+        if _voice is not None and _voice.notes:
+            voice = _voice.stats()
+            logger.info(
+                "Voice notes: %d, mean %s",
+                voice.pop("notes"),
+                ", ".join(f"{key[:-3]} {ms:.0f}ms" for key, ms in voice.items()),
+            )
 
 
 async def run_bot(
@@ -103,17 +264,106 @@ async def run_bot(
     llm: LLMClient,
     person_name: str = "Daniel",
     max_chunks: int = 5,
+    max_history: int | None = None,
+    max_sessions: int = 1000,
+    idle_ttl_s: float = 600.0,
+    db_path: str | None = None,
+    flush_interval_s: float = 5.0,
+    retention_days: float = 90.0,
+    max_concurrency: int = 8,
+    max_backlog: int = 5,
+    coalesce_ms: float = 300.0,
+    stream_replies: bool = True,
+    edit_interval_s: float = 1.0,
+    stt_factory: Callable[[], STTClient] | None = None,
+    tts: TTSClient | None = None,
+    stt_workers: int = 2,
+    codec_workers: int = 2,
+    webhook_url: str | None = None,
+    webhook_host: str = "0.0.0.0",
+    webhook_port: int = 8443,
+    webhook_secret: str = "",
+    api_url: str | None = None,
+    drain_timeout_s: float = 10.0,
 ) -> None:
-    """Start the Telegram bot (blocks until stopped)."""
-    global _retriever, _llm, _person_name, _max_chunks  # noqa: PLW0603
+    """Start the Telegram bot (blocks until stopped).
+
+    At most ``max_sessions`` chats are held in memory, each dropped after
+    ``idle_ttl_s`` without messages. With ``db_path`` conversations are
+    saved there every ``flush_interval_s`` (and on eviction and shutdown),
+    reloaded when the chat writes again and kept for ``retention_days``.
+
+    Each chat is answered in order, ``max_concurrency`` chats at a time,
+    with up to ``max_backlog`` messages waiting per chat; messages sent
+    within ``coalesce_ms`` of each other are answered as one. With
+    ``stream_replies`` answers appear as they are generated, edited at
+    most every ``edit_interval_s``.
+
+    With ``stt_factory`` voice notes are transcribed (on up to
+    ``stt_workers`` clients) and answered, and with ``tts`` the spoken
+    part of the answer also comes back as a voice note.
+
+    Updates arrive by long polling, or with ``webhook_url`` through a
+    webhook served on ``webhook_host:webhook_port``. ``api_url`` points
+    the bot at another Bot API server (self-hosted, or a local stand-in).
+    On shutdown, answers already in progress get up to ``drain_timeout_s``
+    to finish (their last edits included) before they are cancelled.
+    """
+    global _retriever, _llm, _person_name, _max_chunks, _max_history, _sessions, _queue  # noqa: PLW0603
+    global _stream_replies, _edit_interval_s, _voice  # noqa: PLW0603
     _retriever = retriever
     _llm = llm
     _person_name = person_name
     _max_chunks = max_chunks
+    _max_history = max_history
+    _stream_replies = stream_replies
+    _edit_interval_s = edit_interval_s
+
+    store = SQLiteSessionStore(db_path) if db_path else None
+    if store is not None:
+        store.prune(retention_days * 86400)
+        logger.info("Telegram sessions: %d stored in %s", len(store), db_path)
+    _sessions = SessionManager(
+        agent_factory=_new_agent,
+        max_sessions=max_sessions,
+        idle_ttl_s=idle_ttl_s,
+        store=store,
+    )
+    if stt_factory is not None:
+        _voice = VoicePipeline(STTPool(stt_factory, size=stt_workers), tts=tts, codec_workers=codec_workers)
+    _queue = ChatQueue(
+        _process,
+        max_concurrency=max_concurrency,
+        max_backlog=max_backlog,
+        coalesce_ms=coalesce_ms,
+    )
 
-    bot = Bot(token=token)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_url)) if api_url else None
+    bot = Bot(token=token, session=session)
     dp = Dispatcher()
     dp.include_router(router)
 
     logger.info("Starting Telegram bot...")
-    await dp.start_polling(bot)
+    flusher = asyncio.create_task(_flush_sessions(flush_interval_s)) if store is not None else None
+    reporter = asyncio.create_task(_log_queue_stats(60.0))
+    try:
+        if webhook_url:
+            await serve_webhook(dp, bot, webhook_url, host=webhook_host, port=webhook_port, secret_token=webhook_secret)
+        else:
+            # Telegram refuses getUpdates while a webhook is registered
+            await bot.delete_webhook()
+            # The session stays open until the chats below have drained
+            await dp.start_polling(bot, close_bot_session=False)
+    finally:
+        reporter.cancel()
+        if flusher is not None:
+            flusher.cancel()
+        if not await _queue.join(drain_timeout_s):
+            logger.warning("Shutting down with %d chats still being answered", _queue.stats()["chats"])
+        await _queue.close()
+        if _voice is not None:
+            _voice.close()
+        if store is not None:
+            _sessions.flush()
+            store.close()
+        await bot.session.close()
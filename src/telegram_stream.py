@@ -0,0 +1,201 @@
+"""Progressive Telegram replies: send on the first tokens, then edit."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 4096
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Cut ``text`` into Telegram-sized pages, at a line break or space
+    when there is one. A page, once full, never changes as text is
+    appended, so a streamed reply can finalize it and move on."""
+    pages: list[str] = []
+    start = 0
+    while len(text) - start > limit:
+        window = text[start : start + limit + 1]
+        cut = max(window.rfind("\n"), window.rfind(" "))
+        if cut <= 0:
+            cut = limit
+        pages.append(text[start : start + cut])
+        start += cut
+        while start < len(text) and text[start] in " \n":
+            start += 1
+    pages.append(text[start:])
+    return pages
+
+
+class StreamingReply:
+    """One answer delivered while it is generated.
+
+    The first message is sent as soon as there is text (so the user waits
+    only for the LLM's first token), then edited with ``edit_message_text``
+    as more arrives. Telegram allows about one message per second per
+    chat, so edits are spaced at least ``min_interval_s`` apart; a
+    ``retry_after`` from Telegram doubles the spacing (up to
+    ``max_interval_s``) and successful edits bring it back down. Text past
+    the 4096-character limit continues in a new message, and ``finish()``
+    makes sure every message ends up with its final text: a final edit that
+    fails is retried up to ``final_retries`` times, then whatever the
+    messages are still missing is sent as a new message.
+
+    ``bot`` is an aiogram ``Bot`` (``send_message``/``edit_message_text``).
+    """
+
+    def __init__(
+        self,
+        bot,
+        chat_id: int,
+        min_interval_s: float = 1.0,
+        max_interval_s: float = 10.0,
+        limit: int = MESSAGE_LIMIT,
+        final_retries: int = 3,
+    ) -> None:
+        self.bot = bot
+        self.chat_id = chat_id
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.limit = limit
+        self.final_retries = final_retries
+        self.interval_s = min_interval_s
+        self._text = ""
+        self._sent: list[tuple[int, str]] = []  # (message_id, text shown)
+        self._next_call = 0.0
+        self._changed = asyncio.Event()
+        self._done = False
+        self._pump: asyncio.Task | None = None
+        self.sends = 0
+        self.edits = 0
+        self.throttled = 0
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    async def stream(self, tokens: AsyncIterator[str]) -> str:
+        """Deliver a whole token stream; returns the full text."""
+        try:
+            async with aclosing(tokens) as source:
+                async for token in source:
+                    self.feed(token)
+        finally:
+            await self.finish()
+        return self._text
+
+    def feed(self, token: str) -> None:
+        if not token:
+            return
+        self._text += token
+        self._changed.set()
+        if self._pump is None:
+            self._pump = asyncio.create_task(self._run())
+
+    async def finish(self) -> None:
+        """Wait until every message shows its final text."""
+        self._done = True
+        self._changed.set()
+        if self._pump is None and self._text.strip():
+            self._pump = asyncio.create_task(self._run())
+        if self._pump is not None:
+            await self._pump
+        logger.debug(
+            "Chat %d: reply of %d chars in %d messages, %d edits, %d throttled",
+            self.chat_id, len(self._text), self.sends, self.edits, self.throttled,
+        )
+
+    async def _run(self) -> None:
+        retries = 0
+        while True:
+            await self._changed.wait()
+            delay = self._next_call - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._changed.clear()
+            await self._sync()
+            if self._done and not self._changed.is_set():
+                if not self._stale() or retries >= self.final_retries:
+                    break
+                retries += 1
+                self._changed.set()
+        if self._stale():
+            await self._send_rest()
+
+    def _stale(self) -> list[tuple[int, str]]:
+        """Pages (index, final text) the messages do not show yet."""
+        return [
+            (index, page)
+            for index, page in enumerate(split_message(self._text, self.limit))
+            if page.strip() and (index >= len(self._sent) or self._sent[index][1] != page)
+        ]
+
+    async def _send_rest(self) -> None:
+        """Send what the messages are missing as new messages, so the user
+        still gets the whole answer when editing keeps failing."""
+        for index, page in self._stale():
+            shown = self._sent[index][1] if index < len(self._sent) else ""
+            rest = page[len(shown):].lstrip() if page.startswith(shown) else page
+            if rest.strip() and await self._call(self._send, rest) is None:
+                logger.warning("Chat %d: reply left incomplete", self.chat_id)
+                return
+
+    async def _sync(self) -> None:
+        """Bring the sent messages up to date with the text, oldest first."""
+        for index, page in enumerate(split_message(self._text, self.limit)):
+            if not page.strip():
+                continue
+            if index < len(self._sent):
+                message_id, shown = self._sent[index]
+                if page != shown and await self._call(self._edit, message_id, page):
+                    self._sent[index] = (message_id, page)
+            else:
+                message_id = await self._call(self._send, page)
+                if message_id is None:
+                    return
+                self._sent.append((message_id, page))
+
+    async def _send(self, text: str) -> int:
+        message = await self.bot.send_message(self.chat_id, text)
+        self.sends += 1
+        return message.message_id
+
+    async def _edit(self, message_id: int, text: str) -> bool:
+        try:
+            await self.bot.edit_message_text(text=text, chat_id=self.chat_id, message_id=message_id)
+        except TelegramBadRequest as e:
+            if "not modified" not in str(e):
+                raise
+        self.edits += 1
+        return True
+
+    async def _call(self, method, *args):
+        """One API call within the chat's rate; retried after ``retry_after``."""
+        while True:
+            delay = self._next_call - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                result = await method(*args)
+            except TelegramRetryAfter as e:
+                self.throttled += 1
+                self.interval_s = min(self.max_interval_s, self.interval_s * 2)
+                logger.info(
+                    "Chat %d: Telegram asks to wait %ss, edits now every %.1fs",
+                    self.chat_id, e.retry_after, self.interval_s,
+                )
+                self._next_call = time.monotonic() + e.retry_after
+                continue
+            except Exception as e:
+                logger.warning("Chat %d: could not update the reply: %s", self.chat_id, e)
+                self._next_call = time.monotonic() + self.interval_s
+                return None
+            self.interval_s = max(self.min_interval_s, self.interval_s * 0.9)
+            self._next_call = time.monotonic() + self.interval_s
+            return result
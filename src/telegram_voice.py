@@ -0,0 +1,139 @@
+"""Voice notes for the Telegram bot: OGG/Opus in, transcript, voice reply out."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.audio.decoder import Mp3StreamDecoder
+from src.audio.format import AudioFormat
+from src.audio.ogg import decode_audio_file, encode_ogg_opus
+from src.stt.pool import STTPool
+from src.tts.base import TTSClient
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("download", "decode", "stt", "answer", "tts", "encode", "upload")
+
+
+class StageTimer:
+    """Wall time per pipeline stage for one voice note."""
+
+    def __init__(self) -> None:
+        self.ms: dict[str, float] = {}
+        self._t = time.monotonic()
+
+    def lap(self, stage: str) -> None:
+        now = time.monotonic()
+        self.ms[stage] = (now - self._t) * 1000
+        self._t = now
+
+    def __str__(self) -> str:
+        return ", ".join(f"{stage} {ms:.0f}ms" for stage, ms in self.ms.items())
+
+
+class VoicePipeline:
+    """The audio half of answering a Telegram voice note.
+
+    Decoding the OGG/Opus note to 16 kHz PCM and encoding the reply back
+    to OGG/Opus run on a pool of ``codec_workers`` threads (FFmpeg works
+    outside the GIL), transcription on ``stt`` (an ``STTPool``), and at
+    most ``tts_concurrency`` replies are synthesized at once. Each stage
+    is bounded on its own, so chats overlap across stages: one note is
+    transcribed while another one's reply is encoded.
+
+    ``record(timer)`` accumulates per-stage timings for ``stats()``.
+    """
+
+    def __init__(
+        self,
+        stt: STTPool,
+        tts: TTSClient | None = None,
+        sample_rate: int = 16000,
+        codec_workers: int = 2,
+        tts_concurrency: int = 4,
+        max_reply_chars: int = 1000,
+    ) -> None:
+        self.stt = stt
+        self.tts = tts
+        self.sample_rate = sample_rate
+        self.max_reply_chars = max_reply_chars
+        self._codec = ThreadPoolExecutor(max_workers=codec_workers, thread_name_prefix="voice-codec")
+        self._tts_slots = asyncio.Semaphore(tts_concurrency)
+        self._totals: dict[str, float] = defaultdict(float)
+        self._counts: dict[str, int] = defaultdict(int)
+        self.notes = 0
+
+    async def decode(self, data: bytes) -> bytes:
+        """Voice note bytes -> PCM 16-bit mono at ``sample_rate``."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._codec, decode_audio_file, data, self.sample_rate)
+
+    async def transcribe(self, pcm: bytes) -> str:
+        return (await self.stt.transcribe(pcm, self.sample_rate)).strip()
+
+    async def synthesize(self, text: str) -> tuple[bytes, AudioFormat] | None:
+        """Speak ``text`` (cut to ``max_reply_chars`` at a sentence end)
+        as PCM; None without a TTS or when it produced nothing."""
+        if self.tts is None or not text.strip():
+            return None
+        text = _clip(text, self.max_reply_chars)
+        async with self._tts_slots:
+            audio = await self.tts.synthesize(text)
+        if not audio:
+            return None
+        audio_format = self.tts.audio_format
+        if not audio_format.is_pcm:
+            loop = asyncio.get_running_loop()
+            audio, rate = await loop.run_in_executor(self._codec, _decode_mp3, audio)
+            audio_format = AudioFormat(sample_rate=rate or audio_format.sample_rate)
+        return audio, audio_format
+
+    async def encode(self, pcm: bytes, audio_format: AudioFormat) -> bytes:
+        """PCM -> OGG/Opus voice note."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._codec, encode_ogg_opus, pcm, audio_format.sample_rate)
+
+    def record(self, timer: StageTimer) -> None:
+        self.notes += 1
+        for stage, ms in timer.ms.items():
+            self._totals[stage] += ms
+            self._counts[stage] += 1
+
+    def stats(self) -> dict[str, float]:
+        """Voice notes handled and mean milliseconds per stage."""
+        stats: dict[str, float] = {"notes": self.notes}
+        for stage in STAGES:
+            if self._counts[stage]:
+                stats[f"{stage}_ms"] = self._totals[stage] / self._counts[stage]
+        return stats
+
+    def close(self) -> None:
+        self._codec.shutdown(wait=False, cancel_futures=True)
+
+
+def duration_s(pcm: bytes, sample_rate: int) -> float:
+    return len(pcm) / 2 / sample_rate
+
+
+def _decode_mp3(data: bytes) -> tuple[bytes, int | None]:
+    decoder = Mp3StreamDecoder()
+    pcm = decoder.decode(data) + decoder.flush()
+    return pcm, decoder.sample_rate
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = max(text.rfind(mark, 0, limit) for mark in (". ", "! ", "? ", "\n"))
+    return text[: cut + 1] if cut > 0 else text[:limit]
+
+
+def is_silent(pcm: bytes, threshold: float = 1e-3) -> bool:
+    """True for empty or near-silent audio (nothing worth transcribing)."""
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    return not len(samples) or float(np.sqrt(np.mean(samples**2))) < threshold
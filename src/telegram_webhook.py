@@ -0,0 +1,90 @@
+"""Webhook delivery for the Telegram bot, served with FastAPI + uvicorn."""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+import secrets
+from urllib.parse import urlsplit
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+# Module level on purpose: FastAPI resolves the (string) endpoint
+# annotations against this module's globals
+from fastapi import FastAPI, Request, Response
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, secret_token: str, path: str = "/telegram/webhook") -> FastAPI:
+    """Receive updates at ``path`` and acknowledge each one at once.
+
+    Telegram waits for the response before it sends the chat's next
+    update, so the update is handed to the dispatcher in a task (whose
+    handlers only queue work for the chat's actor) and the 200 goes back
+    immediately. Requests without the ``secret_token`` header Telegram
+    was given are refused.
+    """
+    app = FastAPI(title="Telegram webhook")
+    pending: set[asyncio.Task] = set()
+    stats = {"received": 0, "refused": 0, "failed": 0}
+    app.state.stats = stats
+
+    def done(task: asyncio.Task) -> None:
+        pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            stats["failed"] += 1
+            logger.error("Update handling failed", exc_info=task.exception())
+
+    @app.post(path)
+    async def receive(request: Request):
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret_token):
+            stats["refused"] += 1
+            return Response(status_code=403)
+        try:
+            update = Update.model_validate_json(await request.body(), context={"bot": bot})
+        except ValidationError as e:
+            logger.warning("Malformed update: %s", e)
+            return Response(status_code=400)
+        stats["received"] += 1
+        task = asyncio.create_task(dp.feed_update(bot, update))
+        pending.add(task)
+        task.add_done_callback(done)
+        return Response(status_code=200)
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok", "in_flight": len(pending), **stats}
+
+    return app
+
+
+async def serve_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    url: str,
+    host: str = "0.0.0.0",
+    port: int = 8443,
+    secret_token: str = "",
+) -> None:
+    """Register ``url`` with Telegram and serve it until stopped.
+
+    ``url`` is the public HTTPS address (TLS is usually terminated by a
+    reverse proxy in front of ``host:port``); its path is the route
+    served here. Without a ``secret_token`` a random one is used.
+    """
+    import uvicorn
+
+    secret_token = secret_token or secrets.token_urlsafe(32)
+    app = create_webhook_app(dp, bot, secret_token, path=urlsplit(url).path or "/")
+    await bot.set_webhook(
+        url,
+        secret_token=secret_token,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info("Telegram webhook registered: %s (listening on %s:%d)", url, host, port)
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    await server.serve()
@@ -1,4 +1,11 @@
 from src.transport.base import TransportAdapter
 from src.transport.local import LocalAudioTransport
+from src.transport.replay import FileReplayTransport
+from src.transport.websocket import WebSocketAudioTransport
 
-__all__ = ["TransportAdapter", "LocalAudioTransport"]
+__all__ = [
+    "TransportAdapter",
+    "LocalAudioTransport",
+    "FileReplayTransport",
+    "WebSocketAudioTransport",
+]
@@ -4,16 +4,25 @@ from abc import ABC, abstractmethod
 from collections.abc import AsyncIterator
 from typing import Callable
 
+from src.audio.format import AudioFormat
+
 
 class TransportAdapter(ABC):
     """Abstract transport layer for audio I/O.
 
     Implementations provide audio input/output for different environments:
     - LocalAudioTransport: mic + speakers via sounddevice
+    - FileReplayTransport: audio files in, replies to files (headless)
+    - WebSocketAudioTransport: browser mic/speakers over a WebSocket
     - DailyTransport: Daily.co video calls (stub)
     - LiveKitTransport: LiveKit rooms (stub)
+
+    ``interruptions`` counts the times ``stop_playback`` cut playback
+    short, so the loop can tell a barge-in from playback that failed.
     """
 
+    interruptions: int = 0
+
     @abstractmethod
     async def start(self) -> None:
         """Initialize and start the transport."""
@@ -30,18 +39,27 @@ class TransportAdapter(ABC):
         ...
 
     @abstractmethod
-    async def write_audio(self, data: bytes) -> None:
-        """Send audio data to the output (speakers/call)."""
+    async def write_audio(
+        self, data: bytes, audio_format: AudioFormat | None = None
+    ) -> None:
+        """Send audio data to the output (speakers/call).
+
+        ``audio_format`` describes ``data``; None means PCM 16-bit mono at
+        the transport's output rate. PCM is sent without decoding.
+        """
         ...
 
     @abstractmethod
-    async def write_audio_stream(self, audio_iter: AsyncIterator[bytes]) -> None:
-        """Stream audio data to the output."""
+    async def write_audio_stream(
+        self, audio_iter: AsyncIterator[bytes], audio_format: AudioFormat | None = None
+    ) -> None:
+        """Stream audio data (in ``audio_format``) to the output."""
         ...
 
     @abstractmethod
     def stop_playback(self) -> None:
-        """Interrupt current audio output (barge-in)."""
+        """Interrupt current audio output (barge-in); counted in
+        ``interruptions`` when something was playing."""
         ...
 
     @abstractmethod
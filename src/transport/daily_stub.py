@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from collections.abc import AsyncIterator
 
+from src.audio.format import AudioFormat
 from src.transport.base import TransportAdapter
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,8 @@ class DailyTransport(TransportAdapter):
     - Receive participant audio via on_audio_data callback
     - Send audio via send_audio() or send_app_message()
     - Handle participant join/leave events
+    - Call audio is 48 kHz: convert with ``src.audio.resample.Resampler``
+      (48k -> 16k for VAD/STT, TTS rate -> 48k for output)
     """
 
     def __init__(self, room_url: str = "", token: str = "") -> None:
@@ -39,10 +42,14 @@ class DailyTransport(TransportAdapter):
         raise NotImplementedError
         yield b""  # type: ignore[misc]  # make it a generator
 
-    async def write_audio(self, data: bytes) -> None:
+    async def write_audio(
+        self, data: bytes, audio_format: AudioFormat | None = None
+    ) -> None:
         raise NotImplementedError
 
-    async def write_audio_stream(self, audio_iter: AsyncIterator[bytes]) -> None:
+    async def write_audio_stream(
+        self, audio_iter: AsyncIterator[bytes], audio_format: AudioFormat | None = None
+    ) -> None:
         raise NotImplementedError
 
     def stop_playback(self) -> None:
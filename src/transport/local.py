@@ -3,6 +3,8 @@ from __future__ import annotations
 import logging
 from collections.abc import AsyncIterator
 
+from src.audio.echo import EchoCanceller
+from src.audio.format import AudioFormat
 from src.audio.player import AudioPlayer
 from src.audio.recorder import AudioRecorder
 from src.transport.base import TransportAdapter
@@ -11,14 +13,40 @@ logger = logging.getLogger(__name__)
 
 
 class LocalAudioTransport(TransportAdapter):
-    """Local mic + speakers transport using sounddevice."""
+    """Local mic + speakers transport using sounddevice.
 
-    def __init__(self, sample_rate: int = 16000, frame_duration_ms: int = 30) -> None:
+    With ``echo_cancel`` the mic frames are cleaned of the agent's own
+    playback before anyone (the VAD) sees them, so open speakers don't
+    trigger barge-in.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 30,
+        output_sample_rate: int = 24000,
+        jitter_ms: int = 60,
+        capture_sample_rate: int | None = None,
+        echo_cancel: bool = False,
+        echo_filter_ms: int = 200,
+    ) -> None:
         self.recorder = AudioRecorder(
             sample_rate=sample_rate,
             frame_duration_ms=frame_duration_ms,
+            device_sample_rate=capture_sample_rate,
         )
-        self.player = AudioPlayer(sample_rate=24000)  # ElevenLabs outputs 24kHz
+        self.player = AudioPlayer(sample_rate=output_sample_rate, jitter_ms=jitter_ms)
+        self.echo: EchoCanceller | None = None
+        if echo_cancel:
+            self.echo = EchoCanceller(
+                sample_rate=sample_rate,
+                frame_duration_ms=frame_duration_ms,
+                reference_rate=output_sample_rate,
+                filter_ms=echo_filter_ms,
+            )
+            reference = self.echo.reference
+            self.player.echo_reference = reference
+            self.recorder.reference_clock = lambda: reference.written
 
     async def start(self) -> None:
         await self.recorder.start()
@@ -26,19 +54,36 @@ class LocalAudioTransport(TransportAdapter):
 
     async def stop(self) -> None:
         await self.recorder.stop()
+        self.player.close()
+        if self.echo is not None:
+            stats = self.echo.stats()
+            logger.info(
+                "Echo canceller: ERLE %.1f dB, %.0fus/frame, %d resyncs",
+                stats["erle_db"],
+                stats["mean_cost_us"],
+                stats["resyncs"],
+            )
         logger.info("Local audio transport stopped")
 
     async def read_audio_frames(self) -> AsyncIterator[bytes]:
         async for frame in self.recorder.read_frames():
+            if self.echo is not None:
+                frame = self.echo.process(frame, self.recorder.frame_mark)
             yield frame
 
-    async def write_audio(self, data: bytes) -> None:
-        await self.player.play_bytes(data)
+    async def write_audio(
+        self, data: bytes, audio_format: AudioFormat | None = None
+    ) -> None:
+        await self.player.play_bytes(data, audio_format)
 
-    async def write_audio_stream(self, audio_iter: AsyncIterator[bytes]) -> None:
-        await self.player.play_stream(audio_iter)
+    async def write_audio_stream(
+        self, audio_iter: AsyncIterator[bytes], audio_format: AudioFormat | None = None
+    ) -> None:
+        await self.player.play_stream(audio_iter, audio_format)
 
     def stop_playback(self) -> None:
+        if self.player.is_playing:
+            self.interruptions += 1
         self.player.stop()
 
     def is_playing(self) -> bool:
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import wave
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
+from pathlib import Path
+
+import numpy as np
+
+from src.audio.decoder import to_pcm
+from src.audio.format import AudioFormat
+from src.audio.resample import resample_pcm16
+from src.transport.base import TransportAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def load_pcm(path: Path, sample_rate: int, raw_sample_rate: int | None = None) -> bytes:
+    """Read a WAV (any rate, mono or stereo) or raw PCM 16-bit mono file
+    as 16-bit mono PCM at ``sample_rate``."""
+    if path.suffix.lower() == ".wav":
+        with wave.open(str(path), "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16-bit PCM, got {8 * wf.getsampwidth()}-bit")
+            rate, channels = wf.getframerate(), wf.getnchannels()
+            pcm = wf.readframes(wf.getnframes())
+        if channels > 1:
+            samples = np.frombuffer(pcm, dtype="<i2").reshape(-1, channels)
+            pcm = samples.mean(axis=1).astype("<i2").tobytes()
+    else:
+        rate = raw_sample_rate or sample_rate
+        pcm = path.read_bytes()
+        pcm = pcm[: len(pcm) - len(pcm) % 2]
+    return resample_pcm16(pcm, rate, sample_rate)
+
+
+class FileReplayTransport(TransportAdapter):
+    """Headless transport: candidate audio from files, agent audio to files.
+
+    Input files (WAV, or raw PCM 16-bit mono at ``raw_sample_rate``) are
+    played into the loop one after another as frames, separated by
+    ``gap_ms`` of silence and followed by ``tail_ms`` so the VAD can close
+    the last utterance; then the input ends and ``VoiceLoop`` stops.
+    Frames are paced by the wall clock at ``speed`` x real time, so work
+    the loop does between utterances lets input pile up exactly like a
+    live mic would; ``speed=0`` replays as fast as the loop consumes.
+
+    Every reply is written to ``output_dir`` as ``reply_NNN.wav`` and
+    listed in ``replies.json`` with timestamps on the input timeline
+    (seconds of candidate audio since start). Playback also takes
+    duration / ``speed`` of wall time, so ``is_playing`` and barge-in
+    behave as with speakers.
+    """
+
+    def __init__(
+        self,
+        inputs: list[Path],
+        output_dir: Path | None = None,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 30,
+        speed: float = 1.0,
+        raw_sample_rate: int | None = None,
+        gap_ms: int = 1000,
+        tail_ms: int = 1500,
+    ) -> None:
+        self.inputs = [Path(p) for p in inputs]
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_duration_ms // 1000
+        self.speed = speed
+        self.raw_sample_rate = raw_sample_rate
+        self.gap_ms = gap_ms
+        self.tail_ms = tail_ms
+        self.replies: list[dict[str, object]] = []
+        self.frames_read = 0
+        self._frames: Iterator[bytes] | None = None
+        self._started = 0.0
+        self._playing = False
+        self._stop_event = asyncio.Event()
+
+    @property
+    def position_s(self) -> float:
+        """Current point on the input timeline, in seconds."""
+        if self.speed > 0 and self._started:
+            return (time.monotonic() - self._started) * self.speed
+        return self.frames_read * self.frame_size / self.sample_rate
+
+    async def start(self) -> None:
+        if self.output_dir is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._frames = self._iter_frames()
+        self._started = time.monotonic()
+        logger.info(
+            "Replay transport started: %d file(s) at %s",
+            len(self.inputs),
+            f"{self.speed:g}x" if self.speed > 0 else "max speed",
+        )
+
+    async def stop(self) -> None:
+        if self.output_dir is not None:
+            manifest = self.output_dir / "replies.json"
+            manifest.write_text(json.dumps(self.replies, indent=2))
+        wall = time.monotonic() - self._started if self._started else 0.0
+        audio_s = self.frames_read * self.frame_size / self.sample_rate
+        logger.info(
+            "Replay transport stopped: %.1fs of input in %.1fs (%.1fx real time), %d replies",
+            audio_s,
+            wall,
+            audio_s / wall if wall else 0.0,
+            len(self.replies),
+        )
+
+    async def read_audio_frames(self) -> AsyncIterator[bytes]:
+        if self._frames is None:
+            raise RuntimeError("FileReplayTransport.start() was not called")
+        frame_s = self.frame_size / self.sample_rate
+        for frame in self._frames:
+            self.frames_read += 1
+            if self.speed > 0:
+                due = self._started + self.frames_read * frame_s / self.speed
+                delay = due - time.monotonic()
+                # Overdue frames (the loop was busy) come out back to back
+                await asyncio.sleep(max(delay, 0))
+            else:
+                await asyncio.sleep(0)
+            yield frame
+
+    async def write_audio(
+        self, data: bytes, audio_format: AudioFormat | None = None
+    ) -> None:
+        async def once() -> AsyncIterator[bytes]:
+            yield data
+
+        await self.write_audio_stream(once(), audio_format)
+
+    async def write_audio_stream(
+        self, audio_iter: AsyncIterator[bytes], audio_format: AudioFormat | None = None
+    ) -> None:
+        audio_format = audio_format or AudioFormat()
+        # What to_pcm yields: MP3 is decoded to mono PCM
+        pcm_format = AudioFormat(
+            sample_rate=audio_format.sample_rate,
+            channels=audio_format.channels if audio_format.is_pcm else 1,
+        )
+        self._stop_event.clear()
+        self._playing = True
+        started_s = self.position_s
+        first_audio_s: float | None = None
+        play_started = 0.0
+        chunks: list[bytes] = []
+        played = 0
+        interrupted = False
+        try:
+            async with aclosing(audio_iter) as source:
+                async for chunk in to_pcm(source, audio_format):
+                    if self._stop_event.is_set():
+                        interrupted = True
+                        break
+                    if first_audio_s is None:
+                        first_audio_s = self.position_s
+                        play_started = time.monotonic()
+                    chunks.append(chunk)
+                    played += len(chunk)
+                    await self._pace(play_started, played, pcm_format)
+            if not interrupted:
+                interrupted = await self._pace(play_started, played, pcm_format, drain=True)
+        finally:
+            self._playing = False
+            self._record(chunks, pcm_format, started_s, first_audio_s, interrupted)
+
+    def stop_playback(self) -> None:
+        if self._playing:
+            self.interruptions += 1
+            self._stop_event.set()
+            logger.debug("Replay playback interrupted (barge-in)")
+
+    def is_playing(self) -> bool:
+        return self._playing
+
+    def _iter_frames(self) -> Iterator[bytes]:
+        frame_bytes = self.frame_size * 2
+        gap = bytes(self.sample_rate * self.gap_ms // 1000 * 2)
+        pcm = b""
+        for i, path in enumerate(self.inputs):
+            pcm += load_pcm(path, self.sample_rate, self.raw_sample_rate)
+            pcm += gap if i < len(self.inputs) - 1 else bytes(self.sample_rate * self.tail_ms // 1000 * 2)
+            usable = len(pcm) - len(pcm) % frame_bytes
+            for start in range(0, usable, frame_bytes):
+                yield pcm[start:start + frame_bytes]
+            pcm = pcm[usable:]
+        if pcm:
+            yield pcm + bytes(frame_bytes - len(pcm))
+
+    async def _pace(
+        self, play_started: float, played: int, audio_format: AudioFormat, drain: bool = False
+    ) -> bool:
+        """Let audio "play" in real time (scaled by ``speed``): returns
+        True if playback was interrupted meanwhile.
+
+        While streaming, stays at most ~100 ms ahead of the device clock,
+        like a jitter buffer; ``drain`` waits for everything to be heard.
+        """
+        if self.speed <= 0 or not played:
+            return self._stop_event.is_set()
+        ahead = 0.0 if drain else 0.1
+        heard_at = play_started + played / audio_format.bytes_per_second / self.speed
+        delay = heard_at - ahead - time.monotonic()
+        if delay <= 0:
+            return self._stop_event.is_set()
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _record(
+        self,
+        chunks: list[bytes],
+        audio_format: AudioFormat,
+        started_s: float,
+        first_audio_s: float | None,
+        interrupted: bool,
+    ) -> None:
+        pcm = b"".join(chunks)
+        reply: dict[str, object] = {
+            "index": len(self.replies),
+            "started_s": round(started_s, 3),
+            "first_audio_s": round(first_audio_s, 3) if first_audio_s is not None else None,
+            "ended_s": round(self.position_s, 3),
+            "duration_s": round(len(pcm) / audio_format.bytes_per_second, 3),
+            "interrupted": interrupted,
+        }
+        if self.output_dir is not None and pcm:
+            name = f"reply_{len(self.replies):03d}.wav"
+            with wave.open(str(self.output_dir / name), "wb") as wf:
+                wf.setnchannels(audio_format.channels)
+                wf.setsampwidth(2)
+                wf.setframerate(audio_format.sample_rate)
+                wf.writeframes(pcm)
+            reply["file"] = name
+        self.replies.append(reply)
+        logger.debug("Reply %d recorded: %s", reply["index"], reply)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+import numpy as np
+
+from src.audio.decoder import to_pcm
+from src.audio.format import AudioFormat
+from src.audio.resample import Resampler
+from src.transport.base import TransportAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class WebSocketAudioTransport(TransportAdapter):
+    """Browser mic + speakers over one WebSocket connection.
+
+    ``ws`` is a Starlette/FastAPI ``WebSocket`` (anything with
+    ``receive()``, ``send_bytes()`` and ``send_text()``), already accepted.
+
+    Client -> server:
+      binary   PCM 16-bit mono at ``sample_rate``, any slice size (the
+               browser typically sends 20-30 ms); re-cut into VAD frames
+      text     JSON control: ``{"type": "interrupt"}`` stops playback
+               (client-side barge-in)
+
+    Server -> client:
+      text     ``{"type": "audio_start", "sample_rate": ..., "encoding":
+               "pcm_s16le"}`` before a reply, ``{"type": "audio_end"}``
+               after it, ``{"type": "clear"}`` on barge-in: drop whatever
+               is still queued for playback
+      binary   reply audio, PCM 16-bit mono at ``output_sample_rate``
+
+    Backpressure, per connection: at most ``max_input_ms`` of mic audio
+    waits for the loop (older frames are dropped and counted, so a stalled
+    loop hears the present, not a growing backlog), and reply audio is
+    sent at most ``ahead_ms`` ahead of real time, so a barge-in has
+    little to flush on the client and ``is_playing`` follows what the
+    user actually hears.
+    """
+
+    def __init__(
+        self,
+        ws,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 30,
+        output_sample_rate: int = 24000,
+        max_input_ms: int = 2000,
+        ahead_ms: int = 300,
+    ) -> None:
+        self.ws = ws
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * frame_duration_ms // 1000 * 2
+        self.output_sample_rate = output_sample_rate
+        self.ahead_ms = ahead_ms
+        self._frames: asyncio.Queue[bytes | None] = asyncio.Queue(
+            maxsize=max(1, max_input_ms // frame_duration_ms)
+        )
+        self._pending = b""
+        self._reader: asyncio.Task | None = None
+        self._input_ended = False
+        self._closed = False
+        self._playing = False
+        self._stop_event = asyncio.Event()
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+
+    async def start(self) -> None:
+        self._reader = asyncio.create_task(self._read_loop())
+        logger.info("WebSocket audio transport started")
+
+    async def stop(self) -> None:
+        self._closed = True
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        logger.info(
+            "WebSocket audio transport stopped: %d frames in, %d dropped, %d bytes out",
+            self.frames_received,
+            self.frames_dropped,
+            self.bytes_sent,
+        )
+
+    async def read_audio_frames(self) -> AsyncIterator[bytes]:
+        while not self._input_ended:
+            frame = await self._frames.get()
+            if frame is None:
+                # Client went away: end this and every later read
+                self._input_ended = True
+                return
+            yield frame
+
+    async def write_audio(
+        self, data: bytes, audio_format: AudioFormat | None = None
+    ) -> None:
+        async def once() -> AsyncIterator[bytes]:
+            yield data
+
+        await self.write_audio_stream(once(), audio_format)
+
+    async def write_audio_stream(
+        self, audio_iter: AsyncIterator[bytes], audio_format: AudioFormat | None = None
+    ) -> None:
+        audio_format = audio_format or AudioFormat(sample_rate=self.output_sample_rate)
+        resampler = Resampler(audio_format.sample_rate, self.output_sample_rate)
+        bytes_per_second = self.output_sample_rate * 2
+        self._stop_event.clear()
+        self._playing = True
+        interrupted = False
+        started = 0.0
+        sent = 0
+        try:
+            await self._send_json(
+                {"type": "audio_start", "sample_rate": self.output_sample_rate, "encoding": "pcm_s16le"}
+            )
+            async with aclosing(audio_iter) as source:
+                async for chunk in to_pcm(source, audio_format):
+                    if self._stop_event.is_set() or self._closed:
+                        interrupted = True
+                        break
+                    samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+                    pcm = _to_pcm16(resampler.process(samples))
+                    if not pcm:
+                        continue
+                    if not sent:
+                        started = time.monotonic()
+                    await self._send_bytes(pcm)
+                    sent += len(pcm)
+                    interrupted = await self._pace(started, sent / bytes_per_second)
+                    if interrupted:
+                        break
+                else:
+                    tail = _to_pcm16(resampler.flush())
+                    if tail:
+                        await self._send_bytes(tail)
+                        sent += len(tail)
+            if interrupted:
+                await self._send_json({"type": "clear"})
+            else:
+                await self._send_json({"type": "audio_end"})
+                # Playing until the client has had time to play it all
+                if sent and await self._pace(started, sent / bytes_per_second, drain=True):
+                    await self._send_json({"type": "clear"})
+        finally:
+            self._playing = False
+
+    def stop_playback(self) -> None:
+        if self._playing:
+            self.interruptions += 1
+            self._stop_event.set()
+            logger.debug("WebSocket playback interrupted (barge-in)")
+
+    def is_playing(self) -> bool:
+        return self._playing
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                message = await self.ws.receive()
+                if message.get("type") == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    self._on_audio(message["bytes"])
+                elif message.get("text"):
+                    self._on_control(message["text"])
+        except Exception as exc:
+            logger.info("WebSocket audio input closed: %s", exc)
+        finally:
+            self._closed = True
+            self.stop_playback()
+            self._put(None)
+
+    def _on_audio(self, data: bytes) -> None:
+        self._pending += data
+        while len(self._pending) >= self.frame_bytes:
+            frame, self._pending = self._pending[: self.frame_bytes], self._pending[self.frame_bytes:]
+            self.frames_received += 1
+            self._put(frame)
+
+    def _put(self, frame: bytes | None) -> None:
+        if self._frames.full():
+            # The loop isn't keeping up: drop the oldest audio, keep the newest
+            self._frames.get_nowait()
+            self.frames_dropped += 1
+        self._frames.put_nowait(frame)
+
+    def _on_control(self, text: str) -> None:
+        try:
+            message = json.loads(text)
+        except ValueError:
+            logger.warning("Ignoring malformed control message: %.80s", text)
+            return
+        kind = message.get("type") if isinstance(message, dict) else None
+        if kind == "interrupt":
+            logger.info("Client barge-in, stopping playback")
+            self.stop_playback()
+        else:
+            logger.debug("Ignoring control message %r", kind)
+
+    async def _pace(self, started: float, audio_s: float, drain: bool = False) -> bool:
+        """Wait until at most ``ahead_ms`` (or, draining, nothing) of the
+        sent audio is still unplayed; True if interrupted meanwhile."""
+        ahead = 0.0 if drain else self.ahead_ms / 1000
+        delay = started + audio_s - ahead - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        return self._stop_event.is_set() or self._closed
+
+    async def _send_bytes(self, data: bytes) -> None:
+        if self._closed:
+            return
+        try:
+            await self.ws.send_bytes(data)
+            self.bytes_sent += len(data)
+        except Exception as exc:
+            logger.info("WebSocket audio output closed: %s", exc)
+            self._closed = True
+
+    async def _send_json(self, message: dict) -> None:
+        if self._closed:
+            return
+        try:
+            await self.ws.send_text(json.dumps(message))
+        except Exception as exc:
+            logger.info("WebSocket audio output closed: %s", exc)
+            self._closed = True
+
+
+def _to_pcm16(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1.0, 32767 / 32768) * 32768.0).astype("<i2").tobytes()
@@ -3,13 +3,21 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from collections.abc import AsyncIterator
 
+from src.audio.format import AudioFormat
+
 
 class TTSClient(ABC):
-    """Abstract base for text-to-speech providers."""
+    """Abstract base for text-to-speech providers.
+
+    ``audio_format`` declares what the produced bytes are, so transports
+    can pass PCM straight through and only decode when they must.
+    """
+
+    audio_format: AudioFormat = AudioFormat()
 
     @abstractmethod
     async def synthesize(self, text: str) -> bytes:
-        """Convert text to audio bytes (PCM 16-bit, 24kHz, mono)."""
+        """Convert text to audio bytes in ``self.audio_format``."""
         ...
 
     @abstractmethod
@@ -18,3 +26,30 @@ class TTSClient(ABC):
     ) -> AsyncIterator[bytes]:
         """Convert streaming text tokens to streaming audio chunks."""
         ...
+
+    async def synthesize_segment(self, text: str) -> AsyncIterator[bytes]:
+        """Stream audio for one already-segmented piece of text.
+
+        Wrappers that segment text themselves (``CachedTTS``) call this so
+        the provider doesn't segment and pipeline a second time. Default:
+        ``synthesize_stream`` over the single segment.
+        """
+        async def once() -> AsyncIterator[str]:
+            yield text
+
+        async for chunk in self.synthesize_stream(once()):
+            yield chunk
+
+    def voice_params(self) -> dict[str, object]:
+        """Parameters that, together with the text, determine the audio.
+
+        Used as part of the cache key, so anything affecting the output
+        (voice, model, settings, format) must be included.
+        """
+        return {"provider": type(self).__name__}
+
+    async def warmup(self) -> None:
+        """Open provider connections ahead of first use. Default: no-op."""
+
+    async def aclose(self) -> None:
+        """Release provider connections. Default: no-op."""
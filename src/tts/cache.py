@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from pathlib import Path
+from typing import BinaryIO
+
+from src.audio.format import AudioFormat
+from src.tts.base import TTSClient
+from src.tts.pipeline import SentencePipeline
+from src.tts.segmenter import segment_text
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK = 4096
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a phrase for cache lookup (NFC, collapsed whitespace)."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(voice_params: dict[str, object], text: str) -> str:
+    """Content address of the audio for ``text`` spoken with ``voice_params``."""
+    payload = json.dumps(
+        {"voice": voice_params, "text": normalize_text(text)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Size-bounded on-disk audio store with LRU eviction.
+
+    Entries live at ``<dir>/<key[:2]>/<key>``. Recency is tracked in memory
+    and mirrored to file mtimes, so LRU order survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = [
+            (p.stat().st_mtime, p.name, p.stat().st_size)
+            for p in self.directory.glob("??/*")
+            if p.is_file() and not p.name.endswith(".tmp")
+        ]
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+        logger.info(
+            "TTS cache: %d entries, %.1f MB in %s",
+            len(self._entries), self.total_bytes / 1e6, self.directory,
+        )
+        self._evict()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as most recently used."""
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str) -> bytes | None:
+        if key not in self._entries:
+            return None
+        try:
+            data = self.path(key).read_bytes()
+        except OSError:
+            self._forget(key)
+            return None
+        self.touch(key)
+        return data
+
+    def open(self, key: str) -> BinaryIO | None:
+        """Open an entry for reading; None if absent.
+
+        Opening before reading closes the race with a concurrent writer's
+        eviction: an entry unlinked after the lookup is a miss, and one
+        unlinked after opening stays readable.
+        """
+        if key not in self._entries:
+            return None
+        try:
+            f = open(self.path(key), "rb")
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        self.touch(key)
+        return f
+
+    @staticmethod
+    async def read_stream(f: BinaryIO) -> AsyncIterator[bytes]:
+        """Stream an entry opened with ``open()`` in small chunks, then close it."""
+        with f:
+            while chunk := await asyncio.to_thread(f.read, _READ_CHUNK):
+                yield chunk
+
+    def put(self, key: str, data: bytes) -> None:
+        writer = self.writer(key)
+        writer.write(data)
+        writer.commit()
+
+    def writer(self, key: str) -> "_CacheWriter":
+        return _CacheWriter(self, key)
+
+    def _commit(self, key: str, tmp_path: Path, size: int) -> None:
+        os.replace(tmp_path, self.path(key))
+        if key in self._entries:
+            self.total_bytes -= self._entries[key]
+        self._entries[key] = size
+        self._entries.move_to_end(key)
+        self.total_bytes += size
+        self._evict()
+
+    def _forget(self, key: str) -> None:
+        size = self._entries.pop(key, 0)
+        self.total_bytes -= size
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, _ = next(iter(self._entries.items()))
+            self._forget(key)
+            self.evictions += 1
+            try:
+                self.path(key).unlink()
+            except OSError:
+                pass
+
+
+class _CacheWriter:
+    """Writes one entry to a temp file; only visible after ``commit()``.
+
+    The file is created on the first ``write()``; ``write()`` and
+    ``close()`` do blocking I/O, so async callers run them in a thread.
+    """
+
+    def __init__(self, cache: AudioCache, key: str) -> None:
+        self._cache = cache
+        self._key = key
+        self._tmp_path = cache.path(key).with_name(f"{key}.{os.getpid()}.{id(self)}.tmp")
+        self._file: BinaryIO | None = None
+        self._size = 0
+
+    def write(self, data: bytes) -> None:
+        if self._file is None:
+            self._tmp_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._tmp_path, "wb")
+        self._file.write(data)
+        self._size += len(data)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def commit(self) -> None:
+        self.close()
+        if self._size == 0:
+            # Provider produced nothing (error was logged upstream)
+            self.abort()
+            return
+        self._cache._commit(self._key, self._tmp_path, self._size)
+
+    def abort(self) -> None:
+        self.close()
+        try:
+            self._tmp_path.unlink()
+        except OSError:
+            pass
+
+
+class CachedTTS(TTSClient):
+    """Caching wrapper around any ``TTSClient``.
+
+    Text is split into segments (see ``segment_text``); each one is looked up by
+    (voice params, normalized text). Hits stream straight from disk,
+    misses are synthesized by the wrapped client and written through.
+    Sentences are pipelined with the same look-ahead as ``ElevenLabsTTS``.
+    """
+
+    def __init__(self, inner: TTSClient, cache: AudioCache, lookahead: int = 2) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.lookahead = lookahead
+        self.hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self.bytes_from_provider = 0
+        self._first_audio_ms: dict[str, list[float]] = {"hit": [], "miss": []}
+
+    @property
+    def audio_format(self) -> AudioFormat:  # type: ignore[override]
+        return self.inner.audio_format
+
+    def voice_params(self) -> dict[str, object]:
+        return self.inner.voice_params()
+
+    async def synthesize(self, text: str) -> bytes:
+        key = cache_key(self.inner.voice_params(), text)
+        data = self.cache.get(key)
+        if data is not None:
+            self.hits += 1
+            self.bytes_from_cache += len(data)
+            return data
+        self.misses += 1
+        data = await self.inner.synthesize(text)
+        if data:
+            self.cache.put(key, data)
+            self.bytes_from_provider += len(data)
+        return data
+
+    async def synthesize_stream(
+        self, text_iter: AsyncIterator[str]
+    ) -> AsyncIterator[bytes]:
+        pipeline = SentencePipeline(self._synthesize_sentence, lookahead=self.lookahead)
+        async with aclosing(pipeline.stream(segment_text(text_iter))) as audio:
+            async for chunk in audio:
+                yield chunk
+
+    async def _synthesize_sentence(self, text: str) -> AsyncIterator[bytes]:
+        key = cache_key(self.inner.voice_params(), text)
+        t_start = time.monotonic()
+        first = True
+
+        cached = self.cache.open(key)
+        if cached is not None:
+            self.hits += 1
+            logger.debug("TTS cache hit: %s", text[:50])
+            async for chunk in self.cache.read_stream(cached):
+                if first:
+                    self._record_first_audio("hit", t_start)
+                    first = False
+                self.bytes_from_cache += len(chunk)
+                yield chunk
+            return
+
+        self.misses += 1
+
+        writer = None
+        completed = False
+        try:
+            writer = self.cache.writer(key)
+            async with aclosing(self.inner.synthesize_segment(text)) as audio:
+                async for chunk in audio:
+                    if not chunk:
+                        continue
+                    if first:
+                        self._record_first_audio("miss", t_start)
+                        first = False
+                    await asyncio.to_thread(writer.write, chunk)
+                    self.bytes_from_provider += len(chunk)
+                    yield chunk
+            await asyncio.to_thread(writer.close)
+            completed = True
+        except Exception:
+            # Skip the rest of the sentence, as the provider itself would
+            logger.exception("TTS failed for: %s", text[:50])
+        finally:
+            # Never cache audio that was cut short (barge-in, errors)
+            if writer is not None:
+                if completed:
+                    writer.commit()
+                else:
+                    writer.abort()
+
+    def _record_first_audio(self, kind: str, t_start: float) -> None:
+        samples = self._first_audio_ms[kind]
+        samples.append((time.monotonic() - t_start) * 1000)
+        if len(samples) > 1000:
+            del samples[:500]
+
+    def stats(self) -> dict[str, float]:
+        """Hit-rate, byte and time-to-first-audio metrics."""
+        lookups = self.hits + self.misses
+
+        def avg(values: list[float]) -> float:
+            return sum(values) / len(values) if values else 0.0
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_from_cache": self.bytes_from_cache,
+            "bytes_from_provider": self.bytes_from_provider,
+            "entries": len(self.cache),
+            "cache_bytes": self.cache.total_bytes,
+            "evictions": self.cache.evictions,
+            "first_audio_ms_hit": avg(self._first_audio_ms["hit"]),
+            "first_audio_ms_miss": avg(self._first_audio_ms["miss"]),
+        }
+
+    async def warmup(self) -> None:
+        await self.inner.warmup()
+
+    async def aclose(self) -> None:
+        stats = self.stats()
+        logger.info(
+            "TTS cache: %d hits / %d misses (%.0f%% hit rate)",
+            stats["hits"], stats["misses"], stats["hit_rate"] * 100,
+        )
+        await self.inner.aclose()
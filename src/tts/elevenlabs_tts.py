@@ -2,16 +2,26 @@ from __future__ import annotations
 
 import logging
 from collections.abc import AsyncIterator
+from contextlib import aclosing
 
 import httpx
 
+from src.audio.format import AudioFormat
 from src.tts.base import TTSClient
+from src.tts.pipeline import SentencePipeline
+from src.tts.segmenter import segment_text
 
 logger = logging.getLogger(__name__)
 
 # ElevenLabs streaming TTS endpoint
-_TTS_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
-_TTS_URL_NON_STREAM = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+_API_URL = "https://api.elevenlabs.io/v1"
+_TTS_URL = _API_URL + "/text-to-speech/{voice_id}/stream"
+_TTS_URL_NON_STREAM = _API_URL + "/text-to-speech/{voice_id}"
+
+DEFAULT_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75,
+}
 
 
 class ElevenLabsTTS(TTSClient):
@@ -22,14 +32,33 @@ class ElevenLabsTTS(TTSClient):
         api_key: str,
         voice_id: str = "21m00Tcm4TlvDq8ikWAM",
         model_id: str = "eleven_turbo_v2_5",
+        lookahead: int = 2,
+        client: httpx.AsyncClient | None = None,
+        output_format: str = "pcm_24000",
     ) -> None:
         self.api_key = api_key
         self.voice_id = voice_id
         self.model_id = model_id
+        self.lookahead = lookahead
+        self.output_format = output_format
+        self.audio_format = AudioFormat.from_elevenlabs(output_format)
+        # Long-lived pooled client; shared one comes from ResourceRegistry
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=30.0)
         self._headers = {
             "xi-api-key": api_key,
             "Content-Type": "application/json",
-            "Accept": "audio/mpeg",
+            "Accept": "audio/mpeg" if not self.audio_format.is_pcm else "*/*",
+        }
+        self._params = {"output_format": output_format}
+
+    def voice_params(self) -> dict[str, object]:
+        return {
+            "provider": "elevenlabs",
+            "voice_id": self.voice_id,
+            "model_id": self.model_id,
+            "voice_settings": DEFAULT_VOICE_SETTINGS,
+            "output_format": self.output_format,
         }
 
     async def synthesize(self, text: str) -> bytes:
@@ -38,64 +67,71 @@ class ElevenLabsTTS(TTSClient):
         payload = {
             "text": text,
             "model_id": self.model_id,
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.75,
-            },
+            "voice_settings": DEFAULT_VOICE_SETTINGS,
         }
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(url, json=payload, headers=self._headers)
-            resp.raise_for_status()
-            return resp.content
+        resp = await self._client.post(
+            url, json=payload, headers=self._headers, params=self._params
+        )
+        resp.raise_for_status()
+        return resp.content
 
     async def synthesize_stream(
         self, text_iter: AsyncIterator[str]
     ) -> AsyncIterator[bytes]:
-        """Accumulate text into sentences, then stream audio for each sentence.
+        """Accumulate text into segments, then stream audio for each segment.
 
         ElevenLabs streaming endpoint accepts complete text and returns audio
-        in chunks. We accumulate LLM tokens into sentences, then request
-        audio for each sentence to keep latency low.
+        in chunks. We group LLM tokens into segments (a short first clause,
+        then whole sentences) and pipeline the requests: while one segment
+        streams, up to ``lookahead`` following ones are already being
+        synthesized.
         """
-        sentence_buffer = ""
-        sentence_delimiters = {".", "!", "?", "\n"}
-
-        async for token in text_iter:
-            sentence_buffer += token
-            # Check if we have a complete sentence
-            if any(d in token for d in sentence_delimiters) and len(sentence_buffer.strip()) > 10:
-                sentence = sentence_buffer.strip()
-                sentence_buffer = ""
-                async for audio_chunk in self._stream_sentence(sentence):
-                    yield audio_chunk
-
-        # Flush remaining text
-        if sentence_buffer.strip():
-            async for audio_chunk in self._stream_sentence(sentence_buffer.strip()):
+        pipeline = SentencePipeline(self._segment_or_skip, lookahead=self.lookahead)
+        async with aclosing(pipeline.stream(segment_text(text_iter))) as audio:
+            async for audio_chunk in audio:
                 yield audio_chunk
 
-    async def _stream_sentence(self, text: str) -> AsyncIterator[bytes]:
-        """Stream audio for a single sentence from ElevenLabs."""
+    async def _segment_or_skip(self, text: str) -> AsyncIterator[bytes]:
+        """``synthesize_segment``, logging a failed request instead of
+        ending the whole answer with it."""
+        try:
+            async with aclosing(self.synthesize_segment(text)) as audio:
+                async for chunk in audio:
+                    yield chunk
+        except httpx.HTTPError:
+            logger.exception("TTS streaming failed for: %s", text[:50])
+
+    async def synthesize_segment(self, text: str) -> AsyncIterator[bytes]:
+        """Stream audio for a single sentence from ElevenLabs.
+
+        Raises ``httpx.HTTPError`` if the request fails, also midway, so
+        callers can tell a cut-off clip from a complete one.
+        """
         url = _TTS_URL.format(voice_id=self.voice_id)
         payload = {
             "text": text,
             "model_id": self.model_id,
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.75,
-            },
+            "voice_settings": DEFAULT_VOICE_SETTINGS,
         }
         logger.debug("TTS streaming sentence: %s", text[:50])
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                async with client.stream(
-                    "POST", url, json=payload, headers=self._headers
-                ) as resp:
-                    resp.raise_for_status()
-                    async for chunk in resp.aiter_bytes(chunk_size=4096):
-                        yield chunk
-        except httpx.HTTPError:
-            logger.exception("TTS streaming failed for: %s", text[:50])
+        async with self._client.stream(
+            "POST", url, json=payload, headers=self._headers, params=self._params
+        ) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.aiter_bytes(chunk_size=4096):
+                yield chunk
+
+    async def warmup(self) -> None:
+        """Open a pooled connection to ElevenLabs before the first sentence."""
+        resp = await self._client.get(
+            f"{_API_URL}/models", headers={"xi-api-key": self.api_key}
+        )
+        resp.raise_for_status()
+        logger.debug("ElevenLabs connection warmed up")
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
 
 
 class DummyTTS(TTSClient):
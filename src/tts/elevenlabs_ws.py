@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import contextlib
+import json
+import logging
+import re
+from collections.abc import AsyncIterator
+
+from src.audio.format import AudioFormat
+from src.tts.base import TTSClient
+from src.tts.elevenlabs_tts import DEFAULT_VOICE_SETTINGS
+from src.tts.segmenter import AdaptiveSegmenter
+
+logger = logging.getLogger(__name__)
+
+# ElevenLabs text-input streaming endpoint
+_WS_URL = "wss://api.elevenlabs.io/v1"
+# The word still being streamed at the end of the buffered text
+_TRAILING_WORD = re.compile(r"\S*\Z")
+
+
+class ElevenLabsWebSocketTTS(TTSClient):
+    """ElevenLabs TTS over the WebSocket text-input streaming API.
+
+    LLM tokens are pushed to the socket as they arrive while audio is read
+    back concurrently, so speech can start before a full sentence exists.
+    The server generates audio per ``chunk_length_schedule``; we also
+    flush wherever ``AdaptiveSegmenter`` would cut a segment (an early
+    first clause, then sentence ends) so text isn't held back server-side.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        model_id: str = "eleven_turbo_v2_5",
+        base_url: str = _WS_URL,
+        chunk_length_schedule: tuple[int, ...] = (50, 90, 120, 150),
+        output_format: str = "pcm_24000",
+    ) -> None:
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.base_url = base_url.rstrip("/")
+        self.chunk_length_schedule = list(chunk_length_schedule)
+        self.output_format = output_format
+        self.audio_format = AudioFormat.from_elevenlabs(output_format)
+
+    def voice_params(self) -> dict[str, object]:
+        return {
+            "provider": "elevenlabs",
+            "voice_id": self.voice_id,
+            "model_id": self.model_id,
+            "voice_settings": DEFAULT_VOICE_SETTINGS,
+            "output_format": self.output_format,
+        }
+
+    async def synthesize(self, text: str) -> bytes:
+        """Synthesize complete text to audio bytes."""
+        async def once() -> AsyncIterator[str]:
+            yield text
+
+        parts: list[bytes] = []
+        async for chunk in self.synthesize_stream(once()):
+            parts.append(chunk)
+        return b"".join(parts)
+
+    async def synthesize_stream(
+        self, text_iter: AsyncIterator[str]
+    ) -> AsyncIterator[bytes]:
+        """Push tokens to ElevenLabs as they arrive and yield audio in parallel."""
+        import websockets
+
+        url = (
+            f"{self.base_url}/text-to-speech/{self.voice_id}/stream-input"
+            f"?model_id={self.model_id}&output_format={self.output_format}"
+        )
+        headers = {"xi-api-key": self.api_key}
+
+        try:
+            async with websockets.connect(url, additional_headers=headers) as ws:
+                # Beginning of stream: voice + generation config
+                await ws.send(json.dumps({
+                    "text": " ",
+                    "voice_settings": DEFAULT_VOICE_SETTINGS,
+                    "generation_config": {
+                        "chunk_length_schedule": self.chunk_length_schedule,
+                    },
+                }))
+
+                async def send_text() -> None:
+                    segmenter = AdaptiveSegmenter()
+                    # Text not sent yet. The word in progress is held back:
+                    # once it ends, the segmenter may cut before it ("... |
+                    # because"), and sent text can no longer be split
+                    pending = ""
+                    try:
+                        async for token in text_iter:
+                            if not token:
+                                continue
+                            pending += token
+                            if segmenter.push(token):
+                                # Flush up to the cut; what follows starts the
+                                # next chunk. A cut in text already sent (the
+                                # max_chars fallback) flushes here instead
+                                cut = max(0, len(pending) - segmenter.buffered_chars)
+                                await ws.send(json.dumps({"text": pending[:cut] or " ", "flush": True}))
+                                pending = pending[cut:]
+                            word = _TRAILING_WORD.search(pending).start()
+                            if word:
+                                await ws.send(json.dumps({"text": pending[:word]}))
+                                pending = pending[word:]
+                        if pending:
+                            await ws.send(json.dumps({"text": pending}))
+                    finally:
+                        # End of stream: generate what's left and close. Also
+                        # sent when the text side fails, so the receive loop
+                        # gets its isFinal instead of waiting for the server's
+                        # inactivity timeout
+                        with contextlib.suppress(websockets.WebSocketException):
+                            await ws.send(json.dumps({"text": ""}))
+
+                send_task = asyncio.create_task(send_text())
+                try:
+                    async for msg in ws:
+                        data = json.loads(msg)
+                        audio = data.get("audio")
+                        if audio:
+                            yield base64.b64decode(audio)
+                        if data.get("isFinal"):
+                            break
+                    # Surface errors from the text side (e.g. LLM failure)
+                    await send_task
+                finally:
+                    if not send_task.done():
+                        send_task.cancel()
+                        await asyncio.gather(send_task, return_exceptions=True)
+        except (OSError, websockets.WebSocketException):
+            logger.exception("TTS WebSocket stream failed")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import re
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+from src.tts.base import TTSClient
+
+logger = logging.getLogger(__name__)
+
+# Short acknowledgements in the persona's voice, keyed by language
+DEFAULT_FILLERS: dict[str, tuple[str, ...]] = {
+    "en": (
+        "Hmm, interesting…",
+        "Right, let me think.",
+        "Okay, got it.",
+        "Good question.",
+    ),
+    "ru": (
+        "Ага, понял.",
+        "Хм, интересно…",
+        "Так, секунду.",
+        "Хороший вопрос.",
+    ),
+}
+
+_CYRILLIC = re.compile(r"[а-яё]", re.IGNORECASE)
+
+
+def detect_language(text: str) -> str:
+    """Rough language guess for picking a filler: "ru" or "en"."""
+    return "ru" if _CYRILLIC.search(text) else "en"
+
+
+class FillerLibrary:
+    """Pre-synthesized filler clips played while the real answer is prepared.
+
+    Clips are rendered once by ``prepare()`` with the same TTS client (and so
+    the same voice and audio format) as the answers. When that client is a
+    ``CachedTTS`` the clips are also kept on disk, so later starts render
+    nothing.
+    """
+
+    def __init__(
+        self,
+        tts: TTSClient,
+        phrases: dict[str, tuple[str, ...]] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.tts = tts
+        self.phrases = phrases or DEFAULT_FILLERS
+        self._clips: dict[str, list[tuple[str, bytes]]] = {}
+        self._last: dict[str, str] = {}
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return sum(len(clips) for clips in self._clips.values())
+
+    async def prepare(self) -> None:
+        """Render every phrase that isn't rendered yet."""
+
+        async def render(language: str, text: str) -> None:
+            try:
+                audio = await self.tts.synthesize(text)
+            except Exception as exc:
+                logger.warning("Filler %r not rendered: %s", text, exc)
+                return
+            if audio:
+                self._clips.setdefault(language, []).append((text, audio))
+
+        rendered = {text for clips in self._clips.values() for text, _ in clips}
+        await asyncio.gather(*(
+            render(language, text)
+            for language, texts in self.phrases.items()
+            for text in texts
+            if text not in rendered
+        ))
+        logger.info("Filler clips ready: %d", len(self))
+
+    def pick(self, transcript: str) -> tuple[str, bytes] | None:
+        """A clip in the transcript's language, not the same as last time."""
+        language = detect_language(transcript)
+        clips = self._clips.get(language) or self._clips.get("en")
+        if not clips:
+            return None
+        choices = [c for c in clips if c[0] != self._last.get(language)] or clips
+        text, audio = self._random.choice(choices)
+        self._last[language] = text
+        return text, audio
+
+
+class LatencyEstimator:
+    """Exponential moving average of a latency, in milliseconds."""
+
+    def __init__(self, initial_ms: float, alpha: float = 0.3) -> None:
+        self.value_ms = initial_ms
+        self.alpha = alpha
+
+    def update(self, sample_ms: float) -> None:
+        self.value_ms += self.alpha * (sample_ms - self.value_ms)
+
+
+async def with_filler(
+    filler_audio: bytes, audio_iter: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """Play a filler clip, then the answer audio as one continuous stream.
+
+    The answer starts synthesizing as soon as the filler is handed to the
+    player, so it is usually buffered by the time the filler ends.
+    """
+    async with aclosing(audio_iter) as audio:
+        yield filler_audio
+        async for chunk in audio:
+            yield chunk
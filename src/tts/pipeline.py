@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of one segment's audio inside its chunk queue
+_END = object()
+
+
+class SentencePipeline:
+    """Synthesize text segments concurrently, yield audio strictly in order.
+
+    While segment N is being played, requests for up to ``lookahead``
+    following segments are already in flight, so the network round trip
+    of the next sentence overlaps with playback of the current one.
+    Closing the output iterator (barge-in) cancels every outstanding request.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], AsyncIterator[bytes]],
+        lookahead: int = 2,
+    ) -> None:
+        self.synthesize = synthesize
+        self.lookahead = max(0, lookahead)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def stream(self, segments: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        """Yield audio for each segment of ``segments``, in input order."""
+        # Current segment + lookahead segments may be requested at once
+        slots = asyncio.Semaphore(self.lookahead + 1)
+        # (queue, task) per segment, in input order; None marks end of input
+        order: asyncio.Queue[tuple[asyncio.Queue, asyncio.Task] | None] = asyncio.Queue()
+
+        async def fetch(text: str, chunks: asyncio.Queue) -> None:
+            try:
+                async for chunk in self.synthesize(text):
+                    chunks.put_nowait(chunk)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                chunks.put_nowait(exc)
+            finally:
+                chunks.put_nowait(_END)
+
+        async def produce() -> None:
+            try:
+                async for text in segments:
+                    await slots.acquire()
+                    chunks: asyncio.Queue = asyncio.Queue()
+                    task = asyncio.create_task(fetch(text, chunks))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                    order.put_nowait((chunks, task))
+            except Exception as exc:
+                failed: asyncio.Queue = asyncio.Queue()
+                failed.put_nowait(exc)
+                failed.put_nowait(_END)
+                order.put_nowait((failed, asyncio.current_task()))
+            finally:
+                order.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        self._tasks.add(producer)
+        producer.add_done_callback(self._tasks.discard)
+        try:
+            while (entry := await order.get()) is not None:
+                chunks, task = entry
+                try:
+                    while (item := await chunks.get()) is not _END:
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+                finally:
+                    if task is not producer:
+                        slots.release()
+        finally:
+            await self.cancel()
+
+    async def cancel(self) -> None:
+        """Cancel all in-flight synthesis requests (e.g. on barge-in)."""
+        pending = [t for t in self._tasks if not t.done() and t is not asyncio.current_task()]
+        if not pending:
+            return
+        logger.debug("Cancelling %d outstanding TTS requests", len(pending))
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
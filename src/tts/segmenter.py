@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable
+
+# Sentence-final punctuation (incl. Russian "…" and "?!"/"!.." combinations)
+_SENTENCE_END = frozenset(".!?…")
+# Closing quotes/brackets that may follow sentence-final punctuation
+_CLOSERS = frozenset("\"')]»”’")
+# Clause punctuation: a natural place to breathe
+_CLAUSE_END = frozenset(",;:")
+_DASHES = frozenset("—–-")
+# A clause boundary is placed before these words
+_CONJUNCTIONS = frozenset(
+    "and but so because which while although or "
+    "и но а или что потому чтобы когда если хотя поэтому который которая которые".split()
+)
+# Words ending in "." that don't end a sentence
+_ABBREVIATIONS = frozenset(
+    "e.g i.e etc vs mr mrs ms dr st "
+    "т.е т.д т.п т.к др пр см г гг им напр".split()
+)
+
+
+class AdaptiveSegmenter:
+    """Splits streamed LLM tokens into segments for TTS.
+
+    The first segment is flushed as early as possible without sounding
+    chopped: at the first sentence end, at a clause boundary (comma, dash,
+    conjunction) once it has ``first_min_words``, after ``first_max_words``,
+    or when ``first_max_wait_s`` has passed since the first token. Later
+    segments only break at sentence ends and are at least ``min_chars``
+    long, which keeps prosody natural while the first one plays.
+
+    Tokens are scanned once, character by character; text is only joined
+    when a segment is cut.
+    """
+
+    def __init__(
+        self,
+        first_min_words: int = 4,
+        first_max_words: int = 10,
+        first_max_wait_s: float = 0.7,
+        min_chars: int = 40,
+        max_chars: int = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.first_min_words = first_min_words
+        self.first_max_words = first_max_words
+        self.first_max_wait_s = first_max_wait_s
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.clock = clock
+        self.segments_emitted = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._parts: list[str] = []
+        self._length = 0
+        self._words = 0
+        self._word: list[str] = []
+        self._word_start = 0
+        self._last_word = ""
+        self._prev = " "
+        self._prev2 = " "
+        self._after_sentence_end = False
+        # Candidate cut offsets, each with the word count before it
+        self._sentence_cut: tuple[int, int] | None = None
+        self._clause_cut: tuple[int, int] | None = None
+        self._word_cut: tuple[int, int] | None = None
+        self._started_at: float | None = None
+
+    @property
+    def buffered_chars(self) -> int:
+        """Characters received but not yet part of an emitted segment."""
+        return self._length
+
+    @property
+    def _first(self) -> bool:
+        return self.segments_emitted == 0
+
+    def push(self, token: str) -> list[str]:
+        """Add a token, return any segments that are now ready."""
+        if not token:
+            return []
+        if self._started_at is None:
+            self._started_at = self.clock()
+        offset = self._length
+        self._parts.append(token)
+        self._length += len(token)
+        self._scan(token, offset)
+        if self._first and self._ends_sentence_now():
+            self._sentence_cut = (self._length, self._words + 1)
+
+        segments: list[str] = []
+        while (cut := self._choose_cut()) is not None:
+            segment = self._cut(cut)
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> str | None:
+        """End of stream: return whatever is buffered."""
+        text = "".join(self._parts).strip()
+        self._reset()
+        if not text:
+            return None
+        self.segments_emitted += 1
+        return text
+
+    def time_until_due(self) -> float | None:
+        """Seconds until the first segment should be cut by time, if pending."""
+        if not self._first or self._started_at is None or self._words < 2:
+            return None
+        return max(0.0, self._started_at + self.first_max_wait_s - self.clock())
+
+    def cut_on_timeout(self) -> str | None:
+        """First segment took too long: cut at the last complete word."""
+        if not self._first or self._word_cut is None or self._word_cut[1] < 2:
+            return None
+        return self._cut(self._word_cut[0]) or None
+
+    def _scan(self, token: str, offset: int) -> None:
+        for i, ch in enumerate(token):
+            pos = offset + i
+            if ch.isspace():
+                if self._word:
+                    self._end_word(pos)
+                prev = self._prev
+                if prev in _SENTENCE_END or (self._after_sentence_end and prev in _CLOSERS):
+                    if not self._is_abbreviation():
+                        self._sentence_cut = (pos, self._words)
+                elif ch == "\n" and prev != "\n" and self._words:
+                    self._sentence_cut = (pos, self._words)
+                elif prev in _CLAUSE_END or (prev in _DASHES and self._prev2.isspace()):
+                    self._clause_cut = (pos, self._words)
+                self._after_sentence_end = False
+            else:
+                if not self._word:
+                    self._word_start = pos
+                self._word.append(ch)
+                if ch in _SENTENCE_END:
+                    self._after_sentence_end = True
+                elif ch not in _CLOSERS:
+                    self._after_sentence_end = False
+            self._prev2, self._prev = self._prev, ch
+
+    def _end_word(self, pos: int) -> None:
+        word = "".join(self._word)
+        self._word = []
+        self._last_word = word
+        if not any(c.isalnum() for c in word):
+            return  # a dash or stray punctuation, not a word
+        bare = word.strip("\"'«»“”„(").lower()
+        if bare in _CONJUNCTIONS and self._words:
+            # Break before the conjunction: "... потому что" -> "... | потому что"
+            self._clause_cut = (self._word_start, self._words)
+        self._words += 1
+        self._word_cut = (pos, self._words)
+
+    def _ends_sentence_now(self) -> bool:
+        """Buffer ends in an unambiguous sentence end (no need to see the next token).
+
+        "word." / "word?" can be cut right away; "3." or "e.g." must wait
+        for the following whitespace to rule out decimals and abbreviations.
+        """
+        if self._prev not in _SENTENCE_END or not self._prev2.isalpha():
+            return False
+        word = "".join(self._word)
+        return not self._is_abbreviation(word)
+
+    def _is_abbreviation(self, word: str | None = None) -> bool:
+        word = self._last_word if word is None else word
+        bare = word.rstrip("".join(_CLOSERS)).rstrip(".").lower()
+        if bare in _ABBREVIATIONS:
+            return True
+        # Initials like "J." or "Д."
+        return len(bare) == 1 and bare.isalpha() and word.endswith(".")
+
+    def _choose_cut(self) -> int | None:
+        if self._first:
+            if self._sentence_cut is not None:
+                return self._sentence_cut[0]
+            if self._clause_cut is not None and self._clause_cut[1] >= self.first_min_words:
+                return self._clause_cut[0]
+            if self._word_cut is not None and self._word_cut[1] >= self.first_max_words:
+                return self._word_cut[0]
+            return None
+        if self._sentence_cut is not None and self._sentence_cut[0] >= self.min_chars:
+            return self._sentence_cut[0]
+        if self._length >= self.max_chars:
+            for cut in (self._sentence_cut, self._clause_cut, self._word_cut):
+                if cut is not None and cut[0] > 0:
+                    return cut[0]
+        return None
+
+    def _cut(self, offset: int) -> str:
+        text = "".join(self._parts)
+        segment, rest = text[:offset].strip(), text[offset:]
+        started_at = self._started_at
+        self._reset()
+        if segment:
+            self.segments_emitted += 1
+        if rest:
+            self._started_at = started_at if not segment else self.clock()
+            self._parts.append(rest)
+            self._length = len(rest)
+            self._scan(rest, 0)
+        return segment
+
+
+async def segment_text(
+    text_iter: AsyncIterator[str],
+    segmenter: AdaptiveSegmenter | None = None,
+) -> AsyncIterator[str]:
+    """Group streaming tokens into TTS segments (see ``AdaptiveSegmenter``).
+
+    Also cuts the first segment on a timer when the LLM stalls mid-clause.
+    """
+    segmenter = segmenter or AdaptiveSegmenter()
+    tokens = aiter(text_iter)
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(tokens))
+            done, _ = await asyncio.wait({pending}, timeout=segmenter.time_until_due())
+            if not done:
+                segment = segmenter.cut_on_timeout()
+                if segment:
+                    yield segment
+                continue
+            try:
+                token = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+            for segment in segmenter.push(token):
+                yield segment
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+
+    tail = segmenter.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+# Module level on purpose: FastAPI resolves the (string) endpoint
+# annotations against this module's globals
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+
+from src.agent.agent import InterviewAgent
+from src.agent.sessions import Session, SessionLimitError, SessionManager
+from src.audio.vad import VoiceActivityDetector
+from src.coalesce import stream_tokens
+from src.config import Settings
+from src.server import StatsBoard, aggregate, process_stats, render_metrics, session_prefix
+from src.stt.base import STTClient
+from src.stt.pool import STTPool
+from src.tts.base import TTSClient
+
+logger = logging.getLogger(__name__)
+
+WEB_DIR = Path(__file__).resolve().parent.parent / "web"
+
+# How often a worker posts its stats for the others to aggregate
+STATS_INTERVAL_S = 1.0
+
+
+def create_app(
+    settings: Settings,
+    agent_factory: Callable[[], InterviewAgent],
+    tts: TTSClient | None = None,
+    stt_factory: Callable[[], STTClient] | None = None,
+    vad_factory: Callable[[], VoiceActivityDetector] | None = None,
+    board: StatsBoard | None = None,
+) -> FastAPI:
+    """The web interface: the page, text chat over ``/ws`` and, when
+    ``tts``, ``stt_factory`` and ``vad_factory`` are given, voice over
+    ``/ws/audio``. Each connection works on its own session.
+
+    ``/healthz`` and ``/metrics`` report on every worker process sharing
+    ``board`` (just this one without it)."""
+    board = board or StatsBoard()
+    started = time.monotonic()
+    counters = {"connections": 0, "messages": 0}
+
+    def snapshot() -> dict[str, float]:
+        return {
+            "pid": os.getpid(),
+            "worker": board.worker,
+            "uptime_s": time.monotonic() - started,
+            **counters,
+            **sessions.stats(),
+            **process_stats(),
+        }
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async def publish() -> None:
+            while True:
+                try:
+                    board.publish(snapshot())
+                except OSError as e:
+                    logger.warning("Could not publish worker stats: %s", e)
+                await asyncio.sleep(STATS_INTERVAL_S)
+
+        task = asyncio.create_task(publish()) if board.directory else None
+        yield
+        if task is not None:
+            task.cancel()
+
+    app = FastAPI(title="Voice Interview Assistant", lifespan=lifespan)
+    sessions = SessionManager(
+        agent_factory=agent_factory,
+        max_sessions=settings.session_max,
+        idle_ttl_s=settings.session_idle_ttl_s,
+        token_prefix=session_prefix(board.worker) if board.workers > 1 else "",
+    )
+    app.state.sessions = sessions
+    app.state.board = board
+    # Shared by the voice sessions; blocking clients run off the event loop
+    stt = STTPool(stt_factory, size=settings.web_stt_workers) if stt_factory is not None else None
+
+    async def open_session(ws: WebSocket) -> Session | None:
+        """Accept and attach to the client's session (``?session=<token>``)."""
+        await ws.accept()
+        try:
+            session = sessions.acquire(ws.query_params.get("session"))
+        except SessionLimitError as e:
+            logger.warning("Rejecting WebSocket client: %s", e)
+            await ws.send_json({"type": "error", "text": "Server busy, try again later"})
+            await ws.close(code=1013)
+            return None
+        await ws.send_json({"type": "session", "token": session.token})
+        return session
+
+    @app.get("/")
+    async def index():
+        return FileResponse(WEB_DIR / "index.html")
+
+    @app.get("/sessions")
+    async def session_stats():
+        return sessions.stats()
+
+    @app.get("/healthz")
+    async def healthz():
+        snapshots = board.collect(snapshot())
+        healthy = len(snapshots) == board.workers
+        body = {
+            "status": "ok" if healthy else "degraded",
+            "worker": board.worker,
+            "workers": board.workers,
+            "alive": sorted(snapshots),
+            "totals": aggregate(snapshots),
+        }
+        return JSONResponse(body, status_code=200 if healthy else 503)
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(
+            render_metrics(board.collect(snapshot()), board.workers),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    @app.websocket("/ws")
+    async def websocket_endpoint(ws: WebSocket):
+        session = await open_session(ws)
+        if session is None:
+            return
+        counters["connections"] += 1
+        try:
+            while True:
+                data = await ws.receive_text()
+                counters["messages"] += 1
+                # Text mode over WebSocket: tokens coalesced into few frames
+                await stream_tokens(
+                    ws.send_text,
+                    session.agent.respond_stream(data),
+                    window_ms=settings.ws_coalesce_ms,
+                    max_chars=settings.ws_coalesce_chars,
+                )
+        except WebSocketDisconnect:
+            logger.info("WebSocket client disconnected")
+        finally:
+            counters["connections"] -= 1
+            sessions.release(session)
+
+    if tts is None or stt_factory is None or vad_factory is None:
+        return app
+
+    @app.websocket("/ws/audio")
+    async def audio_endpoint(ws: WebSocket):
+        """Voice session: browser mic PCM in, TTS PCM out, one VoiceLoop each."""
+        from src.loop import VoiceLoop
+        from src.transport.websocket import WebSocketAudioTransport
+
+        session = await open_session(ws)
+        if session is None:
+            return
+        transport = WebSocketAudioTransport(
+            ws,
+            sample_rate=settings.sample_rate,
+            frame_duration_ms=settings.frame_duration_ms,
+            output_sample_rate=tts.audio_format.sample_rate,
+        )
+        loop = VoiceLoop(
+            agent=session.agent,
+            stt=stt,
+            tts=tts,
+            transport=transport,
+            vad=vad_factory(),
+            filler_threshold_ms=settings.filler_threshold_ms,
+            console=False,
+        )
+        counters["connections"] += 1
+        try:
+            await loop.run()
+        finally:
+            counters["connections"] -= 1
+            sessions.release(session)
+        logger.info("Voice WebSocket session ended")
+
+    return app
@@ -1,5 +1,6 @@
 """Tests for the interview agent (mocked LLM)."""
 import asyncio
+import json
 from collections.abc import AsyncIterator
 from unittest.mock import AsyncMock
 
@@ -7,6 +8,7 @@ import pytest
 
 from src.agent.agent import InterviewAgent
 from src.agent.policy import build_system_prompt, build_context_block, should_refuse
+from src.agent.spoken import SpokenFilter, spoken_part
 from src.knowledge.loader import Chunk
 from src.knowledge.retriever import KnowledgeRetriever
 from src.llm.base import LLMClient
@@ -81,3 +83,159 @@ def test_should_refuse_low_scores():
 def test_should_not_refuse_good_scores():
     chunks = [Chunk(text="x", source="x", chunk_id="x", score=2.0)]
     assert should_refuse(chunks, min_score=0.5) is False
+
+
+def _filter_tokens(tokens: list[str]) -> str:
+    spoken = SpokenFilter()
+    out = [spoken.feed(t) for t in tokens]
+    out.append(spoken.finish())
+    return "".join(out)
+
+
+def test_spoken_filter_stops_at_split_marker():
+    tokens = ["Sure, ", "we use Python.", "\n\n", "Sour", "ces:\n- guide.md: Tech", "\n\nStage: 1"]
+    assert _filter_tokens(tokens) == "Sure, we use Python."
+
+
+def test_spoken_filter_holds_back_partial_marker_only():
+    spoken = SpokenFilter()
+    assert spoken.feed("Hello S") == "Hello"
+    assert spoken.feed("o far so good") == " So far so good"
+    assert spoken.feed("\n\nSta") == ""
+    assert spoken.feed("ge: Stage 1") == ""
+    assert spoken.done
+
+
+def test_spoken_filter_markdown_and_russian_trailers():
+    assert _filter_tokens(["Да, ", "конечно.\n\n**", "Sources:**\n- a.md"]) == "Да, конечно."
+    assert _filter_tokens(["Ответ.\n\n", "Источ", "ники:\n- a.md"]) == "Ответ."
+    assert _filter_tokens(["No trailer at all"]) == "No trailer at all"
+
+
+def test_spoken_part():
+    text = "Answer here.\n\nSources:\n- faq.json: About\n\nStage: Stage 1 — Discovery"
+    assert spoken_part(text) == "Answer here."
+    assert spoken_part("Answer.\n\nStage: Stage 2") == "Answer."
+
+
+@pytest.mark.asyncio
+async def test_agent_history_is_capped_but_stage_keeps_counting():
+    agent = _make_agent()
+    agent.max_history = 4
+    for question in ("one", "two", "three"):
+        await agent.respond(question)
+    assert len(agent.conversation_history) == 4
+    assert agent.conversation_history[0]["content"] == "two"
+    assert agent._count_exchanges() == 3
+
+
+def test_session_manager_isolates_and_resumes_sessions():
+    from src.agent.sessions import SessionManager
+
+    manager = SessionManager(agent_factory=_make_agent, max_sessions=10)
+    a, b = manager.acquire(), manager.acquire()
+    assert a.token != b.token
+    assert a.agent is not b.agent
+    # Shared read-only dependencies are the factory's business; history is not shared
+    a.agent.conversation_history.append({"role": "user", "content": "hi"})
+    assert b.agent.conversation_history == []
+
+    manager.release(a)
+    assert manager.acquire(a.token) is a
+    # Unknown (e.g. expired) tokens get a fresh session
+    assert manager.acquire("stale-token").token != "stale-token"
+
+
+def test_session_manager_evicts_idle_lru_and_caps_live_sessions():
+    from src.agent.sessions import SessionLimitError, SessionManager
+
+    manager = SessionManager(agent_factory=_make_agent, max_sessions=2, idle_ttl_s=60)
+    a, b = manager.acquire(), manager.acquire()
+    with pytest.raises(SessionLimitError):
+        manager.acquire()
+    assert manager.stats()["rejected"] == 1
+
+    manager.release(b)
+    manager.release(a)
+    manager.acquire()  # makes room by dropping b, the least recently used
+    assert manager.acquire(a.token) is a
+    assert b.token not in manager._sessions
+    stats = manager.stats()
+    assert stats["sessions"] == 2 and stats["evicted"] == 1
+
+    for session in list(manager._sessions.values()):
+        session.connections = 0
+        session.last_used -= 120
+    assert manager.evict_idle() == 2
+    assert len(manager) == 0
+
+
+def test_session_manager_reclaims_idle_sessions_on_release():
+    from src.agent.sessions import SessionManager
+
+    manager = SessionManager(agent_factory=_make_agent, idle_ttl_s=60)
+    stale, live = manager.acquire(), manager.acquire()
+    manager.release(stale)
+    stale.last_used -= 120
+    # No new connection arrives; the next disconnect reclaims the stale one
+    manager.release(live)
+    assert len(manager) == 1 and manager.stats()["evicted"] == 1
+    assert manager.acquire(live.token) is live
+
+
+@pytest.mark.asyncio
+async def test_session_memory_grows_with_history():
+    from src.agent.sessions import SessionManager
+
+    manager = SessionManager(agent_factory=_make_agent)
+    session = manager.acquire()
+    empty = manager.stats()["memory_bytes"]
+    await session.agent.respond("What does the company do? " * 20)
+    stats = manager.stats()
+    assert stats["memory_bytes"] > empty + 500
+    assert stats["max_session_bytes"] == stats["memory_bytes"]
+
+
+def test_history_encoding_roundtrip_is_compact():
+    from src.agent.store import decode_history, encode_history
+
+    history = [
+        {"role": "user", "content": "Расскажи про компанию " * 20},
+        {"role": "assistant", "content": 'We build "data" pipelines.\n\nStage: Stage 1'},
+    ]
+    blob = encode_history(history)
+    assert decode_history(blob) == history
+    assert len(blob) < len(json.dumps(history, ensure_ascii=False).encode()) / 3
+
+
+@pytest.mark.asyncio
+async def test_session_store_bounds_memory_and_survives_restart(tmp_path):
+    from src.agent.sessions import SessionManager
+    from src.agent.store import SQLiteSessionStore
+
+    store = SQLiteSessionStore(tmp_path / "sessions.sqlite3")
+    manager = SessionManager(agent_factory=_make_agent, max_sessions=2, store=store)
+    for chat in ("1", "2", "3"):
+        session = manager.open(chat)
+        await session.agent.respond(f"hello from {chat}")
+        manager.release(session)
+    # Only two chats fit in memory; the evicted one was written on the way out
+    assert len(manager) == 2 and store.writes == 1
+
+    session = manager.open("1")
+    assert manager.stats()["restored"] == 1
+    assert session.agent.exchanges == 1
+    assert session.agent.conversation_history[0]["content"] == "hello from 1"
+    manager.release(session)
+    assert manager.flush() == 2  # chat 1 and the newest; written behind, in one batch
+    assert manager.flush() == 0
+    store.close()
+
+    # A new process picks up every conversation
+    store = SQLiteSessionStore(tmp_path / "sessions.sqlite3")
+    manager = SessionManager(agent_factory=_make_agent, store=store)
+    assert len(store) == 3
+    for chat in ("1", "2", "3"):
+        history = manager.open(chat).agent.conversation_history
+        assert history[0]["content"] == f"hello from {chat}"
+    store.close()
@@ -0,0 +1,384 @@
+"""Tests for audio processing helpers (no audio hardware)."""
+import io
+from collections.abc import AsyncIterator
+
+import numpy as np
+import pytest
+
+from src.audio.decoder import Mp3StreamDecoder, to_pcm
+from src.audio.format import MP3, PCM_S16LE, AudioFormat
+
+
+async def _aiter(items: list[bytes]) -> AsyncIterator[bytes]:
+    for item in items:
+        yield item
+
+
+def _sine(seconds: float, rate: int, freq: float = 440.0) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return (np.sin(2 * np.pi * freq * t) * 0.3).astype(np.float32)
+
+
+def _encode_mp3(samples: np.ndarray, rate: int) -> bytes:
+    av = pytest.importorskip("av")
+    if "libmp3lame" not in av.codecs_available:
+        pytest.skip("no MP3 encoder available")
+    buf = io.BytesIO()
+    container = av.open(buf, "w", format="mp3")
+    stream = container.add_stream("libmp3lame", rate=rate)
+    stream.layout = "mono"
+    frame = av.AudioFrame.from_ndarray(samples[None, :], format="flt", layout="mono")
+    frame.sample_rate = rate
+    for packet in stream.encode(frame):
+        container.mux(packet)
+    for packet in stream.encode(None):
+        container.mux(packet)
+    container.close()
+    return buf.getvalue()
+
+
+def test_audio_format_from_elevenlabs():
+    assert AudioFormat.from_elevenlabs("pcm_16000") == AudioFormat(PCM_S16LE, 16000)
+    assert AudioFormat.from_elevenlabs("mp3_44100_128") == AudioFormat(MP3, 44100)
+    with pytest.raises(ValueError):
+        AudioFormat.from_elevenlabs("ulaw_8000")
+
+
+@pytest.mark.asyncio
+async def test_pcm_passthrough_realigns_split_samples():
+    pcm = np.arange(100, dtype="<i2").tobytes()
+    # Odd-sized network chunks split samples in half
+    chunks = [pcm[:3], pcm[3:101], pcm[101:]]
+    out = [c async for c in to_pcm(_aiter(chunks), AudioFormat(sample_rate=24000))]
+    assert all(len(c) % 2 == 0 for c in out)
+    assert b"".join(out) == pcm
+
+
+def test_mp3_decoder_is_incremental():
+    rate = 24000
+    mp3 = _encode_mp3(_sine(1.0, rate), rate)
+
+    whole = Mp3StreamDecoder()
+    expected = whole.decode(mp3) + whole.flush()
+
+    sliced = Mp3StreamDecoder()
+    parts = [sliced.decode(mp3[i:i + 333]) for i in range(0, len(mp3), 333)]
+    parts.append(sliced.flush())
+    assert b"".join(parts) == expected
+    assert sliced.sample_rate == rate
+    # ~1s of audio (plus encoder padding)
+    assert rate <= len(expected) // 2 <= rate * 1.1
+
+
+def test_ring_buffer_wraps_around():
+    from src.audio.ring_buffer import RingBuffer
+
+    ring = RingBuffer(8)
+    out = np.zeros(8, dtype=np.float32)
+    assert ring.write(np.arange(6, dtype=np.float32)) == 6
+    assert ring.read_into(out[:4]) == 4
+    # Only 6 slots free; the write wraps past the end of storage
+    assert ring.write(np.arange(10, 20, dtype=np.float32)) == 6
+    assert ring.available == 8
+    assert ring.read_into(out) == 8
+    assert list(out) == [4, 5, 10, 11, 12, 13, 14, 15]
+    assert ring.write(np.ones(3, dtype=np.float32)) == 3
+    assert ring.discard() == 3 and ring.available == 0
+
+
+class FakeOutputStream:
+    """Stands in for sd.OutputStream: runs the callback from a thread, fast."""
+
+    def __init__(self, callback, blocksize: int = 240) -> None:
+        import threading
+
+        self.callback = callback
+        self.blocksize = blocksize
+        self.played: list[np.ndarray] = []
+        self.latency = 0.0
+        self._running = threading.Event()
+        self.hold = threading.Event()  # set: the device stops pulling audio
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._running.set()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running.clear()
+        self._thread.join()
+
+    def close(self) -> None:
+        pass
+
+    def _run(self) -> None:
+        import time
+
+        while self._running.is_set():
+            if self.hold.is_set():
+                time.sleep(0.0005)
+                continue
+            out = np.zeros((self.blocksize, 1), dtype=np.float32)
+            self.callback(out, self.blocksize, None, None)
+            self.played.append(out[:, 0].copy())
+            time.sleep(0.0005)
+
+
+def _fake_player(**kwargs):
+    from src.audio.player import AudioPlayer
+
+    class FakePlayer(AudioPlayer):
+        def _open_stream(self):
+            self.fake = FakeOutputStream(self._callback)
+            return self.fake
+
+    return FakePlayer(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_player_is_gapless_across_chunks():
+    player = _fake_player(sample_rate=24000, jitter_ms=20)
+    pcm = (np.arange(1, 24001) % 1000 + 1).astype("<i2")
+    chunks = [pcm[i:i + 1000].tobytes() for i in range(0, len(pcm), 1000)]
+    await player.play_stream(_aiter(chunks))
+    player.close()
+
+    played = np.concatenate(player.fake.played)
+    nonzero = np.flatnonzero(played)
+    audible = played[nonzero[0]:nonzero[-1] + 1]
+    # Every sample arrives once, in order, with no silence in between
+    assert np.array_equal(np.round(audible * 32768).astype(np.int16), pcm)
+    stats = player.stats()
+    assert stats["underruns"] == 0
+    assert stats["time_to_first_sound_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_player_stop_drops_queued_audio():
+    import asyncio
+
+    player = _fake_player(sample_rate=24000, jitter_ms=20)
+    pcm = np.full(24000 * 5, 1000, dtype="<i2").tobytes()
+
+    async def stop_soon():
+        await asyncio.sleep(0.05)
+        player.stop()
+
+    stopper = asyncio.create_task(stop_soon())
+    await asyncio.wait_for(player.play_stream(_aiter([pcm])), timeout=2)
+    await stopper
+    player.close()
+    played = np.concatenate(player.fake.played)
+    assert np.count_nonzero(played) < 24000 * 5
+    assert not player.is_playing
+
+
+@pytest.mark.asyncio
+async def test_player_new_turn_after_barge_in_skips_old_audio():
+    import asyncio
+
+    player = _fake_player(sample_rate=24000, jitter_ms=20)
+    old = np.full(24000 * 5, 1000, dtype="<i2").tobytes()
+    new = np.full(2400, 2000, dtype="<i2").tobytes()
+
+    interrupted = asyncio.create_task(player.play_stream(_aiter([old])))
+    await asyncio.sleep(0.05)
+    # Barge-in lands while the device is between callbacks
+    player.fake.hold.set()
+    held_at = len(player.fake.played)
+    player.stop()
+    await asyncio.wait_for(interrupted, timeout=2)
+
+    next_turn = asyncio.create_task(player.play_stream(_aiter([new])))
+    await asyncio.sleep(0.05)
+    player.fake.hold.clear()
+    await asyncio.wait_for(next_turn, timeout=2)
+    player.close()
+
+    after = np.round(np.concatenate(player.fake.played[held_at:]) * 32768)
+    assert not np.any(after == 1000)
+    assert np.count_nonzero(after == 2000) == 2400
+
+
+@pytest.mark.parametrize("from_rate,to_rate", [(16000, 24000), (48000, 16000), (44100, 48000)])
+def test_resampler_streaming_matches_one_shot_and_keeps_tone(from_rate, to_rate):
+    from src.audio.resample import Resampler
+
+    t = np.arange(from_rate) / from_rate
+    tone = (0.5 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32)
+
+    whole = Resampler(from_rate, to_rate)
+    expected = np.concatenate([whole.process(tone), whole.flush()])
+    chunked = Resampler(from_rate, to_rate)
+    pieces = [chunked.process(c) for c in np.array_split(tone, 37)] + [chunked.flush()]
+    out = np.concatenate(pieces)
+
+    np.testing.assert_allclose(out, expected, atol=1e-6)
+    # A 1 kHz tone survives with the filter delay and nothing else
+    ref = 0.5 * np.sin(2 * np.pi * 1000 * (np.arange(len(out)) / to_rate - chunked.delay))
+    middle = slice(to_rate // 10, len(out) - to_rate // 10)
+    err = out[middle] - ref[middle]
+    assert 10 * np.log10(np.mean(ref[middle] ** 2) / np.mean(err ** 2)) > 60
+
+
+def test_resample_pcm16_length_and_alignment():
+    from src.audio.resample import resample_pcm16
+
+    pcm = (np.sin(2 * np.pi * 440 * np.arange(16000) / 16000) * 10000).astype("<i2")
+    out = np.frombuffer(resample_pcm16(pcm.tobytes(), 16000, 48000), dtype="<i2")
+    assert len(out) == 48000
+    # Every third output sample lands on an input sample
+    assert np.max(np.abs(out[3000:-3000:3].astype(int) - pcm[1000:-1000])) < 50
+
+
+@pytest.mark.asyncio
+async def test_player_resamples_instead_of_reopening():
+    player = _fake_player(sample_rate=48000, jitter_ms=20)
+    pcm = np.full(16000, 8000, dtype="<i2").tobytes()
+    await player.play_stream(_aiter([pcm]), AudioFormat(sample_rate=16000))
+    stream = player.fake
+    await player.play_stream(_aiter([pcm]), AudioFormat(sample_rate=24000))
+    player.close()
+
+    assert player.fake is stream  # same device stream for both rates
+    assert player.sample_rate == 48000
+    played = np.concatenate(player.fake.played)
+    assert abs(np.count_nonzero(np.abs(played) > 0.2) - 48000 - 32000) < 200
+
+
+def _voiced(seconds: float, rate: int = 16000, level: float = 0.2) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return level * sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 20))
+
+
+def _frames(audio: np.ndarray, frame: int = 480) -> list[bytes]:
+    pcm = (audio * 32767).astype("<i2")
+    return [pcm[i:i + frame].tobytes() for i in range(0, len(pcm) - frame + 1, frame)]
+
+
+@pytest.mark.parametrize("backend", ["webrtc", "spectral"])
+def test_vad_backends_detect_speech_without_calibration(backend):
+    from src.audio.vad import SpectralVAD, WebRtcVAD
+
+    vad = WebRtcVAD() if backend == "webrtc" else SpectralVAD()
+    rng = np.random.default_rng(0)
+    noise = lambda s: rng.normal(0, 0.002, int(s * 16000))  # noqa: E731
+    audio = np.concatenate([noise(0.3), _voiced(1.0) + noise(1.0), noise(1.0)])
+    events = [(i, vad.process_frame(f)) for i, f in enumerate(_frames(audio))]
+
+    starts = [i for i, e in events if e == "speech_start"]
+    ends = [i for i, e in events if e == "speech_end"]
+    assert len(starts) == 1 and len(ends) == 1
+    assert 10 <= starts[0] <= 15  # speech begins at frame 10
+    assert ends[0] * 30 - 1300 <= 600  # within the 500 ms tail + a frame
+    stats = vad.stats()
+    assert stats["frames"] == len(events) and stats["mean_cost_us"] > 0
+    assert 0.0 <= stats["last_probability"] <= 1.0
+
+
+def test_vad_click_does_not_start_or_extend_speech():
+    from src.audio.vad import SpectralVAD
+
+    vad = SpectralVAD()
+    audio = np.random.default_rng(1).normal(0, 0.002, 16000 * 2)
+    audio[8000:8064] += 0.3  # a 4 ms click
+    assert all(vad.process_frame(f) == "silence" for f in _frames(audio))
+
+
+def test_reference_buffer_wraps_and_zero_fills():
+    from src.audio.echo import ReferenceBuffer
+
+    buf = ReferenceBuffer(8)
+    buf.write(np.arange(1, 6, dtype=np.float32))
+    buf.write(np.arange(6, 12, dtype=np.float32))
+    assert buf.written == 11
+    assert buf.read(5, 4).tolist() == [6, 7, 8, 9]
+    # Overwritten history and the future read as silence
+    assert buf.read(1, 4).tolist() == [0, 0, 4, 5]
+    assert buf.read(9, 4).tolist() == [10, 11, 0, 0]
+
+
+def _echo_scene(seconds: float, near: np.ndarray | None = None):
+    """Speech-like far end at 24 kHz and its 16 kHz echo (45 ms, decaying)."""
+    from src.audio.resample import resample_pcm16
+
+    rng = np.random.default_rng(3)
+    n = int(seconds * 16000)
+    far = np.convolve(rng.normal(0, 0.1, n), np.ones(6) / 6, mode="same")
+    far *= 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 1.3 * np.arange(n) / 16000))
+    rir = np.zeros(1200)
+    rir[720:] = rng.normal(0, 1, 480) * np.exp(-np.arange(480) / 120)
+    rir[720] = 2.0
+    echo = np.convolve(far, rir / np.sqrt(np.sum(rir ** 2)) * 0.5)[:n]
+    mic = echo + (near if near is not None else 0) + rng.normal(0, 1e-4, n)
+    pcm = (far * 32767).astype("<i2").tobytes()
+    reference = np.frombuffer(resample_pcm16(pcm, 16000, 24000), dtype="<i2") / 32768.0
+    return mic, echo, reference.astype(np.float32)
+
+
+def _cancel(canceller, mic: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    out = []
+    for k in range(len(mic) // 480):
+        # The output callback runs 20 ms ahead, in 512-sample blocks
+        target = -(-((k + 1) * 720 + 480) // 512) * 512
+        if target > canceller.reference.written:
+            block = reference[canceller.reference.written:target]
+            canceller.reference.write(np.pad(block, (0, target - canceller.reference.written - len(block))))
+        frame = (np.clip(mic[k * 480:(k + 1) * 480], -1, 1) * 32767).astype("<i2").tobytes()
+        data = canceller.process(frame, canceller.reference.written)
+        out.append(np.frombuffer(data, dtype="<i2") / 32768.0)
+    return np.concatenate(out)
+
+
+def test_echo_canceller_removes_playback_echo():
+    from src.audio.echo import EchoCanceller
+
+    mic, echo, reference = _echo_scene(6.0)
+    out = _cancel(EchoCanceller(suppress=False), mic, reference)
+    tail = slice(3 * 16000, len(out))
+    erle = 10 * np.log10(np.mean(echo[tail] ** 2) / np.mean(out[tail] ** 2))
+    assert erle > 15
+
+
+def test_echo_canceller_keeps_near_end_in_double_talk():
+    from src.audio.echo import EchoCanceller
+
+    near = np.zeros(6 * 16000)
+    near[4 * 16000:] = 0.5 * _voiced(2.0)
+    mic, echo, reference = _echo_scene(6.0, near)
+    out = _cancel(EchoCanceller(), mic, reference)
+    # Output lags by one 10 ms block
+    talk = slice(int(4.2 * 16000), len(out))
+    kept = np.sum(out[talk] * near[int(4.2 * 16000) - 160:len(out) - 160]) / np.sum(near[talk] ** 2)
+    assert kept > 0.7
+
+
+@pytest.mark.asyncio
+async def test_player_feeds_echo_reference():
+    from src.audio.echo import ReferenceBuffer
+
+    player = _fake_player(sample_rate=24000, jitter_ms=20)
+    player.echo_reference = ReferenceBuffer(24000 * 2)
+    pcm = (np.arange(1, 4801) % 1000 + 1).astype("<i2")
+    await player.play_stream(_aiter([pcm.tobytes()]))
+    player.close()
+
+    played = np.concatenate(player.fake.played)
+    # Everything sent to the device, silence included, in order
+    assert player.echo_reference.written == len(played)
+    recent = player.echo_reference.read(max(0, len(played) - 48000), min(len(played), 48000))
+    assert np.array_equal(recent, played[-len(recent):])
+
+
+@pytest.mark.parametrize("rate", [24000, 44100])
+def test_ogg_opus_voice_note_roundtrip(rate):
+    from src.audio.ogg import decode_audio_file, encode_ogg_opus
+
+    t = np.arange(rate) / rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype("<i2").tobytes()
+    note = encode_ogg_opus(pcm, rate)
+    assert note[:4] == b"OggS" and len(note) < len(pcm) / 5
+
+    decoded = np.frombuffer(decode_audio_file(note, sample_rate=16000), dtype="<i2")
+    assert abs(len(decoded) - 16000) < 400
+    assert np.sqrt(np.mean(decoded.astype(np.float64) ** 2)) > 3000
@@ -0,0 +1,101 @@
+"""Tests for per-chat ordered processing (ChatQueue)."""
+import asyncio
+
+import pytest
+
+from src.chat_queue import ChatQueue
+
+
+class Recorder:
+    def __init__(self, delay: float = 0.02) -> None:
+        self.delay = delay
+        self.batches: list[tuple[int, list[str]]] = []
+        self.busy: set[int] = set()
+        self.overlaps = 0
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, chat_id: int, items: list[str]) -> None:
+        if chat_id in self.busy:
+            self.overlaps += 1
+        self.busy.add(chat_id)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.batches.append((chat_id, items))
+        self.running -= 1
+        self.busy.discard(chat_id)
+
+
+async def _drain(queue: ChatQueue) -> None:
+    while queue.stats()["chats"]:
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_chats_run_serially_and_in_parallel_up_to_the_limit():
+    handler = Recorder()
+    queue = ChatQueue(handler, max_concurrency=3, coalesce_ms=0)
+    for chat in range(6):
+        queue.submit(chat, f"{chat}-a", coalesce=False)
+        queue.submit(chat, f"{chat}-b", coalesce=False)
+    await _drain(queue)
+
+    assert handler.overlaps == 0
+    assert handler.peak == 3
+    for chat in range(6):
+        assert [items for c, items in handler.batches if c == chat] == [[f"{chat}-a"], [f"{chat}-b"]]
+    stats = queue.stats()
+    assert stats["batches"] == 12 and stats["wait_ms_max"] >= stats["wait_ms_p50"] > 0
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_coalesced_but_commands_stand_alone():
+    handler = Recorder(delay=0.05)
+    queue = ChatQueue(handler, coalesce_ms=30)
+    queue.submit(1, "hi")
+    await asyncio.sleep(0.01)
+    queue.submit(1, "I'm a backend engineer")
+    await asyncio.sleep(0.06)  # the first batch is being answered now
+    queue.submit(1, "/newchat", coalesce=False)
+    queue.submit(1, "again")
+    queue.submit(1, "and again")
+    await _drain(queue)
+
+    assert [items for _, items in handler.batches] == [
+        ["hi", "I'm a backend engineer"],
+        ["/newchat"],
+        ["again", "and again"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backlog_is_bounded_per_chat_and_failures_are_contained():
+    async def flaky(chat_id: int, items: list[str]) -> None:
+        await asyncio.sleep(0.01)
+        if chat_id == 1:
+            raise RuntimeError("LLM down")
+
+    queue = ChatQueue(flaky, max_backlog=2, coalesce_ms=0)
+    assert queue.submit(1, "a") and queue.submit(1, "b")
+    assert not queue.submit(1, "c")
+    assert queue.submit(2, "other chat")
+    await _drain(queue)
+    stats = queue.stats()
+    assert stats["dropped"] == 1 and stats["failed"] == 1 and stats["batches"] == 2
+    assert queue.submit(1, "d")  # the chat works again after the failure
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_join_waits_for_work_in_progress():
+    handler = Recorder(delay=0.05)
+    queue = ChatQueue(handler, coalesce_ms=0)
+    queue.submit(1, "a", coalesce=False)
+    queue.submit(1, "b", coalesce=False)
+    queue.submit(2, "c", coalesce=False)
+
+    assert not await queue.join(timeout=0.01)
+    assert await queue.join(timeout=1.0)
+    assert sorted(items[0] for _, items in handler.batches) == ["a", "b", "c"]
+    await queue.close()
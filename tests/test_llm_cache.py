@@ -0,0 +1,103 @@
+"""Tests for recorded/replayed LLM completions and the parallel eval runner."""
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from eval.run import run_suite
+from src.llm.base import LLMClient
+from src.llm.cache import CacheMiss, CompletionStore, RecordingLLMClient, completion_key
+
+
+class CountingLLM(LLMClient):
+    """Fake model that echoes the last message word by word and counts requests."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.requests: list[list[dict[str, str]]] = []
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    def model_params(self) -> dict[str, object]:
+        return {"provider": "fake", "model": "m1"}
+
+    async def stream_completion(self, messages: list[dict[str, str]]) -> AsyncIterator[str]:
+        self.requests.append(messages)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            for word in messages[-1]["content"].split():
+                yield word + " "
+        finally:
+            self.running -= 1
+
+
+def _ask(text: str) -> list[dict[str, str]]:
+    return [{"role": "system", "content": "Be brief."}, {"role": "user", "content": text}]
+
+
+def test_completion_key_covers_messages_and_model():
+    params = {"model": "m1"}
+    assert completion_key(params, _ask("hi")) == completion_key(dict(params), _ask("hi"))
+    assert completion_key(params, _ask("hi")) != completion_key(params, _ask("hi!"))
+    assert completion_key(params, _ask("hi")) != completion_key({"model": "m2"}, _ask("hi"))
+
+
+async def test_recorder_replays_identical_prompts_without_the_model(tmp_path):
+    inner = CountingLLM()
+    llm = RecordingLLMClient(inner, CompletionStore(tmp_path))
+
+    assert await llm.complete(_ask("tell me more")) == "tell me more "
+    assert await llm.complete(_ask("tell me more")) == "tell me more "
+    assert await llm.complete(_ask("something else")) == "something else "
+    assert len(inner.requests) == 2
+    assert llm.stats()["hits"] == 1 and llm.stats()["misses"] == 2
+
+    # A new process (fresh store over the same directory) replays too
+    replay = RecordingLLMClient(CountingLLM(), CompletionStore(tmp_path), replay_only=True)
+    tokens = [t async for t in replay.stream_completion(_ask("tell me more"))]
+    assert tokens == ["tell ", "me ", "more "]
+    with pytest.raises(CacheMiss):
+        await replay.complete(_ask("never asked"))
+    assert replay.inner.requests == []
+
+
+async def test_recorder_skips_cut_off_streams(tmp_path):
+    store = CompletionStore(tmp_path)
+    llm = RecordingLLMClient(CountingLLM(), store)
+    stream = llm.stream_completion(_ask("one two three"))
+    assert await anext(stream) == "one "
+    await stream.aclose()
+    assert len(store) == 0
+
+
+class EchoAgent:
+    def __init__(self, llm: LLMClient) -> None:
+        self.llm = llm
+
+    async def respond(self, question: str) -> str:
+        if question == "boom":
+            raise RuntimeError("model down")
+        return await self.llm.complete(_ask(question)) + "Sources: notes.md"
+
+
+async def test_run_suite_is_concurrent_bounded_and_ordered(tmp_path):
+    inner = CountingLLM(delay=0.05)
+    llm = RecordingLLMClient(inner, CompletionStore(tmp_path))
+    questions = [{"question": f"q{i} python", "must_contain": ["python"]} for i in range(12)]
+    questions.append({"question": "boom"})
+    finished: list[int] = []
+
+    results = await run_suite(questions, lambda: EchoAgent(llm), concurrency=4, on_result=lambda i, r: finished.append(i))
+
+    assert [r["question"] for r in results] == [q["question"] for q in questions]
+    assert all(r["passed"] for r in results[:12])
+    assert not results[12]["passed"] and "model down" in results[12]["reasons"][0]
+    assert sorted(finished) == list(range(13))
+    assert inner.max_running == 4
+
+    # Rerun: everything replayed, the model is not called again
+    again = await run_suite(questions[:12], lambda: EchoAgent(llm), concurrency=4)
+    assert [r["response"] for r in again] == [r["response"] for r in results[:12]]
+    assert len(inner.requests) == 12
@@ -0,0 +1,312 @@
+"""Tests for the voice loop (fake agent, TTS and transport)."""
+import time
+from collections.abc import AsyncIterator
+
+import pytest
+
+from src.audio.vad import VoiceActivityDetector
+from src.loop import VoiceLoop
+from src.transport.base import TransportAdapter
+from src.tts.base import TTSClient
+from src.tts.fillers import FillerLibrary
+
+
+class FakeAgent:
+    def __init__(self, tokens: list[str]) -> None:
+        self.tokens = tokens
+        self.conversation_history: list[dict[str, str]] = []
+
+    async def respond_stream(self, user_message: str) -> AsyncIterator[str]:
+        for token in self.tokens:
+            yield token
+        self.conversation_history.append({"role": "assistant", "content": "".join(self.tokens)})
+
+
+class RecordingTTS(TTSClient):
+    """Echoes the text it receives as 'audio' so the test can inspect it."""
+
+    def __init__(self) -> None:
+        self.spoken: list[str] = []
+
+    async def synthesize(self, text: str) -> bytes:
+        return text.encode()
+
+    async def synthesize_stream(self, text_iter: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        async for text in text_iter:
+            self.spoken.append(text)
+            yield text.encode()
+
+
+class FakeTransport(TransportAdapter):
+    def __init__(self) -> None:
+        self.played: list[bytes] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def read_audio_frames(self) -> AsyncIterator[bytes]:
+        return
+        yield
+
+    async def write_audio(self, data, audio_format=None) -> None:
+        self.played.append(data)
+
+    async def write_audio_stream(self, audio_iter, audio_format=None) -> None:
+        async for chunk in audio_iter:
+            self.played.append(chunk)
+
+    def stop_playback(self) -> None:
+        self.interruptions += 1
+
+    def is_playing(self) -> bool:
+        return False
+
+
+def _make_loop(tokens: list[str]) -> tuple[VoiceLoop, FakeAgent, RecordingTTS]:
+    agent = FakeAgent(tokens)
+    tts = RecordingTTS()
+    loop = VoiceLoop(agent=agent, stt=None, tts=tts, transport=FakeTransport(), vad=None)
+    return loop, agent, tts
+
+
+@pytest.mark.asyncio
+async def test_voice_loop_does_not_speak_trailer():
+    tokens = ["We use ", "Python.", "\n\nSour", "ces:\n", "- guide.md: Tech", "\n\nStage: Stage 1"]
+    loop, agent, tts = _make_loop(tokens)
+
+    await loop._generate_and_speak("What stack?", 0.0)
+
+    assert "".join(tts.spoken) == "We use Python."
+    # Display/history still get the full response
+    assert agent.conversation_history[-1]["content"] == "".join(tokens)
+
+
+@pytest.mark.asyncio
+async def test_voice_loop_plays_filler_before_slow_answer():
+    loop, agent, tts = _make_loop(["Answer."])
+    fillers = FillerLibrary(tts, phrases={"en": ("Hmm.",)})
+    await fillers.prepare()
+    loop.fillers = fillers
+    loop.answer_latency.value_ms = 2000  # answers have been slow
+
+    await loop._generate_and_speak("Tell me about the stack", time.monotonic())
+
+    assert loop.transport.played == [b"Hmm.", b"Answer."]
+
+
+@pytest.mark.asyncio
+async def test_voice_loop_skips_filler_when_answer_is_fast():
+    loop, agent, tts = _make_loop(["Answer."])
+    fillers = FillerLibrary(tts, phrases={"en": ("Hmm.",)})
+    await fillers.prepare()
+    loop.fillers = fillers
+    loop.answer_latency.value_ms = 100
+
+    await loop._generate_and_speak("Tell me about the stack", time.monotonic())
+
+    assert loop.transport.played == [b"Answer."]
+    # The estimate follows the measured latency
+    assert loop.answer_latency.value_ms < 100
+
+
+class SlowAgent(FakeAgent):
+    """Streams a long answer slowly; records whether it was closed early."""
+
+    def __init__(self) -> None:
+        super().__init__(["Word. "] * 40)
+        self.closed_early = False
+
+    async def respond_stream(self, user_message: str) -> AsyncIterator[str]:
+        import asyncio
+
+        finished = False
+        try:
+            for token in self.tokens:
+                await asyncio.sleep(0.05)
+                yield token
+            finished = True
+        finally:
+            self.closed_early = not finished
+
+
+class BargeInTransport(FakeTransport):
+    """Plays the first chunk, then the candidate interrupts."""
+
+    async def write_audio_stream(self, audio_iter, audio_format=None) -> None:
+        async for chunk in audio_iter:
+            self.played.append(chunk)
+            break
+        self.stop_playback()
+        await audio_iter.aclose()
+
+
+@pytest.mark.asyncio
+async def test_voice_loop_stops_generating_after_barge_in():
+    agent = SlowAgent()
+    loop = VoiceLoop(agent=agent, stt=None, tts=RecordingTTS(), transport=BargeInTransport(), vad=None)
+
+    t0 = time.monotonic()
+    await loop._generate_and_speak("Tell me everything", t0)
+
+    # Back to listening right away, not after the 2 s answer
+    assert time.monotonic() - t0 < 0.5
+    assert agent.closed_early
+    assert len(loop.transport.played) == 1
+
+
+class FailingTTS(RecordingTTS):
+    """Speaks the first sentence, then the provider connection drops."""
+
+    async def synthesize_stream(self, text_iter: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        async for text in text_iter:
+            self.spoken.append(text)
+            yield text.encode()
+            raise ConnectionError("TTS connection lost")
+
+
+@pytest.mark.asyncio
+async def test_voice_loop_keeps_the_answer_when_tts_fails():
+    agent = SlowAgent()
+    agent.tokens = ["Word. "] * 6
+    loop = VoiceLoop(agent=agent, stt=None, tts=FailingTTS(), transport=FakeTransport(), vad=None)
+
+    await loop._generate_and_speak("Tell me everything", time.monotonic())
+
+    # Not a barge-in: the whole answer is generated (and goes to history)
+    assert not agent.closed_early
+
+
+class LoudVAD(VoiceActivityDetector):
+    """Voiced = any non-zero sample; needs 3 voiced frames like WebRtcVAD."""
+
+    def __init__(self) -> None:
+        super().__init__(silence_duration_ms=90, start_frames=3)
+
+    def speech_probability(self, audio) -> float:
+        return float(bool(audio.any()))
+
+
+class FramesTransport(FakeTransport):
+    def __init__(self, frames: list[bytes]) -> None:
+        super().__init__()
+        self.frames = frames
+
+    async def read_audio_frames(self) -> AsyncIterator[bytes]:
+        for frame in self.frames:
+            yield frame
+
+
+@pytest.mark.asyncio
+async def test_voice_loop_keeps_the_voiced_frames_before_speech_start():
+    import numpy as np
+
+    def frame(value: int) -> bytes:
+        return np.full(480, value, dtype="<i2").tobytes()
+
+    silence = [frame(0)] * 5
+    voiced = [frame(v) for v in range(1, 9)]
+    transport = FramesTransport(silence + [frame(100)] + silence + voiced + silence)
+    loop = VoiceLoop(agent=None, stt=None, tts=None, transport=transport, vad=LoudVAD(), console=False)
+    loop._running = True
+
+    audio = await loop._collect_utterance()
+
+    # Starts with the first voiced frame (not the isolated blip before it)
+    assert audio.startswith(voiced[0] + voiced[1] + voiced[2])
+    assert b"".join(voiced) in audio
+    assert frame(100) not in audio
+
+
+class FixedSTT:
+    def __init__(self) -> None:
+        self.calls: list[int] = []
+
+    async def transcribe(self, audio: bytes, sample_rate: int = 16000) -> str:
+        self.calls.append(len(audio))
+        return "Tell me about the stack"
+
+
+@pytest.mark.asyncio
+async def test_voice_loop_runs_headless_on_replayed_audio(tmp_path):
+    import wave
+
+    import numpy as np
+
+    from src.audio.vad import SpectralVAD
+    from src.transport.replay import FileReplayTransport
+
+    t = np.arange(16000) / 16000
+    voiced = 0.2 * sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 20))
+    audio = np.concatenate([np.zeros(8000), voiced, np.zeros(16000), voiced])
+    with wave.open(str(tmp_path / "candidate.wav"), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes((audio * 32767).astype("<i2").tobytes())
+
+    stt = FixedSTT()
+    transport = FileReplayTransport([tmp_path / "candidate.wav"], output_dir=tmp_path / "out", speed=0)
+    loop = VoiceLoop(
+        agent=FakeAgent(["We use ", "Python."]),
+        stt=stt,
+        tts=RecordingTTS(),
+        transport=transport,
+        vad=SpectralVAD(),
+    )
+    # Ends by itself once the input is used up
+    await loop.run()
+
+    assert len(stt.calls) == 2
+    assert [r["file"] for r in transport.replies] == ["reply_000.wav", "reply_001.wav"]
+    assert transport.replies[0]["started_s"] < transport.replies[1]["started_s"]
+    assert (tmp_path / "out" / "replies.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_voice_loops_run_concurrently_over_websockets():
+    import asyncio
+
+    import numpy as np
+
+    from src.audio.vad import SpectralVAD
+    from src.transport.websocket import WebSocketAudioTransport
+    from tests.test_transport import FakeWebSocket
+
+    t = np.arange(16000) / 16000
+    voiced = 0.2 * sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 20))
+    pcm = (np.concatenate([np.zeros(8000), voiced, np.zeros(24000)]) * 32767).astype("<i2").tobytes()
+
+    sessions = []
+    for _ in range(3):
+        ws = FakeWebSocket()
+        for i in range(0, len(pcm), 640):
+            ws.client_sends(pcm[i:i + 640])
+        loop = VoiceLoop(
+            agent=FakeAgent(["We use ", "Python."]),
+            stt=FixedSTT(),
+            tts=RecordingTTS(),
+            # The fake client sends everything at once: room for all of it
+            transport=WebSocketAudioTransport(ws, output_sample_rate=24000, max_input_ms=5000),
+            vad=SpectralVAD(),
+            console=False,
+        )
+        sessions.append((ws, loop))
+
+    async def client(ws):
+        # Hang up once the reply has been streamed back
+        while {"type": "audio_end"} not in ws.sent:
+            await asyncio.sleep(0.01)
+        ws.client_disconnects()
+
+    await asyncio.wait_for(
+        asyncio.gather(*(loop.run() for _, loop in sessions), *(client(ws) for ws, _ in sessions)),
+        timeout=5,
+    )
+    for ws, loop in sessions:
+        assert len(loop.stt.calls) == 1
+        assert any(isinstance(m, bytes) for m in ws.sent)
+        # Each session keeps its own history
+        assert len(loop.agent.conversation_history) == 1
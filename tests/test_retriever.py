@@ -1,4 +1,7 @@
 """Tests for knowledge retrieval."""
+import pytest
+
+from eval.retrieval import compare, evaluate_retrieval, ndcg_at_k, recall_at_k, reciprocal_rank
 from src.knowledge.loader import Chunk
 from src.knowledge.retriever import KnowledgeRetriever
 
@@ -59,3 +62,40 @@ def test_empty_retriever():
     retriever = KnowledgeRetriever([])
     results = retriever.retrieve("anything")
     assert results == []
+
+
+def test_ranking_metrics():
+    """Test recall@k, reciprocal rank and nDCG on a hand-checked ranking."""
+    ranked = ["a", "x", "b", "y"]
+    relevant = {"a", "b"}
+    assert recall_at_k(ranked, relevant, 1) == 0.5
+    assert recall_at_k(ranked, relevant, 3) == 1.0
+    assert reciprocal_rank(["x", "a"], relevant) == 0.5
+    assert reciprocal_rank(["x", "y"], relevant) == 0.0
+    assert ndcg_at_k(["a", "b"], relevant, 2) == pytest.approx(1.0)
+    assert ndcg_at_k(ranked, relevant, 3) == pytest.approx((1 + 1 / 2) / (1 + 1 / 1.5849625), rel=1e-6)
+
+
+def test_evaluate_retrieval_report():
+    """Test the offline retrieval report and the baseline comparison."""
+    retriever = KnowledgeRetriever(_make_chunks())
+    questions = [
+        {"question": "Python programming", "expected_source": "test.md", "expected_chunks": ["test.md:0"]},
+        {"question": "static typing", "expected_source": "test.md", "expected_chunks": ["test.md:1", "gone.md:0"]},
+        {"question": "quantum physics black holes", "expected_source": None},
+    ]
+    report = evaluate_retrieval(
+        retriever, questions, ks=(1, 3), repeat=2, known_chunks={c.chunk_id for c in retriever.chunks}
+    )
+    assert report["judged"] == {"chunk": 2, "source": 2}
+    assert report["metrics"]["chunk"]["mrr"] == 1.0
+    assert report["metrics"]["chunk"]["recall@1"] == 0.75
+    assert report["metrics"]["source"]["recall@1"] == 1.0
+    assert report["negatives"] == {"count": 1, "retrieved_rate": 0.0}
+    assert report["unknown_chunks"] == ["gone.md:0"]
+    assert report["latency_ms"]["p50"] > 0
+    assert [q["retrieved"][0] for q in report["queries"][:2]] == ["test.md:0", "test.md:1"]
+
+    worse = {"metrics": {"chunk": {**report["metrics"]["chunk"], "recall@1": 0.5}}}
+    assert compare(worse, report, tolerance=0.0) == ["chunk recall@1: 0.750 -> 0.500"]
+    assert compare(worse, report, tolerance=0.3) == []
@@ -0,0 +1,292 @@
+"""Tests for streamed Telegram replies, voice notes and the webhook (fakes, no network)."""
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+from src.audio.format import AudioFormat
+from src.stt.base import STTClient
+from src.stt.pool import STTPool
+from src.telegram_stream import StreamingReply, split_message
+from src.telegram_voice import StageTimer, VoicePipeline, duration_s
+from src.telegram_webhook import SECRET_HEADER, create_webhook_app
+from src.tts.base import TTSClient
+
+
+class FakeBot:
+    def __init__(self, retry_after_once: bool = False, failing_edits: int = 0) -> None:
+        self.messages: dict[int, str] = {}
+        self.calls: list[tuple[float, str, int]] = []
+        self.retry_after_once = retry_after_once
+        self.failing_edits = failing_edits
+        self.edit_attempts = 0
+
+    async def send_message(self, chat_id: int, text: str):
+        message_id = len(self.messages) + 1
+        self.messages[message_id] = text
+        self.calls.append((time.monotonic(), "send", message_id))
+        return SimpleNamespace(message_id=message_id)
+
+    async def edit_message_text(self, text: str, chat_id: int, message_id: int):
+        self.edit_attempts += 1
+        if self.failing_edits:
+            self.failing_edits -= 1
+            raise TelegramBadRequest(method=None, message="Bad Request: message can't be edited")
+        if self.retry_after_once:
+            self.retry_after_once = False
+            raise TelegramRetryAfter(method=None, message="Too Many Requests", retry_after=0.1)
+        self.messages[message_id] = text
+        self.calls.append((time.monotonic(), "edit", message_id))
+
+
+async def _tokens(words: list[str], delay: float) -> AsyncIterator[str]:
+    for word in words:
+        await asyncio.sleep(delay)
+        yield word
+
+
+def test_split_message_prefers_whitespace_and_keeps_full_pages_stable():
+    text = "word " * 30
+    pages = split_message(text, limit=40)
+    assert all(len(p) <= 40 for p in pages)
+    assert "".join(p + " " for p in pages).split() == text.split()
+    assert split_message(text + "more words", limit=40)[:-1] == pages[:-1]
+    assert split_message("x" * 90, limit=40) == ["x" * 40, "x" * 40, "x" * 10]
+
+
+@pytest.mark.asyncio
+async def test_reply_sends_on_first_token_and_edits_within_rate():
+    bot = FakeBot()
+    reply = StreamingReply(bot, chat_id=1, min_interval_s=0.05)
+    words = [f"w{i} " for i in range(40)]
+    t0 = time.monotonic()
+    text = await reply.stream(_tokens(words, 0.005))
+
+    first_call, kind, _ = bot.calls[0]
+    assert kind == "send" and first_call - t0 < 0.03
+    gaps = [b[0] - a[0] for a, b in zip(bot.calls, bot.calls[1:])]
+    assert min(gaps) >= 0.045
+    # Far fewer API calls than tokens, and the message ends up complete
+    assert len(bot.calls) < len(words) / 3
+    assert bot.messages == {1: text} and text == "".join(words)
+
+
+@pytest.mark.asyncio
+async def test_reply_continues_past_the_limit_and_backs_off_on_retry_after():
+    bot = FakeBot(retry_after_once=True)
+    reply = StreamingReply(bot, chat_id=1, min_interval_s=0.01, limit=50)
+    words = [f"token{i} " for i in range(30)]
+    text = await reply.stream(_tokens(words, 0.002))
+
+    assert list(bot.messages.values()) == split_message(text, limit=50)
+    assert len(bot.messages) == 5
+    assert reply.throttled == 1 and reply.interval_s >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_reply_retries_a_failed_final_edit():
+    bot = FakeBot(failing_edits=2)
+    reply = StreamingReply(bot, chat_id=1, min_interval_s=0.01)
+    reply.feed("Hello")
+    await asyncio.sleep(0.02)
+    reply.feed(" world")
+    await reply.finish()
+
+    assert bot.messages == {1: "Hello world"}
+    assert bot.edit_attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_reply_sends_the_rest_when_the_final_edit_keeps_failing():
+    bot = FakeBot(failing_edits=100)
+    reply = StreamingReply(bot, chat_id=1, min_interval_s=0.01, final_retries=2)
+    reply.feed("Hello")
+    await asyncio.sleep(0.02)
+    reply.feed(" world")
+    await reply.finish()
+
+    assert bot.messages == {1: "Hello", 2: "world"}
+    assert bot.edit_attempts == 3
+
+
+class SlowBlockingSTT(STTClient):
+    """Blocks its thread like local Whisper does."""
+
+    blocking = True
+
+    def __init__(self) -> None:
+        self.threads: set[int] = set()
+        self.async_calls = 0
+
+    async def transcribe(self, audio: bytes, sample_rate: int = 16000) -> str:
+        self.async_calls += 1
+        return await asyncio.to_thread(self.transcribe_blocking, audio, sample_rate)
+
+    def transcribe_blocking(self, audio: bytes, sample_rate: int = 16000) -> str:
+        self.threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return f"{len(audio)} bytes"
+
+
+@pytest.mark.asyncio
+async def test_stt_pool_runs_blocking_clients_off_the_loop():
+    clients: list[SlowBlockingSTT] = []
+
+    def factory() -> SlowBlockingSTT:
+        clients.append(SlowBlockingSTT())
+        return clients[-1]
+
+    pool = STTPool(factory, size=2)
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    t0 = time.monotonic()
+    results = await asyncio.gather(*(pool.transcribe(b"x" * n) for n in range(1, 5)))
+    elapsed = time.monotonic() - t0
+    tick_task.cancel()
+
+    assert results == [f"{n} bytes" for n in range(1, 5)]
+    assert len(clients) == 2  # capped at the pool size and reused
+    assert 0.09 < elapsed < 0.18  # two at a time
+    assert ticks > 10  # the event loop kept running meanwhile
+    assert threading.get_ident() not in clients[0].threads
+    # The sync hook runs on the worker thread, no coroutine crosses event loops
+    assert sum(client.async_calls for client in clients) == 0
+
+
+class ToneTTS(TTSClient):
+    audio_format = AudioFormat(sample_rate=24000)
+
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    async def synthesize(self, text: str) -> bytes:
+        self.texts.append(text)
+        t = np.arange(len(text) * 240) / 24000
+        return (np.sin(2 * np.pi * 220 * t) * 6000).astype("<i2").tobytes()
+
+    async def synthesize_stream(self, text_iter):
+        yield b""
+
+
+@pytest.mark.asyncio
+async def test_voice_pipeline_replies_with_an_opus_note():
+    tts = ToneTTS()
+    voice = VoicePipeline(STTPool(SlowBlockingSTT), tts=tts, max_reply_chars=60)
+    timer = StageTimer()
+    answer = "First sentence here. Second sentence is long enough to be cut off. Third."
+    speech = await voice.synthesize(answer)
+    timer.lap("tts")
+    note = await voice.encode(*speech)
+    timer.lap("encode")
+    voice.record(timer)
+
+    assert tts.texts == ["First sentence here."]
+    assert note[:4] == b"OggS"
+    pcm = await voice.decode(note)
+    assert abs(duration_s(pcm, 16000) - len(tts.texts[0]) / 100) < 0.05
+    stats = voice.stats()
+    assert stats["notes"] == 1 and set(stats) == {"notes", "tts_ms", "encode_ms"}
+    assert await VoicePipeline(STTPool(SlowBlockingSTT)).synthesize(answer) is None
+    voice.close()
+
+
+def _update(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Candidate"},
+            "text": text,
+        },
+    }
+
+
+async def test_webhook_acknowledges_at_once_and_refuses_a_wrong_secret():
+    dp = Dispatcher()
+    bot = Bot("123456:TEST-token")
+    release = asyncio.Event()
+    seen: list[tuple[int, str]] = []
+
+    @dp.message()
+    async def on_message(message: Message) -> None:
+        await release.wait()  # a slow handler must not hold up the response
+        seen.append((message.chat.id, message.text))
+
+    app = create_webhook_app(dp, bot, secret_token="s3cret", path="/hook")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bot") as client:
+        ok = {SECRET_HEADER: "s3cret"}
+        assert (await client.post("/hook", json=_update(1, 7, "hi"))).status_code == 403
+        assert (await client.post("/hook", json=_update(1, 7, "hi"), headers={SECRET_HEADER: "nope"})).status_code == 403
+        assert (await client.post("/hook", content=b"{not json", headers=ok)).status_code == 400
+        assert (await client.post("/hook", json={"message": {}}, headers=ok)).status_code == 400
+
+        response = await asyncio.wait_for(client.post("/hook", json=_update(2, 7, "hello"), headers=ok), 1)
+        assert response.status_code == 200
+        assert seen == []
+        release.set()
+        for _ in range(100):
+            if seen:
+                break
+            await asyncio.sleep(0.01)
+        assert seen == [(7, "hello")]
+        assert app.state.stats == {"received": 1, "refused": 2, "failed": 0}
+        assert (await client.get("/healthz")).json()["in_flight"] == 0
+    await bot.session.close()
+
+
+async def test_failed_answer_tells_the_candidate(monkeypatch):
+    from src import telegram_bot
+
+    def broken(key: str):
+        raise RuntimeError("store unavailable")
+
+    monkeypatch.setattr(telegram_bot, "_sessions", SimpleNamespace(open=broken))
+    answers: list[str] = []
+
+    async def answer(text: str) -> None:
+        answers.append(text)
+
+    message = SimpleNamespace(voice=None, text="Hi", answer=answer)
+    with pytest.raises(RuntimeError):
+        await telegram_bot._process(7, [message])
+    assert answers == [telegram_bot.FAILED]
+
+
+async def test_rejected_commands_and_full_sessions_get_a_reply(monkeypatch):
+    from src import telegram_bot
+    from src.agent.sessions import SessionLimitError
+
+    def full(key: str):
+        raise SessionLimitError("2 sessions are in use")
+
+    monkeypatch.setattr(telegram_bot, "_sessions", SimpleNamespace(open=full))
+    monkeypatch.setattr(telegram_bot, "_queue", SimpleNamespace(submit=lambda *a, **kw: False))
+    answers: list[str] = []
+
+    async def answer(text: str) -> None:
+        answers.append(text)
+
+    message = SimpleNamespace(chat=SimpleNamespace(id=7), voice=None, text="/newchat", answer=answer)
+    await telegram_bot.cmd_newchat(message)
+    assert answers == [telegram_bot.BUSY]
+
+    await telegram_bot._process(7, [message])
+    assert answers[-1] == telegram_bot.SESSION_LIMIT
@@ -0,0 +1,202 @@
+"""Tests for the file replay transport."""
+import json
+import time
+import wave
+from collections.abc import AsyncIterator
+
+import numpy as np
+import pytest
+
+from src.audio.format import AudioFormat
+from src.transport.replay import FileReplayTransport
+
+
+def _write_wav(path, samples: np.ndarray, rate: int, channels: int = 1) -> None:
+    pcm = np.repeat((samples * 32767).astype("<i2"), channels)
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+
+
+async def _aiter(items: list[bytes]) -> AsyncIterator[bytes]:
+    for item in items:
+        yield item
+
+
+@pytest.mark.asyncio
+async def test_replay_reads_wav_and_raw_as_frames(tmp_path):
+    _write_wav(tmp_path / "a.wav", np.full(48000, 0.25), 48000, channels=2)
+    (tmp_path / "b.pcm").write_bytes(np.full(8000, 1000, dtype="<i2").tobytes())
+    transport = FileReplayTransport(
+        [tmp_path / "a.wav", tmp_path / "b.pcm"], speed=0, gap_ms=300, tail_ms=600
+    )
+    await transport.start()
+    frames = [f async for f in transport.read_audio_frames()]
+    await transport.stop()
+
+    assert all(len(f) == 960 for f in frames)
+    audio = np.frombuffer(b"".join(frames), dtype="<i2")
+    # 1 s (resampled to 16 kHz, downmixed) + gap + 0.5 s + tail
+    assert abs(len(audio) - 16000 * 2.4) < 480
+    assert abs(int(audio[8000]) - 8192) < 50
+    assert np.all(audio[16000 + 480:16000 + 4000] == 0)
+    assert np.all(audio[20800 + 100:28800 - 100] == 1000)
+    # The input has ended: the next read yields nothing
+    assert [f async for f in transport.read_audio_frames()] == []
+
+
+@pytest.mark.asyncio
+async def test_replay_paces_input_in_real_time(tmp_path):
+    _write_wav(tmp_path / "a.wav", np.zeros(16000), 16000)
+    transport = FileReplayTransport([tmp_path / "a.wav"], speed=10, tail_ms=0)
+    await transport.start()
+    t0 = time.monotonic()
+    frames = [f async for f in transport.read_audio_frames()]
+    elapsed = time.monotonic() - t0
+    assert len(frames) == 34
+    assert 0.08 < elapsed < 0.3
+
+
+@pytest.mark.asyncio
+async def test_replay_records_replies_with_timestamps(tmp_path):
+    transport = FileReplayTransport([], output_dir=tmp_path, speed=0)
+    await transport.start()
+    pcm = np.full(24000, 500, dtype="<i2").tobytes()
+    await transport.write_audio_stream(_aiter([pcm[:1001], pcm[1001:]]), AudioFormat(sample_rate=24000))
+    await transport.stop()
+
+    replies = json.loads((tmp_path / "replies.json").read_text())
+    assert replies[0]["file"] == "reply_000.wav"
+    assert replies[0]["duration_s"] == 1.0
+    assert not replies[0]["interrupted"]
+    with wave.open(str(tmp_path / "reply_000.wav"), "rb") as wf:
+        assert wf.getframerate() == 24000
+        assert wf.readframes(wf.getnframes()) == pcm
+
+
+@pytest.mark.asyncio
+async def test_replay_playback_can_be_interrupted(tmp_path):
+    import asyncio
+
+    transport = FileReplayTransport([], output_dir=tmp_path, speed=1)
+    await transport.start()
+    pcm = np.full(24000 * 5, 500, dtype="<i2").tobytes()
+
+    async def barge_in():
+        await asyncio.sleep(0.1)
+        assert transport.is_playing()
+        transport.stop_playback()
+
+    task = asyncio.create_task(barge_in())
+    await asyncio.wait_for(transport.write_audio_stream(_aiter([pcm])), timeout=2)
+    await task
+    assert transport.replies[0]["interrupted"]
+    assert not transport.is_playing()
+
+
+class FakeWebSocket:
+    """Starlette-style WebSocket: scripted client messages, recorded sends."""
+
+    def __init__(self) -> None:
+        import asyncio
+
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent: list = []
+
+    def client_sends(self, data) -> None:
+        key = "bytes" if isinstance(data, bytes) else "text"
+        self.incoming.put_nowait({"type": "websocket.receive", key: data})
+
+    def client_disconnects(self) -> None:
+        self.incoming.put_nowait({"type": "websocket.disconnect"})
+
+    async def receive(self) -> dict:
+        return await self.incoming.get()
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+
+@pytest.mark.asyncio
+async def test_websocket_reframes_client_slices_until_disconnect():
+    from src.transport.websocket import WebSocketAudioTransport
+
+    ws = FakeWebSocket()
+    transport = WebSocketAudioTransport(ws, frame_duration_ms=30)
+    await transport.start()
+    pcm = np.arange(320 * 9, dtype="<i2").tobytes()
+    for i in range(0, len(pcm), 640):  # 20 ms slices
+        ws.client_sends(pcm[i:i + 640])
+    ws.client_disconnects()
+
+    frames = [f async for f in transport.read_audio_frames()]
+    assert [len(f) for f in frames] == [960] * 6
+    assert b"".join(frames) == pcm
+    assert [f async for f in transport.read_audio_frames()] == []
+    await transport.stop()
+
+
+@pytest.mark.asyncio
+async def test_websocket_input_drops_oldest_when_loop_falls_behind():
+    import asyncio
+
+    from src.transport.websocket import WebSocketAudioTransport
+
+    ws = FakeWebSocket()
+    transport = WebSocketAudioTransport(ws, frame_duration_ms=30, max_input_ms=300)
+    await transport.start()
+    for k in range(25):
+        ws.client_sends(np.full(480, k, dtype="<i2").tobytes())
+    await asyncio.sleep(0.01)
+
+    frames = []
+    async for frame in transport.read_audio_frames():
+        frames.append(int(np.frombuffer(frame, dtype="<i2")[0]))
+        if len(frames) == 10:
+            break
+    assert frames == list(range(15, 25))
+    assert transport.frames_dropped == 15
+    await transport.stop()
+
+
+@pytest.mark.asyncio
+async def test_websocket_streams_reply_and_handles_interrupt():
+    import asyncio
+
+    from src.transport.websocket import WebSocketAudioTransport
+
+    ws = FakeWebSocket()
+    transport = WebSocketAudioTransport(ws, output_sample_rate=24000, ahead_ms=100)
+    await transport.start()
+
+    short = np.full(2400, 700, dtype="<i2").tobytes()
+    await transport.write_audio_stream(_aiter([short[:1001], short[1001:]]), AudioFormat(sample_rate=24000))
+    assert ws.sent[0] == {"type": "audio_start", "sample_rate": 24000, "encoding": "pcm_s16le"}
+    assert ws.sent[-1] == {"type": "audio_end"}
+    assert sum(len(m) for m in ws.sent if isinstance(m, bytes)) == len(short)
+
+    # A long reply is paced, so the client's interrupt cuts it short
+    ws.sent.clear()
+    long = np.full(24000 * 5, 700, dtype="<i2")
+
+    async def chunks():
+        for i in range(0, len(long), 2400):
+            yield long[i:i + 2400].tobytes()
+
+    async def barge_in():
+        await asyncio.sleep(0.15)
+        assert transport.is_playing()
+        ws.client_sends(json.dumps({"type": "interrupt"}))
+
+    task = asyncio.create_task(barge_in())
+    await asyncio.wait_for(transport.write_audio_stream(chunks(), AudioFormat(sample_rate=24000)), timeout=2)
+    await task
+    assert ws.sent[-1] == {"type": "clear"}
+    assert sum(len(m) for m in ws.sent if isinstance(m, bytes)) < 24000 * 2
+    assert not transport.is_playing()
+    await transport.stop()
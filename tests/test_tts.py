@@ -0,0 +1,286 @@
+"""Tests for TTS streaming helpers (no network)."""
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from src.tts.pipeline import SentencePipeline
+
+
+async def _aiter(items: list[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+
+class FakeSynth:
+    """Fake per-sentence synthesizer with per-sentence latency."""
+
+    def __init__(self, delays: dict[str, float]) -> None:
+        self.delays = delays
+        self.active = 0
+        self.max_active = 0
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+
+    async def __call__(self, text: str) -> AsyncIterator[bytes]:
+        self.started.append(text)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(text, 0.01))
+            for part in ("a", "b"):
+                yield f"{text}:{part}".encode()
+        except asyncio.CancelledError:
+            self.cancelled.append(text)
+            raise
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_pipeline_preserves_order():
+    synth = FakeSynth({"one": 0.05, "two": 0.01, "three": 0.0})
+    pipeline = SentencePipeline(synth, lookahead=2)
+    chunks = [c async for c in pipeline.stream(_aiter(["one", "two", "three"]))]
+    assert chunks == [
+        b"one:a", b"one:b", b"two:a", b"two:b", b"three:a", b"three:b",
+    ]
+    # All three requests were in flight together
+    assert synth.max_active == 3
+
+
+@pytest.mark.asyncio
+async def test_pipeline_bounds_lookahead():
+    synth = FakeSynth({})
+    pipeline = SentencePipeline(synth, lookahead=1)
+    sentences = [f"s{i}" for i in range(6)]
+    chunks = [c async for c in pipeline.stream(_aiter(sentences))]
+    assert len(chunks) == 12
+    assert synth.max_active <= 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_cancels_outstanding_on_close():
+    synth = FakeSynth({"one": 0.0, "two": 1.0, "three": 1.0})
+    pipeline = SentencePipeline(synth, lookahead=2)
+    stream = pipeline.stream(_aiter(["one", "two", "three"]))
+    first = await stream.__anext__()
+    assert first == b"one:a"
+    await stream.aclose()
+    assert set(synth.cancelled) == {"two", "three"}
+    assert synth.active == 0
+
+
+@pytest.mark.asyncio
+async def test_elevenlabs_reuses_shared_client():
+    import httpx
+
+    from src.resources import ResourceRegistry
+    from src.tts.elevenlabs_tts import ElevenLabsTTS
+
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json=[])
+        text = request.read().decode()
+        return httpx.Response(200, content=str(len(text)).encode())
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    resources = ResourceRegistry()
+    tts = ElevenLabsTTS(api_key="k", voice_id="v", client=client)
+    resources.register(tts)
+    await resources.warmup()
+
+    audio = [c async for c in tts.synthesize_stream(_aiter(["Hello there world. ", "Second sentence here."]))]
+    assert len(audio) == 2
+    assert requests == ["/v1/models", "/v1/text-to-speech/v/stream", "/v1/text-to-speech/v/stream"]
+
+    await resources.aclose()
+    # Shared client belongs to the caller/registry, not the TTS
+    assert not client.is_closed
+    await client.aclose()
+
+
+class FakeElevenLabsServer:
+    """Local stand-in for the ElevenLabs text-input streaming WebSocket.
+
+    Buffers pushed text and answers each flush (or end of stream) with the
+    buffered text as "audio", followed by isFinal on end of stream.
+    """
+
+    def __init__(self) -> None:
+        self.messages: list[dict] = []
+        self.url = ""
+        self._server = None
+
+    async def __aenter__(self) -> "FakeElevenLabsServer":
+        import websockets
+
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/v1"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, ws) -> None:
+        import base64
+        import json
+
+        pending: list[str] = []
+        async for raw in ws:
+            msg = json.loads(raw)
+            self.messages.append(msg)
+            if "voice_settings" in msg:
+                continue
+            pending.append(msg["text"])
+            end = msg["text"] == ""
+            if (msg.get("flush") or end) and "".join(pending).strip():
+                audio = base64.b64encode("".join(pending).encode()).decode()
+                await ws.send(json.dumps({"audio": audio}))
+                pending = []
+            if end:
+                await ws.send(json.dumps({"audio": None, "isFinal": True}))
+
+
+@pytest.mark.asyncio
+async def test_websocket_tts_streams_audio_before_text_ends():
+    from src.tts.elevenlabs_ws import ElevenLabsWebSocketTTS
+
+    release = asyncio.Event()
+
+    async def tokens() -> AsyncIterator[str]:
+        for token in ["Hi", " there", ".", " How", " are"]:
+            yield token
+        await release.wait()
+        yield " you?"
+
+    async with FakeElevenLabsServer() as server:
+        tts = ElevenLabsWebSocketTTS(api_key="k", voice_id="v", base_url=server.url)
+        stream = tts.synthesize_stream(tokens())
+        # First flushed sentence arrives while the LLM is still "thinking"
+        first = await asyncio.wait_for(stream.__anext__(), timeout=2)
+        assert first.strip() == b"Hi there."
+        release.set()
+        rest = [c async for c in stream]
+
+    assert rest == [b" How are you?"]
+    assert server.messages[0]["voice_settings"]
+    assert server.messages[-1] == {"text": ""}
+
+
+@pytest.mark.asyncio
+async def test_websocket_tts_flushes_before_a_conjunction():
+    from src.tts.elevenlabs_ws import ElevenLabsWebSocketTTS
+
+    # The segmenter cuts before "because" only once the word after it arrives
+    tokens = ["I", " moved", " to", " Berlin", " last", " year", " because", " the", " team", " was", " there."]
+    async with FakeElevenLabsServer() as server:
+        tts = ElevenLabsWebSocketTTS(api_key="k", voice_id="v", base_url=server.url)
+        chunks = await asyncio.wait_for(_collect(tts.synthesize_stream(_aiter(tokens))), timeout=2)
+
+    assert [c.decode().strip() for c in chunks] == [
+        "I moved to Berlin last year",
+        "because the team was there.",
+    ]
+    sent = "".join(m["text"] for m in server.messages[1:])
+    assert sent.split() == "".join(tokens).split()
+
+
+@pytest.mark.asyncio
+async def test_websocket_tts_ends_the_stream_when_the_text_side_fails():
+    from src.tts.elevenlabs_ws import ElevenLabsWebSocketTTS
+
+    async def failing() -> AsyncIterator[str]:
+        yield "Hi there."
+        raise RuntimeError("LLM went away")
+
+    async with FakeElevenLabsServer() as server:
+        tts = ElevenLabsWebSocketTTS(api_key="k", voice_id="v", base_url=server.url)
+        with pytest.raises(RuntimeError, match="LLM went away"):
+            await asyncio.wait_for(_collect(tts.synthesize_stream(failing())), timeout=2)
+
+    assert server.messages[-1] == {"text": ""}
+
+
+async def _collect(stream: AsyncIterator[bytes]) -> list[bytes]:
+    return [chunk async for chunk in stream]
+
+
+def _segment_all(text: str, **kwargs) -> list[str]:
+    import re
+
+    from src.tts.segmenter import AdaptiveSegmenter
+
+    segmenter = AdaptiveSegmenter(**kwargs)
+    segments: list[str] = []
+    for token in re.findall(r"\s*\S+|\s+", text):
+        segments.extend(segmenter.push(token))
+    tail = segmenter.flush()
+    return segments + ([tail] if tail else [])
+
+
+def test_segmenter_flushes_first_clause_early():
+    segments = _segment_all(
+        "Oh that's really cool, we had a similar problem when building our graph. "
+        "It took three versions. Then we moved to ClickHouse and it got faster!"
+    )
+    assert segments[0] == "Oh that's really cool,"
+    # Later segments are whole sentences, short ones merged for prosody
+    assert segments[1] == "we had a similar problem when building our graph."
+    assert segments[2] == "It took three versions. Then we moved to ClickHouse and it got faster!"
+
+
+def test_segmenter_russian_punctuation_and_abbreviations():
+    segments = _segment_all(
+        "Слушай, это интересно — расскажи подробнее, какие модели вы использовали? "
+        "Мы, т.е. наша команда, сделали 3.5 версии агента. «Было непросто!» Ну да."
+    )
+    # The dash comes after only 3 words, so the first cut is the next comma
+    assert segments[0] == "Слушай, это интересно — расскажи подробнее,"
+    assert "т.е. наша команда" in segments[1]
+    assert segments[1].endswith("3.5 версии агента.")
+    assert segments[2] == "«Было непросто!» Ну да."
+
+
+def test_segmenter_caps_first_segment_words():
+    text = "I think the main thing we are looking for is somebody who owns the pipeline"
+    segments = _segment_all(text, first_max_words=6)
+    assert segments[0] == "I think the main thing we"
+
+
+@pytest.mark.asyncio
+async def test_segment_text_cuts_first_segment_on_stall():
+    from src.tts.segmenter import AdaptiveSegmenter, segment_text
+
+    async def stalling() -> AsyncIterator[str]:
+        for token in ["Well", " you", " know"]:
+            yield token
+        await asyncio.sleep(0.3)
+        yield " what we did."
+
+    segmenter = AdaptiveSegmenter(first_max_wait_s=0.05)
+    segments = [s async for s in segment_text(stalling(), segmenter)]
+    assert segments == ["Well you", "know what we did."]
+
+
+@pytest.mark.asyncio
+async def test_filler_library_picks_language_and_avoids_repeats():
+    from src.tts.elevenlabs_tts import DummyTTS
+    from src.tts.fillers import FillerLibrary
+
+    class EchoTTS(DummyTTS):
+        async def synthesize(self, text: str) -> bytes:
+            return text.encode()
+
+    fillers = FillerLibrary(EchoTTS(), phrases={"en": ("Hmm.", "Right."), "ru": ("Ага.",)}, seed=1)
+    await fillers.prepare()
+
+    assert len(fillers) == 3
+    assert fillers.pick("Расскажи про стек") == ("Ага.", "Ага.".encode())
+    picks = [fillers.pick("Tell me more")[0] for _ in range(4)]
+    assert all(a != b for a, b in zip(picks, picks[1:]))
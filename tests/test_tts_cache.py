@@ -0,0 +1,149 @@
+"""Tests for the on-disk TTS audio cache."""
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import httpx
+import pytest
+
+from src.tts.base import TTSClient
+from src.tts.cache import AudioCache, CachedTTS, cache_key
+from src.tts.elevenlabs_tts import ElevenLabsTTS
+
+
+class CountingTTS(TTSClient):
+    """Fake provider that returns the text as audio and counts requests."""
+
+    def __init__(self) -> None:
+        self.requests: list[str] = []
+
+    def voice_params(self) -> dict[str, object]:
+        return {"provider": "fake", "voice_id": "v1"}
+
+    async def synthesize(self, text: str) -> bytes:
+        self.requests.append(text)
+        return text.encode()
+
+    async def synthesize_stream(self, text_iter: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        async for text in text_iter:
+            self.requests.append(text)
+            yield text.encode()
+
+
+async def _aiter(items: list[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+
+def test_cache_key_normalizes_whitespace():
+    voice = {"voice_id": "v1"}
+    assert cache_key(voice, "Hello   there.\n") == cache_key(voice, "Hello there.")
+    assert cache_key(voice, "Hello there.") != cache_key({"voice_id": "v2"}, "Hello there.")
+
+
+@pytest.mark.asyncio
+async def test_repeated_sentences_hit_cache(tmp_path: Path):
+    inner = CountingTTS()
+    tts = CachedTTS(inner, AudioCache(str(tmp_path)))
+    text = ["Привет! Расскажи о себе. ", "Hello again, how are you?"]
+
+    first = b"".join([c async for c in tts.synthesize_stream(_aiter(text))])
+    second = b"".join([c async for c in tts.synthesize_stream(_aiter(text))])
+
+    assert first == second
+    assert len(inner.requests) == 2
+    stats = tts.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+    # Index is rebuilt from disk on restart
+    reopened = CachedTTS(inner, AudioCache(str(tmp_path)))
+    assert await reopened.synthesize("Hello again, how are you?") == b"Hello again, how are you?"
+    assert len(inner.requests) == 2
+
+
+def test_lru_eviction(tmp_path: Path):
+    cache = AudioCache(str(tmp_path), max_bytes=10)
+    cache.put("a" * 64, b"1234")
+    cache.put("b" * 64, b"1234")
+    cache.get("a" * 64)  # a is now most recent
+    cache.put("c" * 64, b"1234")
+    assert "a" * 64 in cache
+    assert "b" * 64 not in cache
+    assert not cache.path("b" * 64).exists()
+    assert cache.total_bytes == 8
+    assert cache.evictions == 1
+
+
+class ChunkedTTS(CountingTTS):
+    """Streams each segment in two halves; must be driven per segment."""
+
+    async def synthesize_stream(self, text_iter: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        raise AssertionError("CachedTTS should call synthesize_segment")
+        yield b""
+
+    async def synthesize_segment(self, text: str) -> AsyncIterator[bytes]:
+        self.requests.append(text)
+        half = len(text) // 2
+        yield text[:half].encode()
+        await asyncio.sleep(0.05)
+        yield text[half:].encode()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_stream_is_not_cached(tmp_path: Path):
+    inner = ChunkedTTS()
+    tts = CachedTTS(inner, AudioCache(str(tmp_path)), lookahead=0)
+    stream = tts.synthesize_stream(_aiter(["First sentence here. ", "Second sentence here."]))
+    chunks = [await stream.__anext__() for _ in range(3)]  # all of segment 1, half of 2
+    await stream.aclose()
+
+    first, second = inner.requests
+    assert b"".join(chunks[:2]) == first.encode()
+    voice = inner.voice_params()
+    assert cache_key(voice, first) in tts.cache
+    assert cache_key(voice, second) not in tts.cache
+    assert len(tts.cache) == 1
+    assert not list(tmp_path.glob("??/*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_entry_evicted_after_lookup_falls_back_to_provider(tmp_path: Path):
+    inner = CountingTTS()
+    tts = CachedTTS(inner, AudioCache(str(tmp_path)))
+    key = cache_key(inner.voice_params(), "Hello there.")
+    tts.cache.put(key, b"stale")
+    tts.cache.path(key).unlink()  # a concurrent writer evicted it
+
+    audio = b"".join([c async for c in tts.synthesize_stream(_aiter(["Hello there."]))])
+    assert audio == b"Hello there."
+    assert inner.requests == ["Hello there."]
+    assert tts.stats()["misses"] == 1
+
+
+class _CutOffStream(httpx.AsyncByteStream):
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield b"x" * 4096
+        raise httpx.ReadError("connection reset")
+
+
+@pytest.mark.asyncio
+async def test_provider_error_mid_stream_is_not_cached(tmp_path: Path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if b"Broken" in request.read():
+            return httpx.Response(200, stream=_CutOffStream())
+        return httpx.Response(200, content=b"y" * 100)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    inner = ElevenLabsTTS(api_key="k", voice_id="v", client=client)
+    tts = CachedTTS(inner, AudioCache(str(tmp_path)), lookahead=0)
+    sentences = ["Broken sentence here. ", "Second sentence here."]
+
+    audio = b"".join([c async for c in tts.synthesize_stream(_aiter(sentences))])
+    await client.aclose()
+
+    assert audio == b"x" * 4096 + b"y" * 100  # the answer went on after the failure
+    voice = inner.voice_params()
+    assert cache_key(voice, sentences[0]) not in tts.cache
+    assert tts.cache.get(cache_key(voice, sentences[1])) == b"y" * 100
+    assert not list(tmp_path.glob("??/*.tmp"))
@@ -0,0 +1,289 @@
+"""Tests for the web app and token coalescing (fake agent, TestClient)."""
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+import pytest
+
+from src.coalesce import TokenCoalescer, stream_tokens, token_message
+
+
+async def _timed_tokens(tokens: list[tuple[float, str]]) -> AsyncIterator[str]:
+    for delay, token in tokens:
+        await asyncio.sleep(delay)
+        yield token
+
+
+def test_token_message_is_valid_json():
+    text = 'He said "hi"\n\\ — ok ✓'
+    assert json.loads(token_message(text)) == {"type": "token", "text": text}
+
+
+@pytest.mark.asyncio
+async def test_coalescer_sends_first_token_at_once_then_batches():
+    sent: list[dict] = []
+
+    async def send(frame: str) -> None:
+        sent.append(json.loads(frame))
+
+    tokens = [(0.0, "Hello")] + [(0.001, f" t{i}") for i in range(20)]
+    full = await stream_tokens(send, _timed_tokens(tokens), window_ms=200)
+
+    assert sent[0] == {"type": "token", "text": "Hello"}
+    assert sent[-1] == {"type": "done", "text": full}
+    assert "".join(m["text"] for m in sent[:-1]) == full
+    assert len(sent) <= 4
+
+
+@pytest.mark.asyncio
+async def test_coalescer_flushes_on_timer_when_stream_stalls():
+    sent: list[str] = []
+
+    async def send(frame: str) -> None:
+        sent.append(json.loads(frame)["text"])
+
+    coalescer = TokenCoalescer(send, window_ms=20)
+    await coalescer.add("a")
+    await coalescer.add("b")
+    assert sent == ["a"]
+    await asyncio.sleep(0.06)  # nothing else arrives: the timer sends "b"
+    assert sent == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_coalescer_logs_a_failed_timed_flush(caplog):
+    sent: list[str] = []
+
+    async def send(frame: str) -> None:
+        if sent:
+            raise ConnectionError("client went away")
+        sent.append(frame)
+
+    coalescer = TokenCoalescer(send, window_ms=20)
+    await coalescer.add("a")
+    await coalescer.add("b")
+    await asyncio.sleep(0.06)
+    assert "Timed token flush failed: client went away" in caplog.text
+    assert coalescer._timed_flush is None
+
+
+@pytest.mark.asyncio
+async def test_coalescer_window_zero_sends_every_token():
+    sent: list[str] = []
+
+    async def send(frame: str) -> None:
+        sent.append(frame)
+
+    await stream_tokens(send, _timed_tokens([(0, "a"), (0, "b"), (0, "c")]), window_ms=0)
+    assert len(sent) == 4
+
+
+class FakeAgent:
+    def __init__(self) -> None:
+        self.conversation_history: list[dict[str, str]] = []
+
+    async def respond_stream(self, user_message: str) -> AsyncIterator[str]:
+        self.conversation_history.append({"role": "user", "content": user_message})
+        for token in ["You ", "asked: ", user_message]:
+            yield token
+
+
+def test_web_app_streams_and_resumes_sessions():
+    from fastapi.testclient import TestClient
+
+    from src.config import Settings
+    from src.web_app import create_app
+
+    app = create_app(Settings(ws_coalesce_ms=0), agent_factory=FakeAgent)
+    client = TestClient(app)
+    with client.websocket_connect("/ws") as ws:
+        token = ws.receive_json()["token"]
+        ws.send_text("hi")
+        messages = []
+        while not messages or messages[-1]["type"] != "done":
+            messages.append(ws.receive_json())
+        assert messages[-1]["text"] == "You asked: hi"
+
+    # Reconnecting with the token continues the same conversation
+    with client.websocket_connect(f"/ws?session={token}") as ws:
+        assert ws.receive_json()["token"] == token
+    stats = client.get("/sessions").json()
+    assert stats["sessions"] == 1 and stats["connected"] == 0
+
+
+def test_session_token_names_its_worker():
+    from src.server import session_prefix, worker_for
+
+    token = session_prefix(3) + "abc"
+    assert worker_for(f"GET /ws?session={token} HTTP/1.1\r\nHost: x\r\n".encode()) == 3
+    assert worker_for(b"GET /ws?lang=en&session=w12.xyz HTTP/1.1\r\n") == 12
+    assert worker_for(b"GET /ws HTTP/1.1\r\nReferer: /?session=w1.abc\r\n") is None
+    assert worker_for(b"GET /ws?session=abc HTTP/1.1\r\n") is None
+
+
+def test_stats_board_aggregates_fresh_workers(tmp_path):
+    from src.server import StatsBoard, render_metrics
+
+    StatsBoard(tmp_path, worker=1, workers=3).publish({"sessions": 2, "memory_bytes": 6000, "max_session_bytes": 4000})
+    stale = tmp_path / "worker-2.json"
+    stale.write_text(json.dumps({"sessions": 50, "published_at": 0}))
+
+    board = StatsBoard(tmp_path, worker=0, workers=3)
+    snapshots = board.collect({"sessions": 1, "memory_bytes": 3000, "max_session_bytes": 3000})
+    assert sorted(snapshots) == [0, 1]  # worker 2 has gone quiet
+
+    metrics = render_metrics(snapshots, workers=3)
+    assert "interview_workers_alive 2\n" in metrics
+    assert "interview_sessions 3\n" in metrics
+    assert "interview_max_session_bytes 4000\n" in metrics
+    assert "interview_mean_session_bytes 3000\n" in metrics
+    assert 'interview_worker_sessions{worker="1"} 2\n' in metrics
+
+
+def test_web_app_health_and_metrics(tmp_path):
+    from fastapi.testclient import TestClient
+
+    from src.config import Settings
+    from src.server import StatsBoard
+    from src.web_app import create_app
+
+    client = TestClient(create_app(Settings(), agent_factory=FakeAgent))
+    assert client.get("/healthz").json()["status"] == "ok"
+    with client.websocket_connect("/ws?session=w9.gone") as ws:
+        ws.receive_json()
+    metrics = client.get("/metrics").text
+    assert "interview_sessions 1\n" in metrics
+    assert "interview_resume_misses 1\n" in metrics
+
+    # Worker 1 of 2 whose sibling never reported: degraded, tokens say "w1."
+    board = StatsBoard(tmp_path, worker=1, workers=2)
+    client = TestClient(create_app(Settings(), agent_factory=FakeAgent, board=board))
+    response = client.get("/healthz")
+    assert response.status_code == 503 and response.json()["alive"] == [1]
+    with client.websocket_connect("/ws") as ws:
+        assert ws.receive_json()["token"].startswith("w1.")
+
+
+class ScriptedVAD:
+    """Speech starts on the first frame and ends on the second."""
+
+    pre_roll: list[bytes] = []
+
+    def __init__(self) -> None:
+        self.frames = 0
+
+    def process_frame(self, frame: bytes) -> str:
+        self.frames += 1
+        return "speech_start" if self.frames == 1 else "speech_end"
+
+    def reset(self) -> None:
+        self.frames = 0
+
+    def stats(self) -> dict[str, float]:
+        return {"frames": self.frames, "mean_cost_us": 0.0, "max_cost_us": 0.0}
+
+
+def test_voice_sessions_transcribe_concurrently():
+    import threading
+    import time
+
+    from fastapi.testclient import TestClient
+
+    from src.config import Settings
+    from src.stt.base import STTClient
+    from src.tts.base import TTSClient
+    from src.web_app import create_app
+
+    class BlockingSTT(STTClient):
+        blocking = True
+        spans: list[tuple[float, float]] = []
+        lock = threading.Lock()
+
+        async def transcribe(self, audio: bytes, sample_rate: int = 16000) -> str:
+            return self.transcribe_blocking(audio, sample_rate)
+
+        def transcribe_blocking(self, audio: bytes, sample_rate: int = 16000) -> str:
+            start = time.monotonic()
+            time.sleep(0.3)  # a local model computing on the calling thread
+            with self.lock:
+                self.spans.append((start, time.monotonic()))
+            return "hello"
+
+    class SilentTTS(TTSClient):
+        async def synthesize(self, text: str) -> bytes:
+            return b""
+
+        async def synthesize_stream(self, text_iter: AsyncIterator[str]) -> AsyncIterator[bytes]:
+            async for _ in text_iter:
+                yield b"\x00\x00" * 10
+
+    app = create_app(
+        Settings(web_stt_workers=2), agent_factory=FakeAgent,
+        tts=SilentTTS(), stt_factory=BlockingSTT, vad_factory=ScriptedVAD,
+    )
+    frame = b"\x00" * 960  # 30 ms at 16 kHz
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/audio") as a, client.websocket_connect("/ws/audio") as b:
+            for ws in (a, b):
+                ws.receive_json()
+                ws.send_bytes(frame * 2)
+            deadline = time.monotonic() + 5
+            while len(BlockingSTT.spans) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+    (start_a, end_a), (start_b, end_b) = BlockingSTT.spans
+    assert max(start_a, start_b) < min(end_a, end_b)  # the two overlapped
+
+
+_PREFORK_SCRIPT = """
+import asyncio, sys
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from src.server import PreforkServer, serve_handed_off
+
+def worker_main(index, channel):
+    async def whoami(request):
+        return PlainTextResponse(str(index))
+    app = Starlette(routes=[Route("/", whoami)])
+    asyncio.run(serve_handed_off(app, channel, log_level="warning"))
+
+sys.exit(PreforkServer("127.0.0.1", int(sys.argv[1]), 2, worker_main).run())
+"""
+
+
+def test_prefork_hands_sessions_to_their_worker():
+    import signal
+    import socket
+    import subprocess
+    import sys
+    import time
+    from pathlib import Path
+
+    import httpx
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-c", _PREFORK_SCRIPT, str(port)], cwd=Path(__file__).resolve().parent.parent
+    )
+    url = f"http://127.0.0.1:{port}/"
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                httpx.get(url, timeout=2)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise
+                time.sleep(0.1)
+
+        # A new connection per request, so each one goes through the parent
+        assert {httpx.get(url, params={"session": "w1.abc"}).text for _ in range(6)} == {"1"}
+        assert {httpx.get(url, params={"session": "w0.abc"}).text for _ in range(6)} == {"0"}
+        assert {httpx.get(url).text for _ in range(6)} == {"0", "1"}  # new clients: round-robin
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0